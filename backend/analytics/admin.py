@@ -0,0 +1,17 @@
+"""
+Admin configuration for analytics app.
+"""
+from django.contrib import admin
+from .models import ComplianceReportSnapshot
+
+
+@admin.register(ComplianceReportSnapshot)
+class ComplianceReportSnapshotAdmin(admin.ModelAdmin):
+    """Admin interface for ComplianceReportSnapshot model."""
+    
+    list_display = ['generated_at', 'etag']
+    
+    readonly_fields = ['generated_at', 'etag', 'body']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,257 @@
+"""
+Compliance reporting, maintained incrementally.
+
+Scoring every product on request would decrypt and group the whole product
+table. Instead each save of a product or of its ``ProductDetail`` (the
+admin's inline saves that on its own) updates the ``ProductCompliance`` row
+and moves it between ``ComplianceTally`` buckets (certification x status x
+producer), in the save's transaction. ``take_snapshot`` renders the report
+from the tallies, whose size depends on the number of producers and
+certifications, not products, and stores it with a content hash. The API
+serves the latest snapshot as stored, using the hash as its ETag.
+
+Writes that bypass signals (``bulk_create``, ``queryset.update``, the
+benchmark loader) leave the tallies behind; ``rebuild`` recomputes them
+from the product table (``snapshot_compliance_report --rebuild``).
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blockchain.simulator import CARBON_ACTIVITY_BONUS, CERTIFICATION_SCORES, COMPLIANCE_THRESHOLD
+from products.models import Product
+from .models import ComplianceReportSnapshot, ComplianceTally, ProductCompliance
+
+
+def assess(certification, activity_bonus):
+    """``(score, is_compliant, risk_factors)``, by the rule of ``ProductRegistryContract``."""
+    score = min(CERTIFICATION_SCORES.get(certification, 50) + activity_bonus, 100)
+    risk_factors = []
+    if certification not in CERTIFICATION_SCORES:
+        risk_factors.append('certification')
+    if not activity_bonus:
+        risk_factors.append('carbon_activity')
+    return score, score >= COMPLIANCE_THRESHOLD, risk_factors
+
+
+def adjust_tally(certification, is_compliant, producer_id, products, score, using=None):
+    tallies = ComplianceTally.objects.db_manager(using)
+    tally, _ = tallies.get_or_create(
+        certification=certification, is_compliant=is_compliant, producer_id=producer_id
+    )
+    tallies.filter(pk=tally.pk).update(
+        products=F('products') + products, score_total=F('score_total') + score
+    )
+
+
+def update_product(product, created=False, using=None):
+    """Bring ``product``'s compliance row and tallies up to date after a save."""
+    rows = ProductCompliance.objects.db_manager(using)
+    previous = None if created else rows.filter(pk=product.pk).first()
+    details_changed = getattr(product, '_details_changed', False)
+    if previous is None:
+        # A product saved without details has no carbon activity; don't query for one
+        activity = product.carbon_activity if details_changed or not created else ''
+        bonus = CARBON_ACTIVITY_BONUS.get(activity, 0)
+    elif details_changed:
+        bonus = CARBON_ACTIVITY_BONUS.get(product.carbon_activity, 0)
+    else:
+        bonus = previous.activity_bonus
+
+    inputs = (product.certification, bonus, product.created_by_id)
+    if previous is not None and (previous.certification, previous.activity_bonus, previous.producer_id) == inputs:
+        return previous
+    return _store(product, bonus, previous, using)
+
+
+def update_details(details, using=None):
+    """Bring the product's compliance row and tallies up to date after its details were saved on their own."""
+    rows = ProductCompliance.objects.db_manager(using)
+    previous = rows.filter(pk=details.product_id).first()
+    bonus = CARBON_ACTIVITY_BONUS.get(details.carbon_activity, 0)
+    if previous is not None and previous.activity_bonus == bonus:
+        return previous
+    product = Product.objects.db_manager(using).only('id', 'certification', 'created_by_id').get(pk=details.product_id)
+    return _store(product, bonus, previous, using)
+
+
+def _store(product, bonus, previous, using):
+    """Score ``product`` with ``bonus``, move it between tallies and save its row."""
+    score, is_compliant, risk_factors = assess(product.certification, bonus)
+    if previous is not None:
+        adjust_tally(previous.certification, previous.is_compliant, previous.producer_id, -1, -previous.score, using)
+    adjust_tally(product.certification, is_compliant, product.created_by_id, 1, score, using)
+    row, _ = ProductCompliance.objects.db_manager(using).update_or_create(pk=product.pk, defaults={
+        'producer_id': product.created_by_id,
+        'certification': product.certification,
+        'activity_bonus': bonus,
+        'score': score,
+        'is_compliant': is_compliant,
+        'risk_factors': risk_factors,
+    })
+    return row
+
+
+def remove(row, using=None):
+    adjust_tally(row.certification, row.is_compliant, row.producer_id, -1, -row.score, using)
+
+
+def rebuild(batch_size=2000, apps=global_apps, using=None):
+    """
+    Recompute every compliance row and tally from the product table; returns the product count.
+
+    A data migration passes its historical ``apps`` and database alias.
+    """
+    Product = apps.get_model('products', 'Product')
+    ProductCompliance = apps.get_model('analytics', 'ProductCompliance')
+    ComplianceTally = apps.get_model('analytics', 'ComplianceTally')
+    using = using or router.db_for_write(ProductCompliance)
+    tallies = {}
+    count = 0
+    with transaction.atomic(using=using):
+        # Plain DELETEs: per-row delete signals would adjust tallies that are about to be dropped
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {ProductCompliance._meta.db_table}')
+            cursor.execute(f'DELETE FROM {ComplianceTally._meta.db_table}')
+
+        products = (
+            Product.objects.using(using)
+            .select_related('details')
+            .only('id', 'certification', 'created_by_id', 'details__carbon_activity')
+            .order_by('pk')
+        )
+        batch = []
+        for product in products.iterator(chunk_size=batch_size):
+            details = getattr(product, 'details', None)
+            bonus = CARBON_ACTIVITY_BONUS.get(details.carbon_activity if details else '', 0)
+            score, is_compliant, risk_factors = assess(product.certification, bonus)
+            batch.append(ProductCompliance(
+                product_id=product.pk, producer_id=product.created_by_id, certification=product.certification,
+                activity_bonus=bonus, score=score, is_compliant=is_compliant, risk_factors=risk_factors,
+            ))
+            key = (product.certification, is_compliant, product.created_by_id)
+            products_total, score_total = tallies.get(key, (0, 0))
+            tallies[key] = (products_total + 1, score_total + score)
+            count += 1
+            if len(batch) >= batch_size:
+                ProductCompliance.objects.using(using).bulk_create(batch)
+                batch = []
+        ProductCompliance.objects.using(using).bulk_create(batch)
+        ComplianceTally.objects.using(using).bulk_create([
+            ComplianceTally(
+                certification=certification, is_compliant=is_compliant, producer_id=producer_id,
+                products=products_total, score_total=score_total,
+            )
+            for (certification, is_compliant, producer_id), (products_total, score_total) in tallies.items()
+        ], batch_size=batch_size)
+    return count
+
+
+def _summarize(row):
+    """Counts and average score from a ``_grouped`` row."""
+    products = row.pop('count') or 0
+    compliant = row.pop('compliant') or 0
+    scores = row.pop('scores') or 0
+    return {
+        **row,
+        'products': products,
+        'compliant': compliant,
+        'non_compliant': products - compliant,
+        'average_score': round(scores / products, 1) if products else 0.0,
+    }
+
+
+GROUP_TOTALS = {
+    'count': Sum('products'),
+    'compliant': Sum('products', filter=Q(is_compliant=True)),
+    'scores': Sum('score_total'),
+}
+
+
+def _grouped(*fields):
+    return ComplianceTally.objects.filter(products__gt=0).values(*fields).annotate(**GROUP_TOTALS)
+
+
+def build_report(detail_limit=None):
+    """
+    The report content (everything but ``report_id`` and ``generated_at``).
+
+    Producers are ranked by non-compliant products and, like the product
+    details (non-compliant products, lowest score first), cut at
+    ``COMPLIANCE_REPORT_DETAIL_LIMIT`` entries.
+    """
+    limit = settings.COMPLIANCE_REPORT_DETAIL_LIMIT if detail_limit is None else detail_limit
+    tallies = ComplianceTally.objects.filter(products__gt=0)
+    summary = _summarize(tallies.aggregate(**GROUP_TOTALS))
+    by_certification = [_summarize(row) for row in _grouped('certification').order_by('certification')]
+
+    producer_rows = list(
+        _grouped('producer_id')
+        .annotate(non_compliant=F('count') - Coalesce(F('compliant'), 0))
+        .order_by('-non_compliant', 'producer_id')[:limit]
+    )
+    names = dict(User.objects.filter(pk__in=[row['producer_id'] for row in producer_rows]).values_list('id', 'username'))
+    by_producer = []
+    for row in producer_rows:
+        del row['non_compliant']
+        by_producer.append(_summarize({**row, 'producer': names.get(row['producer_id'], '')}))
+
+    details = [
+        {
+            'batch_id': row.product.batch_id,
+            'name': row.product.name,
+            'compliance_score': row.score,
+            'status': 'non_compliant',
+            'risk_factors': row.risk_factors,
+        }
+        for row in ProductCompliance.objects.filter(is_compliant=False)
+        .select_related('product')
+        .only('score', 'risk_factors', 'product__batch_id', 'product__name')
+        .order_by('score', 'product_id')[:limit]
+    ]
+
+    return {
+        'summary': {
+            'total_products': summary['products'],
+            'compliant_products': summary['compliant'],
+            'non_compliant_products': summary['non_compliant'],
+            'average_score': summary['average_score'],
+            'compliance_threshold': COMPLIANCE_THRESHOLD,
+            'producers': tallies.values('producer_id').distinct().count(),
+        },
+        'by_certification': by_certification,
+        'by_producer': by_producer,
+        'details': details,
+    }
+
+
+def take_snapshot():
+    """
+    Store the current report if its content changed; returns ``(snapshot, created)``.
+
+    An unchanged report keeps the previous snapshot, so its ETag stays valid.
+    """
+    content = build_report()
+    etag = hashlib.sha256(json.dumps(content, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+    latest = ComplianceReportSnapshot.objects.only('etag', 'generated_at').first()
+    if latest is not None and latest.etag == etag:
+        return latest, False
+
+    now = timezone.now()
+    report = {
+        'report_id': f'COMP_{now:%Y%m%d_%H%M%S}',
+        'generated_at': now.isoformat(timespec='seconds').replace('+00:00', 'Z'),
+        **content,
+    }
+    snapshot = ComplianceReportSnapshot.objects.create(generated_at=now, etag=etag, body=json.dumps(report))
+    cutoff = now - timedelta(days=settings.COMPLIANCE_REPORT_RETENTION_DAYS)
+    ComplianceReportSnapshot.objects.filter(generated_at__lt=cutoff).delete()
+    return snapshot, True
@@ -0,0 +1,48 @@
+"""
+Snapshot the compliance report served at /api/analytics/reports/compliance/.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from analytics.compliance import rebuild, take_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Store a compliance report snapshot now and then on an interval'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Seconds between snapshots (default COMPLIANCE_REPORT_INTERVAL)')
+        parser.add_argument('--once', action='store_true', help='Take a single snapshot and exit')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='First recompute all scores and tallies from the product table')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            started = time.monotonic()
+            count = rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt compliance tallies for {count} product(s) in {time.monotonic() - started:.1f}s'
+            ))
+        if options['once']:
+            snapshot, created = take_snapshot()
+            state = 'Stored' if created else 'Unchanged since'
+            self.stdout.write(self.style.SUCCESS(f'{state} snapshot {snapshot.generated_at:%Y-%m-%d %H:%M:%S} ({snapshot.etag[:12]})'))
+            return
+
+        interval = options['interval'] or settings.COMPLIANCE_REPORT_INTERVAL
+        while True:
+            try:
+                snapshot, created = take_snapshot()
+                if created:
+                    logger.info(f"Stored compliance report snapshot {snapshot.etag[:12]}")
+            except Exception:
+                logger.exception("Compliance report snapshot failed")
+            close_old_connections()
+            time.sleep(interval)
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0005_remove_product_heavy_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generated_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('etag', models.CharField(help_text='Hash of the report content', max_length=64)),
+                ('body', models.TextField(help_text='Report JSON')),
+            ],
+            options={
+                'verbose_name': 'Compliance Report Snapshot',
+                'verbose_name_plural': 'Compliance Report Snapshots',
+                'ordering': ['-generated_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ComplianceTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('certification', models.CharField(max_length=50)),
+                ('is_compliant', models.BooleanField()),
+                ('producer_id', models.IntegerField()),
+                ('products', models.IntegerField(default=0)),
+                ('score_total', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Compliance Tally',
+                'verbose_name_plural': 'Compliance Tallies',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductCompliance',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='compliance', serialize=False, to='products.product')),
+                ('producer_id', models.IntegerField(help_text='Product.created_by_id')),
+                ('certification', models.CharField(max_length=50)),
+                ('activity_bonus', models.PositiveSmallIntegerField(default=0, help_text='Score bonus of the carbon activity')),
+                ('score', models.PositiveSmallIntegerField()),
+                ('is_compliant', models.BooleanField()),
+                ('risk_factors', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Product Compliance',
+                'verbose_name_plural': 'Product Compliance',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='compliancetally',
+            constraint=models.UniqueConstraint(fields=('certification', 'is_compliant', 'producer_id'), name='unique_compliance_tally'),
+        ),
+        migrations.AddIndex(
+            model_name='productcompliance',
+            index=models.Index(fields=['is_compliant', 'score'], name='product_compliance_status'),
+        ),
+    ]
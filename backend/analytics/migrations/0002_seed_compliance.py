@@ -0,0 +1,24 @@
+"""
+Score the products that existed before compliance was tracked.
+
+Rows and tallies are only maintained by saves, so without this the report
+would leave out every product created before ``0001_initial``.
+"""
+from django.db import migrations
+
+
+def seed_compliance(apps, schema_editor):
+    from analytics.compliance import rebuild
+
+    rebuild(apps=apps, using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_compliance, migrations.RunPython.noop),
+    ]
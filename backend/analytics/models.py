@@ -0,0 +1,79 @@
+"""
+Reporting models for GreenTrace.
+"""
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from products.models import Product
+
+
+class ProductCompliance(models.Model):
+    """
+    Compliance score of one product, kept in step with it by signals.
+    
+    Holds only the plaintext inputs of the score, so reports never decrypt
+    product rows.
+    """
+    
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='compliance'
+    )
+    producer_id = models.IntegerField(help_text=_('Product.created_by_id'))
+    certification = models.CharField(max_length=50)
+    activity_bonus = models.PositiveSmallIntegerField(default=0, help_text=_('Score bonus of the carbon activity'))
+    score = models.PositiveSmallIntegerField()
+    is_compliant = models.BooleanField()
+    risk_factors = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Product Compliance')
+        verbose_name_plural = _('Product Compliance')
+        indexes = [
+            models.Index(fields=['is_compliant', 'score'], name='product_compliance_status'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id}: {self.score}"
+
+
+class ComplianceTally(models.Model):
+    """Running product count and score total per certification, status and producer."""
+    
+    certification = models.CharField(max_length=50)
+    is_compliant = models.BooleanField()
+    producer_id = models.IntegerField()
+    products = models.IntegerField(default=0)
+    score_total = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = _('Compliance Tally')
+        verbose_name_plural = _('Compliance Tallies')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['certification', 'is_compliant', 'producer_id'], name='unique_compliance_tally'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.certification}/{self.producer_id}/{self.is_compliant}: {self.products}"
+
+
+class ComplianceReportSnapshot(models.Model):
+    """A rendered compliance report, served as stored."""
+    
+    generated_at = models.DateTimeField(default=timezone.now, db_index=True)
+    etag = models.CharField(max_length=64, help_text=_('Hash of the report content'))
+    body = models.TextField(help_text=_('Report JSON'))
+    
+    class Meta:
+        ordering = ['-generated_at']
+        verbose_name = _('Compliance Report Snapshot')
+        verbose_name_plural = _('Compliance Report Snapshots')
+    
+    def __str__(self):
+        return f"Compliance report {self.generated_at:%Y-%m-%d %H:%M}"
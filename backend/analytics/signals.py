@@ -0,0 +1,33 @@
+"""
+Signal handlers keeping compliance tallies in step with products.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from products.models import Product, ProductDetail
+from . import compliance
+from .models import ProductCompliance
+
+
+@receiver(post_save, sender=Product)
+def track_product_compliance(sender, instance, created, raw=False, using=None, **kwargs):
+    """Runs inside ``Product.save``'s transaction, so tallies commit with the product."""
+    if not raw:
+        compliance.update_product(instance, created, using)
+
+
+@receiver(post_save, sender=ProductDetail)
+def track_detail_compliance(sender, instance, created, raw=False, using=None, **kwargs):
+    """Details saved on their own, as the admin's inline does, can change the carbon activity bonus."""
+    if raw:
+        return
+    product = instance.product if ProductDetail.product.is_cached(instance) else None
+    # Product.save saves its changed details after scoring them
+    if product is not None and getattr(product, '_details_changed', False):
+        return
+    compliance.update_details(instance, using)
+
+
+@receiver(post_delete, sender=ProductCompliance)
+def untrack_product_compliance(sender, instance, using=None, **kwargs):
+    compliance.remove(instance, using)
@@ -0,0 +1,68 @@
+"""
+Compliance tallies after detail edits, and the report's query budget.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from greentrace.testing import SeededTestCase
+from products.models import Product, ProductDetail
+from users.permissions import invalidate_permission_context
+from . import compliance
+from .models import ComplianceTally, ProductCompliance
+
+
+class ComplianceDetailTests(SeededTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.product = Product(
+            name='Inline coffee', batch_id='INLINE-1', certification='none', created_by=cls.member
+        )
+        cls.product.carbon_activity = ''
+        cls.product.save()
+
+    def tally(self, is_compliant):
+        return ComplianceTally.objects.filter(
+            certification='none', is_compliant=is_compliant, producer_id=self.member.pk
+        ).values_list('products', flat=True).first() or 0
+
+    def test_details_saved_on_their_own_rescore_the_product(self):
+        self.assertFalse(ProductCompliance.objects.get(pk=self.product.pk).is_compliant)
+        compliant, non_compliant = self.tally(True), self.tally(False)
+
+        # What the admin's ProductDetailInline does after saving the unchanged product
+        details = ProductDetail.objects.get(product=self.product)
+        details.product = Product.objects.get(pk=self.product.pk)
+        details.carbon_activity = 'carbon-negative'
+        details.save()
+
+        row = ProductCompliance.objects.get(pk=self.product.pk)
+        self.assertEqual((row.activity_bonus, row.score, row.is_compliant), (20, 70, True))
+        self.assertEqual((self.tally(True), self.tally(False)), (compliant + 1, non_compliant - 1))
+
+    def test_product_save_scores_its_details_once(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.carbon_activity = 'low-carbon'
+        with CaptureQueriesContext(connection) as queries:
+            product.save()
+        reads = [q for q in queries if q['sql'].startswith('SELECT') and 'analytics_productcompliance' in q['sql']]
+        self.assertEqual(len(reads), 2)  # update_product's lookup and update_or_create's; none from the details save
+        self.assertEqual(ProductCompliance.objects.get(pk=self.product.pk).score, 60)
+
+
+class ComplianceReportQueryTests(SeededTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        compliance.rebuild()
+        compliance.take_snapshot()
+
+    def test_staff_report_on_cold_permission_cache(self):
+        self.client.force_login(self.staff)
+        invalidate_permission_context(self.staff.pk)
+        response = self.client.get(reverse('compliance_report'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary']['total_products'], self.products)
@@ -0,0 +1,9 @@
+"""
+Analytics URLs.
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('reports/compliance/', views.compliance_report, name='compliance_report'),
+]
@@ -0,0 +1,81 @@
+"""
+Analytics views for GreenTrace.
+"""
+import csv
+import io
+import json
+from datetime import datetime, time
+
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_http_methods
+
+from greentrace.responses import JsonResponse
+from users.models import UserProfile
+from .models import ComplianceReportSnapshot
+
+REPORT_FORMATS = ('json', 'csv')
+
+
+def _report_csv(body):
+    """Certification and producer breakdowns of a stored report as CSV."""
+    report = json.loads(body)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['group', 'key', 'products', 'compliant', 'non_compliant', 'average_score'])
+    for group, key, rows in (
+        ('certification', 'certification', report['by_certification']),
+        ('producer', 'producer', report['by_producer']),
+    ):
+        for row in rows:
+            writer.writerow([group, row[key], row['products'], row['compliant'], row['non_compliant'], row['average_score']])
+    return output.getvalue()
+
+
+@require_http_methods(["GET", "HEAD"])
+def compliance_report(request):
+    """
+    The latest compliance report snapshot (or the last one taken by ``end_date``).
+
+    Served as stored; ``If-None-Match`` with the current ETag gets a 304
+    without reading the report body.
+    """
+    permissions = request.permissions
+    if permissions.user_id is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    # Covers every producer, so only staff and the admin role (regulators, auditors) may read it
+    if not (permissions.is_staff or permissions.role == UserProfile.UserRole.ADMIN):
+        return JsonResponse({'error': 'Compliance reports require admin access'}, status=403)
+
+    report_format = request.GET.get('format', 'json')
+    if report_format not in REPORT_FORMATS:
+        return JsonResponse({'error': f'format must be one of: {", ".join(REPORT_FORMATS)}'}, status=400)
+
+    snapshots = ComplianceReportSnapshot.objects.all()
+    if request.GET.get('end_date'):
+        try:
+            end_date = datetime.strptime(request.GET['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return JsonResponse({'error': 'end_date must be YYYY-MM-DD'}, status=400)
+        snapshots = snapshots.filter(generated_at__lt=timezone.make_aware(datetime.combine(end_date, time.max)))
+    snapshot = snapshots.only('id', 'etag', 'generated_at').first()
+    if snapshot is None:
+        return JsonResponse({'error': 'No compliance report has been generated yet'}, status=404)
+
+    etag = f'"{snapshot.etag[:32]}{"-csv" if report_format == "csv" else ""}"'
+    last_modified = int(snapshot.generated_at.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        body = ComplianceReportSnapshot.objects.values_list('body', flat=True).get(pk=snapshot.pk)
+        if report_format == 'csv':
+            response = HttpResponse(_report_csv(body), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="compliance-{snapshot.generated_at:%Y%m%d}.csv"'
+        else:
+            response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Regulator-only data: never stored by shared caches, always revalidated
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
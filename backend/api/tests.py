@@ -0,0 +1,20 @@
+"""
+Public endpoints of the API root.
+"""
+from django.test import SimpleTestCase, override_settings
+
+from .urls import API_ROOT, HEALTH
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class PublicEndpointTests(SimpleTestCase):
+
+    def test_root_is_public(self):
+        response = self.client.get('/api/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, API_ROOT.content)
+
+    def test_health_is_public(self):
+        response = self.client.get('/api/health/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, HEALTH.content)
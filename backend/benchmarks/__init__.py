@@ -0,0 +1,16 @@
+"""
+Load-test harness for GreenTrace.
+
+``benchmarks.dataset`` bulk-loads a synthetic dataset (wallet users,
+products with IoT readings, carbon credits, audit and access log rows) at
+a named scale; ``benchmarks.scenarios`` drives the real endpoints and
+reports throughput and latency percentiles as JSON lines;
+``benchmarks.modes`` compares the sync and async API views on one workload.
+
+    python -m benchmarks load --scale 10k
+    python -m benchmarks run --scenario all --requests 2000 --concurrency 16 --output results.jsonl
+    python -m benchmarks run --scenario product_detail --target http://127.0.0.1:8000
+    python -m benchmarks modes --mode async --concurrency 2000 --workload create
+
+All commands but ``json`` use the configured database (``DJANGO_SETTINGS_MODULE``).
+"""
@@ -0,0 +1,94 @@
+"""
+Command line for the load-test harness (see ``benchmarks/__init__.py``).
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add the project directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    from benchmarks.dataset import SCALES
+    from benchmarks.modes import WORKLOADS
+    from benchmarks.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='GreenTrace load-test harness')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('load', help='Bulk-load a synthetic dataset')
+    load.add_argument('--scale', choices=list(SCALES), default='10k', help='Number of products')
+    load.add_argument('--seed', type=int, default=0)
+    load.add_argument('--batch-size', type=int, default=2000)
+
+    run = commands.add_parser('run', help='Run load scenarios and print one JSON line per scenario')
+    run.add_argument('--scenario', choices=[*SCENARIOS, 'all'], default='all')
+    run.add_argument('--requests', type=int, default=1000)
+    run.add_argument('--concurrency', type=int, default=8, help='Closed-loop client threads')
+    run.add_argument('--warmup', type=int, default=50, help='Unrecorded requests before each scenario')
+    run.add_argument('--target', default='inprocess', help='"inprocess" or a base URL of a running server')
+    run.add_argument('--output', help='Also append results to this JSON-lines file')
+
+    encode = commands.add_parser('json', help='Microbenchmark JSON encoders on product-list payloads')
+    encode.add_argument('--items', type=int, nargs='+', default=[50, 1000, 10000], help='Products per payload')
+    encode.add_argument('--repeat', type=int, default=5)
+    encode.add_argument('--output', help='Also append results to this JSON-lines file')
+
+    modes = commands.add_parser('modes', help='Compare sync (WSGI) and async (ASGI) API throughput')
+    modes.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    modes.add_argument('--workload', choices=sorted(WORKLOADS), default='check')
+    modes.add_argument('--requests', type=int, default=2000)
+    modes.add_argument('--concurrency', type=int, default=500, help='Requests in flight at once')
+    modes.add_argument('--threads', type=int, default=32, help='Sync mode worker threads')
+    modes.add_argument('--client-delay-ms', type=float, default=100.0, help='Delay before each body arrives')
+    modes.add_argument('--wallets', type=int, default=1000)
+    modes.add_argument('--output', help='Also append results to this JSON-lines file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == 'modes':
+        # Must be set before settings load: it picks sync or async views in the URLconf
+        os.environ['ASYNC_API_VIEWS'] = 'True' if args.mode == 'async' else 'False'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'greentrace.settings')
+    # In-process clients all come from one address; limits would measure the limiter
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'False')
+    import django
+    django.setup()
+
+    from benchmarks import modes
+    from benchmarks.dataset import SCALES, DatasetGenerator
+    from benchmarks.scenarios import SCENARIOS, Context, HttpTarget, InProcessTarget, git_commit, run_scenario
+
+    if args.command == 'load':
+        counts = DatasetGenerator(SCALES[args.scale], seed=args.seed, batch_size=args.batch_size).generate()
+        print(json.dumps({'scale': args.scale, 'rows': counts}))
+        return
+
+    if args.command == 'json':
+        from benchmarks import serialization
+        results = [
+            {'benchmark': 'json', 'commit': git_commit(), **serialization.run(items, args.repeat)}
+            for items in args.items
+        ]
+    elif args.command == 'modes':
+        results = modes.compare(args) if args.mode == 'both' else [modes.run(args)]
+    else:
+        target = InProcessTarget() if args.target == 'inprocess' else HttpTarget(args.target)
+        ctx = Context()
+        names = [name for name in SCENARIOS if name != 'mixed'] if args.scenario == 'all' else [args.scenario]
+        results = (run_scenario(name, target, ctx, args.requests, args.concurrency, args.warmup) for name in names)
+
+    for result in results:
+        line = json.dumps(result)
+        print(line, flush=True)
+        if args.output:
+            with open(args.output, 'a') as output:
+                output.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main()
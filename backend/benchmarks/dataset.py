@@ -0,0 +1,235 @@
+"""
+Synthetic dataset generator.
+
+Rows are built in memory from a seeded ``random.Random`` and written with
+``bulk_create`` in batches, one transaction per batch. Encrypted fields go
+through the normal ``pre_save`` path, so products and details are stored
+exactly as the API would store them. Re-running adds another dataset next
+to the existing one (batch and credit ids carry a per-run prefix), while
+wallets are shared between runs with the same seed.
+"""
+import random
+import string
+import sys
+import time
+from array import array
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+# scale: number of products; the other tables are sized relative to it
+SCALES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+WALLETS_PER_PRODUCT = 0.05
+CREDITS_PER_PRODUCT = 0.5
+AUDIT_LOGS_PER_PRODUCT = 1
+ACCESS_LOGS_PER_PRODUCT = 1
+
+CROPS = ['Coffee', 'Cocoa', 'Tea', 'Avocado', 'Banana', 'Quinoa', 'Cashew', 'Vanilla', 'Rice', 'Cotton']
+REGIONS = ['Huila, Colombia', 'Sidamo, Ethiopia', 'Kerala, India', 'Ashanti, Ghana', 'Cusco, Peru',
+           'Dak Lak, Vietnam', 'Minas Gerais, Brazil', 'Sumatra, Indonesia', 'Chiapas, Mexico']
+PRACTICES = ['cover cropping', 'agroforestry shade trees', 'composting', 'drip irrigation',
+             'solar drying', 'no-till planting', 'biochar application', 'integrated pest management']
+
+
+def synthetic_wallet(seed, index):
+    return f'0x{seed:08x}{index:032x}'
+
+
+def wallet_addresses(count, seed=0):
+    return [synthetic_wallet(seed, index) for index in range(count)]
+
+
+class DatasetGenerator:
+    """Bulk-loads one synthetic dataset of ``products`` products (and proportional related rows)."""
+
+    def __init__(self, products, seed=0, batch_size=2000, out=sys.stderr):
+        self.products = products
+        self.seed = seed
+        self.batch_size = batch_size
+        self.out = out
+        self.random = random.Random(seed)
+        self.run = _base36(int(time.time()))
+        self.counts = {}
+
+    def log(self, message):
+        if self.out is not None:
+            self.out.write(message + '\n')
+            self.out.flush()
+
+    def generate(self):
+        """Load everything; returns ``{table: rows written}``."""
+        started = time.perf_counter()
+        with _fast_writes():
+            user_ids = self.load_wallets(max(10, int(self.products * WALLETS_PER_PRODUCT)))
+            product_ids = self.load_products(user_ids)
+            self.load_credits(user_ids, int(self.products * CREDITS_PER_PRODUCT))
+            self.load_audit_logs(user_ids, product_ids, int(self.products * AUDIT_LOGS_PER_PRODUCT))
+            self.load_access_logs(user_ids, product_ids, int(self.products * ACCESS_LOGS_PER_PRODUCT))
+        self.log(f'Loaded {self.counts} in {time.perf_counter() - started:.1f}s')
+        return self.counts
+
+    def _batches(self, total, label):
+        started = time.perf_counter()
+        for start in range(0, total, self.batch_size):
+            yield start, min(total, start + self.batch_size)
+            done = min(total, start + self.batch_size)
+            rate = done / max(time.perf_counter() - started, 1e-9)
+            self.log(f'  {label}: {done}/{total} ({rate:,.0f} rows/s)')
+        self.counts[label] = total
+
+    def load_wallets(self, count):
+        from users.provisioning import bulk_provision_wallets
+
+        addresses = wallet_addresses(count, self.seed)
+        user_ids = []
+        for start, end in self._batches(count, 'wallets'):
+            identities = bulk_provision_wallets(addresses[start:end], batch_size=self.batch_size)
+            user_ids.extend(identity.user_id for identity in identities.values())
+        return user_ids
+
+    def load_products(self, user_ids):
+        from products.models import Product, ProductDetail
+
+        rng = self.random
+        certifications = [choice for choice, _ in Product.CertificationType.choices]
+        # Compact ids: 10M Python ints would cost ~300 MB
+        product_ids = array('q')
+        for start, end in self._batches(self.products, 'products'):
+            products, details = [], []
+            for index in range(start, end):
+                crop = rng.choice(CROPS)
+                public = rng.random() < 0.7
+                product = Product(
+                    name=f'{crop} lot {index}',
+                    batch_id=f'SYN-{self.run}-{index}',
+                    certification=rng.choice(certifications),
+                    location=rng.choice(REGIONS),
+                    producer=f'{rng.choice(string.ascii_uppercase)}. {crop} Cooperative',
+                    is_sensitive_data_public=public,
+                    is_producer_details_public=public,
+                    is_iot_data_public=rng.random() < 0.5,
+                    is_carbon_details_public=public,
+                    created_by_id=rng.choice(user_ids),
+                )
+                products.append(product)
+                details.append(ProductDetail(
+                    product=product,
+                    description=f'{crop} grown in {rng.choice(REGIONS)} using {rng.choice(PRACTICES)}.',
+                    carbon_activity=', '.join(rng.sample(PRACTICES, 3)),
+                    iot_data=_iot_readings(rng),
+                ))
+            with transaction.atomic():
+                Product.objects.bulk_create(products)
+                ProductDetail.objects.bulk_create(details)
+            product_ids.extend(product.pk for product in products)
+        return product_ids
+
+    def load_credits(self, user_ids, count):
+        from carbon_credits.models import CarbonCredit
+
+        rng = self.random
+        statuses = [choice for choice, _ in CarbonCredit.CreditStatus.choices]
+        verifications = [choice for choice, _ in CarbonCredit.VerificationStatus.choices]
+        for start, end in self._batches(count, 'credits'):
+            credits = [
+                CarbonCredit(
+                    id=f'SC{self.run}{index:x}',
+                    amount=Decimal(rng.randint(1, 50000)) / 100,
+                    issuer=f'{rng.choice(CROPS)} Cooperative',
+                    recipient=f'Buyer {rng.randint(1, 500)}',
+                    status=rng.choice(statuses),
+                    verification_status=rng.choice(verifications),
+                    description=f'Offsets from {rng.choice(PRACTICES)}',
+                    carbon_offset=', '.join(rng.sample(PRACTICES, 2)),
+                    created_by_id=rng.choice(user_ids),
+                )
+                for index in range(start, end)
+            ]
+            with transaction.atomic():
+                CarbonCredit.objects.bulk_create(credits)
+
+    def load_audit_logs(self, user_ids, product_ids, count):
+        from products.models import ProductAuditLog
+
+        rng = self.random
+        actions = [choice for choice, _ in ProductAuditLog.ActionType.choices]
+        for start, end in self._batches(count, 'audit_logs'):
+            with transaction.atomic():
+                ProductAuditLog.objects.bulk_create([
+                    ProductAuditLog(
+                        product_id=rng.choice(product_ids),
+                        user_id=rng.choice(user_ids),
+                        action=rng.choice(actions),
+                        details={'source': 'synthetic'},
+                        ip_address=f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+                        user_agent='benchmarks/1.0',
+                    )
+                    for _ in range(start, end)
+                ])
+
+    def load_access_logs(self, user_ids, product_ids, count):
+        from privacy.models import DataAccessLog, PrivacySettings
+        from products.models import Product
+
+        rng = self.random
+        now = timezone.now()
+        access_types = [choice for choice, _ in DataAccessLog.AccessType.choices]
+        privacy_levels = [choice for choice, _ in PrivacySettings.PrivacyLevel.choices]
+        for start, end in self._batches(count, 'access_logs'):
+            with transaction.atomic():
+                DataAccessLog.objects.bulk_create([
+                    DataAccessLog(
+                        user_id=rng.choice(user_ids),
+                        access_type=rng.choice(access_types),
+                        model_name='Product',
+                        object_id=str(rng.choice(product_ids)),
+                        field_names=rng.sample(list(Product.SENSITIVE_FIELDS), 2),
+                        privacy_level=rng.choice(privacy_levels),
+                        data_sensitivity=rng.choice(['low', 'high']),
+                        user_agent='benchmarks/1.0',
+                        timestamp=now - timedelta(seconds=rng.randint(0, 90 * 86400)),
+                    )
+                    for _ in range(start, end)
+                ])
+
+
+def _iot_readings(rng, count=12):
+    """Sensor readings as the frontend submits them: one ``time temp humidity soil`` line each."""
+    return '\n'.join(
+        f'{hour:02d}:00 temp={rng.uniform(14, 34):.1f}C humidity={rng.uniform(40, 95):.0f}% '
+        f'soil_moisture={rng.uniform(10, 45):.1f}%'
+        for hour in range(0, 24, 24 // count)
+    )
+
+
+def _base36(number):
+    digits = string.digits + string.ascii_lowercase
+    result = ''
+    while number:
+        number, remainder = divmod(number, 36)
+        result = digits[remainder] + result
+    return result or '0'
+
+
+class _fast_writes:
+    """Relax SQLite durability for the load (the data is synthetic and can be regenerated)."""
+
+    def __enter__(self):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+        return self
+
+    def __exit__(self, *exc_info):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = NORMAL')
@@ -0,0 +1,238 @@
+"""
+Compare sync (WSGI) and async (ASGI) throughput of the JSON API.
+
+Both modes drive the real Django handler, middleware and views in-process
+with the same workload, each request signed with its wallet's token. Every
+request body arrives after ``--client-delay-ms`` (a slow client or
+upstream), which pins a thread under WSGI but only a coroutine under ASGI.
+
+``ASYNC_API_VIEWS`` picks the views when the URLconf loads, so one process
+runs one mode; ``compare`` runs each in its own ``python -m benchmarks
+modes --mode <mode>``. Wallets and products are written to the configured
+database.
+"""
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKLOADS = {
+    # name: (path, body for request i)
+    'check': ('/api/auth/check/', lambda run, wallet, i: {'wallet_address': wallet}),
+    'challenge': ('/api/auth/challenge/', lambda run, wallet, i: {'wallet_address': wallet}),
+    'create': ('/api/products/create/', lambda run, wallet, i: {
+        'wallet_address': wallet,
+        'name': f'Benchmark product {i}',
+        'batch_id': f'BENCH-{run}-{i}',
+        'description': 'Synthetic benchmark product',
+    }),
+}
+
+
+class Stats:
+    """Latencies, errors and peak thread count for one run."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.peak_threads = threading.active_count()
+        self._lock = threading.Lock()
+
+    def record(self, started, status):
+        with self._lock:
+            self.latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                self.errors += 1
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+
+    def summary(self, mode, elapsed):
+        latencies = sorted(self.latencies)
+        pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1)
+        return {
+            'mode': mode,
+            'requests': len(latencies),
+            'errors': self.errors,
+            'seconds': round(elapsed, 2),
+            'req_per_s': round(len(latencies) / elapsed, 1),
+            'p50_ms': pick(0.5),
+            'p99_ms': pick(0.99),
+            'peak_threads': self.peak_threads,
+        }
+
+
+class SlowInput(io.RawIOBase):
+    """``wsgi.input`` whose body arrives only after ``delay`` seconds."""
+
+    def __init__(self, body, delay):
+        self._body = io.BytesIO(body)
+        self._delay = delay
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._delay:
+            time.sleep(self._delay)
+            self._delay = 0
+        return self._body.readinto(buffer)
+
+
+def run_sync(requests, args, stats):
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    delay = args.client_delay_ms / 1000
+    in_flight = threading.BoundedSemaphore(args.concurrency)
+
+    def call(path, body, token, started):
+        status = []
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BufferedReader(SlowInput(body, delay)),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': sys.stderr,
+            'HTTP_AUTHORIZATION': f'Wallet {token}',
+        }
+        try:
+            response = handler(environ, lambda code, headers, exc_info=None: status.append(int(code[:3])))
+            for _ in response:
+                pass
+            response.close()
+            stats.record(started, status[0])
+        except Exception:
+            stats.record(started, 500)
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for path, body, token in requests:
+            in_flight.acquire()
+            pool.submit(call, path, body, token, time.perf_counter())
+
+
+async def run_async(requests, args, stats):
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    delay = args.client_delay_ms / 1000
+    in_flight = asyncio.Semaphore(args.concurrency)
+
+    async def call(path, body, token, started):
+        status = []
+        done = asyncio.Event()
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                await asyncio.sleep(delay)
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                done.set()
+
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'authorization', f'Wallet {token}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        try:
+            await handler(scope, receive, send)
+            stats.record(started, status[0] if status else 500)
+        except Exception:
+            stats.record(started, 500)
+        finally:
+            in_flight.release()
+
+    tasks = []
+    for path, body, token in requests:
+        await in_flight.acquire()
+        tasks.append(asyncio.create_task(call(path, body, token, time.perf_counter())))
+    await asyncio.gather(*tasks)
+
+
+def run(args):
+    """Run ``args.mode`` in this process, whose URLconf must have been loaded for it."""
+    from benchmarks.scenarios import git_commit
+    from users.models import UserProfile
+    from users.provisioning import bulk_provision_wallets
+    from users.tokens import issue_token
+
+    wallets = list(bulk_provision_wallets([f'0x{i:040x}' for i in range(1, args.wallets + 1)]))
+    tokens = {
+        profile.wallet_address: issue_token(profile)[0]
+        for profile in UserProfile.objects.filter(wallet_address__in=wallets).select_related('user')
+    }
+    path, make_body = WORKLOADS[args.workload]
+    run_id = f'{args.mode}-{int(time.time())}'
+    requests = []
+    for i in range(args.requests):
+        wallet = wallets[i % len(wallets)]
+        requests.append((path, json.dumps(make_body(run_id, wallet, i)).encode(), tokens[wallet]))
+
+    stats = Stats()
+    started = time.perf_counter()
+    if args.mode == 'async':
+        asyncio.run(run_async(requests, args, stats))
+    else:
+        run_sync(requests, args, stats)
+    return {
+        'benchmark': 'modes',
+        'commit': git_commit(),
+        'workload': args.workload,
+        'concurrency': args.concurrency,
+        'client_delay_ms': args.client_delay_ms,
+        **stats.summary(args.mode, time.perf_counter() - started),
+    }
+
+
+def compare(args):
+    """Run both modes, each in its own process so the URLconf and connections start fresh."""
+    options = [
+        f"--{name.replace('_', '-')}={value}"
+        for name, value in vars(args).items() if name not in ('command', 'mode', 'output')
+    ]
+    results = []
+    for mode in ('sync', 'async'):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks', 'modes', '--mode', mode, *options],
+            cwd=PROJECT_DIR, check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
@@ -0,0 +1,309 @@
+"""
+Scripted load scenarios against the real endpoints.
+
+A scenario turns a request number into ``(method, path, body)``; the
+runner sends them, signed with the token of the body's ``wallet_address``,
+from ``concurrency`` closed-loop threads (each sends its next request as
+soon as the previous one returns) and summarizes throughput, status codes
+and latency percentiles as one JSON object.
+Any response other than 2xx/3xx, or a failed request, counts as an error.
+
+Requests go through the in-process WSGI handler by default, which measures
+the application without a server in front; ``HttpTarget`` sends them to a
+running server instead (gunicorn, uvicorn, a staging host).
+"""
+import http.client
+import io
+import json
+import math
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+READER_USERNAME = 'bench-reader'
+
+
+class Context:
+    """Wallets (with session tokens), product ids and a reader session sampled from the loaded dataset."""
+
+    def __init__(self, sample_size=2000, seed=0):
+        from django.contrib.auth.models import User
+        from django.db.models import Max, Min
+        from products.models import Product
+        from users.models import UserProfile
+        from users.tokens import issue_token
+        from users.wallets import normalize_wallet_address
+
+        self.random = random.Random(seed)
+        self.run = f'{int(time.time()):x}'
+        self.wallets = [
+            wallet for wallet in UserProfile.objects.exclude(wallet_address='')
+            .order_by('-id').values_list('wallet_address', flat=True)[:sample_size]
+            if normalize_wallet_address(wallet)
+        ]
+        bounds = Product.objects.aggregate(low=Min('id'), high=Max('id'))
+        candidates = (
+            [self.random.randint(bounds['low'], bounds['high']) for _ in range(sample_size)]
+            if bounds['low'] is not None else []
+        )
+        self.product_ids = list(Product.objects.filter(id__in=candidates).values_list('id', flat=True))
+        if not self.wallets or not self.product_ids:
+            raise RuntimeError('No dataset found; run "python -m benchmarks load" first')
+        # Valid for WALLET_TOKEN_TTL from here
+        self.tokens = {
+            profile.wallet_address: issue_token(profile)[0]
+            for profile in UserProfile.objects.filter(wallet_address__in=self.wallets).select_related('user')
+        }
+
+        reader, _ = User.objects.get_or_create(username=READER_USERNAME)
+        self.cookies = _session_cookie(reader)
+        self.list_pages = _list_pages(reader)
+        self.dataset = {
+            'products': Product.objects.count(),
+            'wallets': UserProfile.objects.exclude(wallet_address='').count(),
+        }
+
+    def wallet(self):
+        return self.random.choice(self.wallets)
+
+    def product_id(self):
+        return self.random.choice(self.product_ids)
+
+    def token(self, body):
+        """Wallet token for the wallet a request body acts for, if any."""
+        return self.tokens.get(body.get('wallet_address')) if body else None
+
+
+def _session_cookie(user):
+    """``Cookie`` header value for a logged-in session of ``user`` (same as the login view)."""
+    from django.conf import settings
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    return f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+
+def _list_pages(user):
+    """Pages of the product list ``user`` sees, from the view's own queryset and page size."""
+    from django.test import RequestFactory
+    from products.views import ProductListView
+    from users.permissions import context_for_user
+
+    request = RequestFactory().get('/api/products/')
+    request.user = user
+    request.permissions = context_for_user(user)
+    view = ProductListView()
+    view.setup(request)
+    return max(1, math.ceil(view.get_queryset().count() / view.paginate_by))
+
+
+def auth_check(ctx, n):
+    return 'POST', '/api/auth/check/', {'wallet_address': ctx.wallet()}
+
+
+def create_product(ctx, n):
+    return 'POST', '/api/products/create/', {
+        'wallet_address': ctx.wallet(),
+        'name': f'Benchmark product {n}',
+        'batch_id': f'BENCH-{ctx.run}-{threading.get_ident():x}-{n}',
+        'location': 'Huila, Colombia',
+        'producer': 'Benchmark Cooperative',
+        'description': 'Created by the load-test harness',
+        'carbon_activity': 'cover cropping, composting',
+        'iot_data': '06:00 temp=18.2C humidity=81% soil_moisture=31.0%',
+        'certification': 'organic',
+    }
+
+
+def create_credit(ctx, n):
+    return 'POST', '/api/credits/create/', {
+        'wallet_address': ctx.wallet(),
+        'amount': '12.50',
+        'description': 'Benchmark credit',
+        'carbon_offset': 'agroforestry shade trees',
+    }
+
+
+def product_list(ctx, n):
+    return 'GET', f'/api/products/?page={ctx.random.randint(1, ctx.list_pages)}', None
+
+
+def product_detail(ctx, n):
+    return 'GET', f'/api/products/{ctx.product_id()}/', None
+
+
+SCENARIOS = {
+    'auth_check': auth_check,
+    'create_product': create_product,
+    'create_credit': create_credit,
+    'product_list': product_list,
+    'product_detail': product_detail,
+}
+
+# Read-heavy traffic mix: (scenario, weight)
+MIXED = [('auth_check', 40), ('product_detail', 30), ('product_list', 20), ('create_product', 5), ('create_credit', 5)]
+
+
+def mixed(ctx, n):
+    names, weights = zip(*MIXED)
+    return SCENARIOS[ctx.random.choices(names, weights)[0]](ctx, n)
+
+
+SCENARIOS['mixed'] = mixed
+
+
+class InProcessTarget:
+    """Calls the Django WSGI handler directly."""
+
+    name = 'inprocess'
+
+    def __init__(self):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        self.handler = WSGIHandler()
+
+    def send(self, method, path, body, cookies, token=None):
+        path, _, query = path.partition('?')
+        payload = json.dumps(body).encode() if body is not None else b''
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_COOKIE': cookies,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+            'wsgi.input': io.BytesIO(payload),
+            'wsgi.url_scheme': 'http',
+            'wsgi.errors': sys.stderr,
+        }
+        if token:
+            environ['HTTP_AUTHORIZATION'] = f'Wallet {token}'
+        status = []
+        response = self.handler(environ, lambda code, headers, exc_info=None: status.append(int(code[:3])))
+        for _ in response:
+            pass
+        response.close()
+        return status[0]
+
+
+class HttpTarget:
+    """Sends requests over HTTP/1.1 keep-alive, one connection per thread."""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.name = base_url
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, method, path, body, cookies, token=None):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self.connection_class(self.netloc, timeout=self.timeout)
+        headers = {'Cookie': cookies, 'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Wallet {token}'
+        try:
+            connection.request(method, self.prefix + path, json.dumps(body) if body is not None else None, headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+
+
+def run_scenario(name, target, ctx, requests=1000, concurrency=8, warmup=50):
+    """Run ``requests`` requests of scenario ``name``; returns the summary dict."""
+    scenario = SCENARIOS[name]
+    for n in range(warmup):
+        method, path, body = scenario(ctx, -n - 1)
+        try:
+            target.send(method, path, body, ctx.cookies, ctx.token(body))
+        except Exception:
+            pass
+
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+    latencies, statuses = [], Counter()
+    results_lock = threading.Lock()
+
+    def worker():
+        from django.db import connections
+
+        while True:
+            with counter_lock:
+                n = next(counter, None)
+            if n is None:
+                break
+            method, path, body = scenario(ctx, n)
+            started = time.perf_counter()
+            try:
+                status = target.send(method, path, body, ctx.cookies, ctx.token(body))
+            except Exception:
+                status = 'error'
+            elapsed = time.perf_counter() - started
+            with results_lock:
+                latencies.append(elapsed)
+                statuses[str(status)] += 1
+        connections.close_all()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return summarize(name, target, ctx, concurrency, latencies, statuses, elapsed)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else 0.0
+
+
+def summarize(name, target, ctx, concurrency, latencies, statuses, elapsed):
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 2)
+    # A 4xx means the scenario did not exercise the endpoint it names
+    errors = sum(count for status, count in statuses.items() if status == 'error' or int(status) >= 400)
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'scenario': name,
+        'target': target.name,
+        'concurrency': concurrency,
+        'dataset': ctx.dataset,
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': dict(statuses),
+        'seconds': round(elapsed, 3),
+        'req_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p90_ms': ms(percentile(latencies, 0.90)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'max_ms': ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
@@ -0,0 +1,93 @@
+"""
+Microbenchmark of JSON encoding for list payloads.
+
+Encodes a list of product dicts shaped like ``Product.get_private_data``
+(strings, ids, a datetime per row) with each available encoder, through
+the same response and renderer classes the API uses, and reports the time
+per payload and the speed-up over Django's ``JsonResponse``.
+"""
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+
+WORDS = 'organic coffee cocoa shade grown arabica robusta cooperative huila cauca washed natural honey'.split()
+
+
+def product_rows(count, seed=0):
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            'id': n,
+            'name': ' '.join(rng.choices(WORDS, k=3)).title(),
+            'batch_id': f'BATCH-{n:08d}',
+            'certification': rng.choice(['organic', 'fair-trade', 'carbon-neutral', 'none']),
+            'created_at': started + timedelta(seconds=rng.randrange(10 ** 8), microseconds=rng.randrange(10 ** 6)),
+            'blockchain_hash': f'0x{rng.getrandbits(256):064x}',
+            'location': 'Huila, Colombia',
+            'producer': 'Cooperativa Cafetera del Sur',
+            'description': ' '.join(rng.choices(WORDS, k=40)),
+            'carbon_activity': 'cover cropping, composting',
+            'iot_data': f'06:00 temp={rng.uniform(12, 30):.1f}C humidity={rng.randrange(40, 95)}%',
+        }
+        for n in range(count)
+    ]
+
+
+def candidates():
+    """``{name: callable(payload)}`` for every encoder path available here."""
+    from django.http import JsonResponse as DjangoJsonResponse
+    from rest_framework.renderers import JSONRenderer
+
+    from greentrace import responses
+    from greentrace.renderers import FastJSONRenderer
+
+    def response_with(dumps):
+        def build(payload):
+            responses._dumps = dumps
+            return responses.JsonResponse(payload)
+        return build
+
+    paths = {
+        'django.JsonResponse': lambda payload: DjangoJsonResponse(payload),
+        'JsonResponse[stdlib]': response_with(responses.stdlib_dumps),
+        'drf.JSONRenderer': lambda payload: JSONRenderer().render(payload['products']),
+    }
+    if responses.orjson_dumps is not None:
+        paths['JsonResponse[orjson]'] = response_with(responses.orjson_dumps)
+        fast_renderer = FastJSONRenderer()
+
+        def render_fast(payload):
+            responses._dumps = responses.orjson_dumps
+            return fast_renderer.render(payload['products'])
+        paths['FastJSONRenderer[orjson]'] = render_fast
+    return paths
+
+
+def run(items=1000, repeat=5, seed=0):
+    """Best-of-``repeat`` seconds per payload for each path; returns a summary dict."""
+    from greentrace import responses
+
+    payload = {'products': product_rows(items, seed), 'total': items}
+    selected = responses._dumps
+    results = {}
+    try:
+        for name, build in candidates().items():
+            build(payload)  # warm up
+            number = max(1, 2000 // items)
+            best = min(timeit.repeat(lambda: build(payload), number=number, repeat=repeat)) / number
+            results[name] = best
+    finally:
+        responses._dumps = selected
+
+    baseline = results['django.JsonResponse']
+    drf_baseline = results['drf.JSONRenderer']
+    return {
+        'items': items,
+        'bytes': len(responses.stdlib_dumps(payload)),
+        'ms_per_payload': {name: round(seconds * 1000, 3) for name, seconds in results.items()},
+        'speedup': {
+            name: round((drf_baseline if 'Renderer' in name else baseline) / seconds, 2)
+            for name, seconds in results.items()
+        },
+    }
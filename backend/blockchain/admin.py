@@ -0,0 +1,31 @@
+"""
+Admin configuration for blockchain app.
+"""
+from django.contrib import admin
+from .models import ChainTransaction, CrossChainSync
+
+
+@admin.register(CrossChainSync)
+class CrossChainSyncAdmin(admin.ModelAdmin):
+    """Admin interface for CrossChainSync model."""
+
+    list_display = ['batch_id', 'network', 'status', 'attempts', 'synced_at', 'updated_at']
+
+    list_filter = ['status', 'network', 'updated_at']
+
+    search_fields = ['batch_id', 'proof', 'transaction_hash']
+
+    readonly_fields = ['created_at', 'updated_at', 'synced_at', 'proof', 'transaction_hash']
+
+
+@admin.register(ChainTransaction)
+class ChainTransactionAdmin(admin.ModelAdmin):
+    """Admin interface for ChainTransaction model."""
+
+    list_display = ['method', 'sender', 'nonce', 'status', 'gas_price', 'replacements', 'created_at']
+
+    list_filter = ['status', 'method', 'created_at']
+
+    search_fields = ['tx_hash', 'sender', 'target_pk']
+
+    readonly_fields = ['created_at', 'submitted_at', 'confirmed_at', 'tx_hash', 'broadcast_hashes', 'block_number']
@@ -0,0 +1,304 @@
+"""
+Queued cross-chain sync service.
+
+``POST /api/crosschain/sync/`` only records a queued ``CrossChainSync`` row.
+``manage.py process_crosschain_sync`` runs the workers: it claims rows with
+a lease, calls ``ProductRegistry.syncToOtherChain`` with a per-network
+concurrency cap, and renews the lease while it waits for the receipt. A row
+left in progress is only claimed again once its lease has expired, so a
+sync being handled by a live worker is never sent twice.
+
+A product must be on the chain before it can be synced. A worker that finds
+it missing waits while its ``addProduct`` transaction is queued or pending,
+and otherwise anchors it itself (with ``CHAIN_RPC_URL=sim://`` each process
+has its own chain, so the transaction manager's copy is not visible here).
+A failed attempt goes back to the queue with exponential backoff and is
+only marked failed after ``max_attempts``. Per-batch status is written
+through to the cache so ``GET /api/crosschain/status/<batch_id>/`` never
+touches the chain.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ChainTransaction, CrossChainSync
+from .rpc import EXECUTION_REVERTED, RPCError, get_chain_client
+from .simulator import SUPPORTED_NETWORKS
+
+logger = logging.getLogger(__name__)
+
+STATUS_CACHE_PREFIX = 'crosschain:status:'
+
+
+class CrossChainSyncError(Exception):
+    """Raised when a sync transaction is rejected or reverted."""
+
+
+class ProductNotAnchored(CrossChainSyncError):
+    """Raised while the product's ``addProduct`` transaction has not been mined yet."""
+
+
+class CrossChainSyncService:
+    """Queues ``CrossChainSync`` rows and, in the worker process, drains them."""
+
+    def __init__(self, client=None, workers=4, network_limits=None, default_limit=2,
+                 sender=None, receipt_timeout=60, poll_interval=0.2, status_ttl=300, lease=120,
+                 max_attempts=8, retry_delay=15, max_retry_delay=900):
+        self.client = client or get_chain_client()
+        self.sender = sender or getattr(settings, 'CHAIN_SENDER_ADDRESS', '0x' + '0' * 40)
+        self.receipt_timeout = receipt_timeout
+        self.poll_interval = poll_interval
+        self.status_ttl = status_ttl
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.workers = workers
+        self._executor = None
+        self._limits = dict(network_limits or {})
+        self._default_limit = default_limit
+        self._active = Counter()
+        self._lock = threading.Lock()
+
+    def enqueue(self, batch_id, network, user=None):
+        """Record a sync request for the workers; returns the ``CrossChainSync`` row."""
+        with transaction.atomic():
+            sync, created = CrossChainSync.objects.select_for_update().get_or_create(
+                batch_id=batch_id, network=network,
+                defaults={'requested_by': user},
+            )
+            if not created and sync.status in (CrossChainSync.SyncStatus.QUEUED,
+                                               CrossChainSync.SyncStatus.IN_PROGRESS):
+                return sync
+            if not created:
+                sync.status = CrossChainSync.SyncStatus.QUEUED
+                sync.error = ''
+                sync.transaction_hash = ''
+                sync.attempts = 0
+                sync.retry_at = None
+                sync.requested_by = user or sync.requested_by
+                sync.save(update_fields=[
+                    'status', 'error', 'transaction_hash', 'attempts', 'retry_at', 'requested_by', 'updated_at',
+                ])
+        self.refresh_status(batch_id)
+        return sync
+
+    def _lease_until(self):
+        return timezone.now() + timedelta(seconds=self.lease)
+
+    def _claimable(self):
+        """Queued rows due for an attempt, and in-progress rows whose worker's lease has run out."""
+        now = timezone.now()
+        due = Q(status=CrossChainSync.SyncStatus.QUEUED) & (Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+        return due | Q(status=CrossChainSync.SyncStatus.IN_PROGRESS, lease_expires_at__lt=now)
+
+    def claim(self, sync_id):
+        """Take the lease on ``sync_id`` if it is claimable; returns whether it was claimed."""
+        return bool(CrossChainSync.objects.filter(self._claimable(), pk=sync_id).update(
+            status=CrossChainSync.SyncStatus.IN_PROGRESS,
+            lease_expires_at=self._lease_until(),
+            updated_at=timezone.now(),
+        ))
+
+    def renew(self, sync_id):
+        """Extend the lease on a sync this worker holds."""
+        CrossChainSync.objects.filter(pk=sync_id, status=CrossChainSync.SyncStatus.IN_PROGRESS).update(
+            lease_expires_at=self._lease_until()
+        )
+
+    def tick(self, limit=500):
+        """Claim claimable rows up to the free per-network capacity and start them; returns how many."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='crosschain')
+        candidates = CrossChainSync.objects.filter(self._claimable()).order_by('updated_at').values_list('pk', 'network')
+        started = 0
+        for sync_id, network in candidates[:limit]:
+            with self._lock:
+                busy = sum(self._active.values()) >= self.workers
+                full = self._active[network] >= self._limits.get(network, self._default_limit)
+            if busy:
+                break
+            if full or not self.claim(sync_id):
+                continue
+            with self._lock:
+                self._active[network] += 1
+            self._executor.submit(self._run, sync_id, network)
+            started += 1
+        return started
+
+    def _run(self, sync_id, network):
+        try:
+            self.process(sync_id)
+        except Exception:
+            logger.exception("Cross-chain sync %s crashed", sync_id)
+        finally:
+            with self._lock:
+                self._active[network] -= 1
+            close_old_connections()
+
+    def process(self, sync_id):
+        """Execute one sync whose lease this worker holds."""
+        sync = CrossChainSync.objects.filter(pk=sync_id, status=CrossChainSync.SyncStatus.IN_PROGRESS).first()
+        if sync is None:
+            return
+
+        attempts = sync.attempts + 1
+        updates = {'attempts': attempts, 'lease_expires_at': None, 'retry_at': None, 'updated_at': timezone.now()}
+        try:
+            tx_hash = sync.transaction_hash
+            if not tx_hash:
+                self.ensure_anchored(sync)
+                tx_hash = self.client.send_transaction(
+                    self.sender, 'productregistry', 'syncToOtherChain', sync.batch_id, sync.network
+                )
+                # Recorded before waiting: a worker that takes over an expired lease waits on this
+                # transaction instead of sending another one
+                CrossChainSync.objects.filter(pk=sync_id).update(transaction_hash=tx_hash)
+            receipt = self._wait_for_receipt(tx_hash, sync_id)
+            if int(receipt['status'], 16) != 1:
+                # A reverted transaction is final; a retry sends a new one
+                updates['transaction_hash'] = ''
+                raise CrossChainSyncError(receipt.get('revertReason') or 'Transaction reverted')
+            updates.update(
+                status=CrossChainSync.SyncStatus.SYNCED,
+                proof=receipt.get('result') or '',
+                transaction_hash=tx_hash,
+                synced_at=timezone.now(),
+                error='',
+            )
+        except Exception as exc:
+            updates['error'] = str(exc)
+            if attempts >= self.max_attempts:
+                logger.warning("Cross-chain sync of %s to %s failed after %d attempts: %s",
+                               sync.batch_id, sync.network, attempts, exc)
+                updates['status'] = CrossChainSync.SyncStatus.FAILED
+            else:
+                delay = min(self.max_retry_delay, self.retry_delay * 2 ** (attempts - 1))
+                logger.info("Cross-chain sync of %s to %s will be retried in %ss: %s",
+                            sync.batch_id, sync.network, delay, exc)
+                updates.update(status=CrossChainSync.SyncStatus.QUEUED, retry_at=timezone.now() + timedelta(seconds=delay))
+
+        CrossChainSync.objects.filter(pk=sync_id).update(**updates)
+        self.refresh_status(sync.batch_id)
+
+    def is_anchored(self, batch_id):
+        """Whether ``ProductRegistry`` on this client's chain has ``batch_id``."""
+        try:
+            self.client.call('productregistry', 'getProduct', batch_id)
+        except RPCError as exc:
+            if exc.code == EXECUTION_REVERTED:
+                return False
+            raise
+        return True
+
+    def ensure_anchored(self, sync):
+        """
+        Make sure the product is on the chain before syncing it.
+
+        Raises ``ProductNotAnchored`` while an ``addProduct`` transaction for it
+        is queued or pending; with none, sends one and waits for it here.
+        """
+        if self.is_anchored(sync.batch_id):
+            return
+        from products.models import Product
+
+        product = Product.objects.filter(batch_id=sync.batch_id).first()
+        if product is None:
+            raise CrossChainSyncError(f'Product {sync.batch_id} no longer exists')
+        if ChainTransaction.objects.filter(
+            target_model=Product._meta.label, target_pk=str(product.pk), method='addProduct',
+            status__in=[ChainTransaction.TxStatus.QUEUED, ChainTransaction.TxStatus.PENDING],
+        ).exists():
+            raise ProductNotAnchored(f'Product {sync.batch_id} is not anchored yet')
+        tx_hash = self.client.send_transaction(
+            self.sender, 'productregistry', 'addProduct',
+            product.batch_id, product.name, product.carbon_activity, product.certification, '',
+        )
+        receipt = self._wait_for_receipt(tx_hash, sync.pk)
+        if int(receipt['status'], 16) != 1 and not self.is_anchored(sync.batch_id):
+            raise CrossChainSyncError(receipt.get('revertReason') or 'Anchoring transaction reverted')
+
+    def _wait_for_receipt(self, tx_hash, sync_id):
+        deadline = time.monotonic() + self.receipt_timeout
+        renewed = time.monotonic()
+        while True:
+            receipt = self.client.receipt(tx_hash)
+            if receipt is not None:
+                return receipt
+            if time.monotonic() >= deadline:
+                raise CrossChainSyncError(f'Timed out waiting for receipt of {tx_hash}')
+            if time.monotonic() - renewed >= self.lease / 3:
+                self.renew(sync_id)
+                renewed = time.monotonic()
+            time.sleep(self.poll_interval)
+
+    def refresh_status(self, batch_id):
+        """Rebuild the cached status for ``batch_id`` from the local table."""
+        rows = {row.network: row for row in CrossChainSync.objects.filter(batch_id=batch_id)}
+        synced = [row.synced_at for row in rows.values() if row.synced_at]
+        status = {
+            'batch_id': batch_id,
+            'networks': list(SUPPORTED_NETWORKS),
+            'verified': [
+                network in rows and rows[network].status == CrossChainSync.SyncStatus.SYNCED
+                for network in SUPPORTED_NETWORKS
+            ],
+            'proofs': [
+                (rows[network].proof or None) if network in rows else None
+                for network in SUPPORTED_NETWORKS
+            ],
+            'sync_status': {network: row.status for network, row in rows.items()},
+            'last_sync': max(synced).isoformat() if synced else None,
+        }
+        cache.set(STATUS_CACHE_PREFIX + batch_id, status, self.status_ttl)
+        return status
+
+    def get_status(self, batch_id):
+        """Return cached sync status, falling back to the local table (never the chain)."""
+        status = cache.get(STATUS_CACHE_PREFIX + batch_id)
+        if status is None:
+            status = self.refresh_status(batch_id)
+        return status
+
+    def run(self, interval=1.0):
+        logger.info(f"Cross-chain sync worker starting ({self.workers} workers)")
+        while True:
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Cross-chain sync round failed")
+                close_old_connections()
+            time.sleep(interval)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_crosschain_service():
+    """Return the process-wide ``CrossChainSyncService`` configured from settings."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CrossChainSyncService(
+                workers=getattr(settings, 'CROSSCHAIN_SYNC_WORKERS', 4),
+                network_limits=getattr(settings, 'CROSSCHAIN_NETWORK_CONCURRENCY', {}),
+                lease=getattr(settings, 'CROSSCHAIN_SYNC_LEASE', 120),
+                max_attempts=getattr(settings, 'CROSSCHAIN_SYNC_MAX_ATTEMPTS', 8),
+                retry_delay=getattr(settings, 'CROSSCHAIN_SYNC_RETRY_DELAY', 15),
+            )
+        return _service
@@ -0,0 +1,10 @@
+"""
+Cross-chain sync URLs.
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('sync/', views.crosschain_sync, name='crosschain_sync'),
+    path('status/<str:batch_id>/', views.crosschain_status, name='crosschain_status'),
+]
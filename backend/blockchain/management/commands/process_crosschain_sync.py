@@ -0,0 +1,26 @@
+"""
+Run the cross-chain sync workers that drain queued CrossChainSync rows.
+"""
+from django.core.management.base import BaseCommand
+
+from blockchain.crosschain import get_crosschain_service
+
+
+class Command(BaseCommand):
+    help = 'Claim queued cross-chain syncs (and expired leases) and send them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between rounds')
+        parser.add_argument('--once', action='store_true', help='Run a single round, wait for it and exit')
+
+    def handle(self, *args, **options):
+        service = get_crosschain_service()
+        if options['once']:
+            count = service.tick()
+            service.shutdown(wait=True)
+            self.stdout.write(self.style.SUCCESS(f'Processed {count} cross-chain sync(s)'))
+            return
+        try:
+            service.run(interval=options['interval'])
+        finally:
+            service.shutdown(wait=False)
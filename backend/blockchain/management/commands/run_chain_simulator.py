@@ -0,0 +1,66 @@
+"""
+Run the ProductRegistry/CarbonCredit chain simulator as a standalone JSON-RPC node.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from blockchain.rpc import ChainRPCDispatcher, FaultInjector
+from blockchain.simulator import SimulatedChain
+
+
+class Command(BaseCommand):
+    help = 'Serve an in-memory ProductRegistry/CarbonCredit chain over JSON-RPC'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8545)
+        parser.add_argument('--chain-id', type=int, default=43113)
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Added latency per RPC call')
+        parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra latency per RPC call')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of calls that fail (0-1)')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for latency jitter and failures')
+        parser.add_argument('--block-time', type=float, default=0.0,
+                            help='Mine on an interval (seconds) instead of per transaction')
+
+    def handle(self, *args, **options):
+        chain = SimulatedChain(chain_id=options['chain_id'], automine=not options['block_time'])
+        faults = FaultInjector(
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            failure_rate=options['failure_rate'],
+            seed=options['seed'],
+        )
+        dispatcher = ChainRPCDispatcher(chain, faults)
+
+        if options['block_time']:
+            def mine_forever():
+                while True:
+                    time.sleep(options['block_time'])
+                    chain.mine()
+            threading.Thread(target=mine_forever, daemon=True).start()
+
+        class RPCHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = dispatcher.handle_json(self.rfile.read(length))
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), RPCHandler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Chain simulator listening on http://{options['host']}:{options['port']} "
+            f"(chain id {options['chain_id']})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,29 @@
+"""
+Run the nonce-managed transaction submitter for CHAIN_SENDER_ADDRESS.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blockchain.transactions import TransactionManager
+
+
+class Command(BaseCommand):
+    help = 'Broadcast queued chain transactions and track them to confirmation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between rounds')
+        parser.add_argument('--once', action='store_true', help='Run a single round and exit')
+
+    def handle(self, *args, **options):
+        manager = TransactionManager(
+            max_in_flight=settings.CHAIN_MAX_IN_FLIGHT,
+            stuck_after=settings.CHAIN_STUCK_AFTER_SECONDS,
+            gas_bump=settings.CHAIN_GAS_BUMP,
+            max_gas_price=settings.CHAIN_MAX_GAS_PRICE or None,
+            max_broadcast_attempts=settings.CHAIN_MAX_BROADCAST_ATTEMPTS,
+        )
+        if options['once']:
+            sent, confirmed = manager.tick()
+            self.stdout.write(self.style.SUCCESS(f'Sent {sent}, confirmed {confirmed}'))
+            return
+        manager.run(interval=options['interval'])
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrossChainSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_id', models.CharField(db_index=True, help_text='Product batch identifier', max_length=100)),
+                ('network', models.CharField(help_text='Target blockchain network', max_length=50)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('in_progress', 'In Progress'), ('synced', 'Synced'), ('failed', 'Failed')], default='queued', help_text='Current sync status', max_length=20)),
+                ('proof', models.CharField(blank=True, help_text='Cross-chain proof returned by the contract', max_length=255)),
+                ('transaction_hash', models.CharField(blank=True, help_text='Blockchain transaction hash', max_length=66)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='crosschain_syncs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cross-Chain Sync',
+                'verbose_name_plural': 'Cross-Chain Syncs',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='crosschainsync',
+            constraint=models.UniqueConstraint(fields=('batch_id', 'network'), name='unique_crosschain_sync'),
+        ),
+    ]
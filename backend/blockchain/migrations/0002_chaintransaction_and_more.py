@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChainTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sender', models.CharField(help_text='Sending account', max_length=42)),
+                ('nonce', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('contract', models.CharField(help_text='Contract address or name', max_length=42)),
+                ('method', models.CharField(max_length=64)),
+                ('args', models.JSONField(default=list)),
+                ('gas_price', models.PositiveBigIntegerField(blank=True, help_text='Gas price in wei', null=True)),
+                ('tx_hash', models.CharField(blank=True, db_index=True, max_length=66)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('pending', 'Pending'), ('confirmed', 'Confirmed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('replacements', models.PositiveIntegerField(default=0, help_text='Gas-bump replacements sent')),
+                ('error', models.TextField(blank=True)),
+                ('target_model', models.CharField(blank=True, max_length=100)),
+                ('target_pk', models.CharField(blank=True, max_length=100)),
+                ('block_number', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Chain Transaction',
+                'verbose_name_plural': 'Chain Transactions',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='chaintransaction',
+            constraint=models.UniqueConstraint(fields=('sender', 'nonce'), name='unique_sender_nonce'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0002_chaintransaction_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crosschainsync',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text="While in progress, when the claiming worker's lease runs out", null=True),
+        ),
+    ]
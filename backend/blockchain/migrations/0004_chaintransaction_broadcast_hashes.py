@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0003_crosschainsync_lease_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chaintransaction',
+            name='broadcast_failures',
+            field=models.PositiveIntegerField(default=0, help_text='Failed first broadcasts'),
+        ),
+        migrations.AddField(
+            model_name='chaintransaction',
+            name='broadcast_hashes',
+            field=models.JSONField(blank=True, default=list, help_text='Every hash broadcast for this nonce, oldest first'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0004_chaintransaction_broadcast_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crosschainsync',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, help_text='While queued after a failed attempt, when the next one is due', null=True),
+        ),
+    ]
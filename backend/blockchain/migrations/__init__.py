@@ -0,0 +1 @@
+# Blockchain migrations package.
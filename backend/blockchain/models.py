@@ -0,0 +1,114 @@
+"""
+Blockchain models for GreenTrace.
+"""
+from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+
+class CrossChainSync(models.Model):
+    """
+    Local record of a product's sync to another chain via ``syncToOtherChain``.
+    """
+
+    class SyncStatus(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        IN_PROGRESS = 'in_progress', _('In Progress')
+        SYNCED = 'synced', _('Synced')
+        FAILED = 'failed', _('Failed')
+
+    batch_id = models.CharField(max_length=100, db_index=True, help_text=_('Product batch identifier'))
+    network = models.CharField(max_length=50, help_text=_('Target blockchain network'))
+    status = models.CharField(
+        max_length=20,
+        choices=SyncStatus.choices,
+        default=SyncStatus.QUEUED,
+        help_text=_('Current sync status')
+    )
+    proof = models.CharField(max_length=255, blank=True, help_text=_('Cross-chain proof returned by the contract'))
+    transaction_hash = models.CharField(max_length=66, blank=True, help_text=_('Blockchain transaction hash'))
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    lease_expires_at = models.DateTimeField(
+        null=True, blank=True, help_text=_("While in progress, when the claiming worker's lease runs out")
+    )
+    retry_at = models.DateTimeField(
+        null=True, blank=True, help_text=_('While queued after a failed attempt, when the next one is due')
+    )
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='crosschain_syncs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+        verbose_name = _('Cross-Chain Sync')
+        verbose_name_plural = _('Cross-Chain Syncs')
+        constraints = [
+            models.UniqueConstraint(fields=['batch_id', 'network'], name='unique_crosschain_sync'),
+        ]
+
+    def __str__(self):
+        return f"{self.batch_id} -> {self.network} ({self.status})"
+
+
+class ChainTransaction(models.Model):
+    """
+    A backend-originated contract write tracked until it is mined.
+
+    Rows are queued by request handlers and broadcast by the transaction
+    manager, which owns nonce allocation for ``sender``.
+    """
+
+    class TxStatus(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        PENDING = 'pending', _('Pending')
+        CONFIRMED = 'confirmed', _('Confirmed')
+        FAILED = 'failed', _('Failed')
+
+    sender = models.CharField(max_length=42, help_text=_('Sending account'))
+    nonce = models.PositiveBigIntegerField(null=True, blank=True)
+    contract = models.CharField(max_length=42, help_text=_('Contract address or name'))
+    method = models.CharField(max_length=64)
+    args = models.JSONField(default=list)
+    gas_price = models.PositiveBigIntegerField(null=True, blank=True, help_text=_('Gas price in wei'))
+    tx_hash = models.CharField(max_length=66, blank=True, db_index=True)
+    broadcast_hashes = models.JSONField(
+        default=list, blank=True, help_text=_('Every hash broadcast for this nonce, oldest first')
+    )
+    broadcast_failures = models.PositiveIntegerField(default=0, help_text=_('Failed first broadcasts'))
+    status = models.CharField(
+        max_length=20,
+        choices=TxStatus.choices,
+        default=TxStatus.QUEUED,
+        db_index=True
+    )
+    replacements = models.PositiveIntegerField(default=0, help_text=_('Gas-bump replacements sent'))
+    error = models.TextField(blank=True)
+
+    # Row to receive ``blockchain_hash`` once confirmed, e.g. ``products.Product``
+    target_model = models.CharField(max_length=100, blank=True)
+    target_pk = models.CharField(max_length=100, blank=True)
+
+    block_number = models.PositiveBigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = _('Chain Transaction')
+        verbose_name_plural = _('Chain Transactions')
+        constraints = [
+            models.UniqueConstraint(fields=['sender', 'nonce'], name='unique_sender_nonce'),
+        ]
+
+    def __str__(self):
+        return f"{self.method or 'transfer'} #{self.nonce} ({self.status})"
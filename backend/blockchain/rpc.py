@@ -0,0 +1,386 @@
+"""
+JSON-RPC front end for the chain simulator, plus a small client.
+
+The dispatcher speaks the JSON-RPC 2.0 envelope (single and batch requests)
+and the subset of ``eth_*``/``evm_*`` methods the backend needs. Contract
+calls carry ``method``/``args`` instead of ABI-encoded ``data``.
+"""
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+import urllib.request
+
+from django.conf import settings
+
+from .simulator import ChainError, ContractRevert, SimulatedChain
+
+logger = logging.getLogger(__name__)
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_ERROR = -32000
+EXECUTION_REVERTED = 3
+
+
+class RPCError(Exception):
+    """A JSON-RPC error, raised by the dispatcher or returned to a client."""
+
+    def __init__(self, message, code=SERVER_ERROR, data=None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+    def as_dict(self):
+        error = {'code': self.code, 'message': str(self)}
+        if self.data is not None:
+            error['data'] = self.data
+        return error
+
+
+class FaultInjector:
+    """Adds latency and random failures in front of every RPC call."""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=None, sleep=time.sleep):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.sleep = sleep
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def before_call(self, method):
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.failure_rate and self._random.random() < self.failure_rate
+        if delay:
+            self.sleep(delay)
+        if fail:
+            raise RPCError(f'Injected failure for {method}', code=INTERNAL_ERROR)
+
+
+def _to_int(value, default=None):
+    if value is None:
+        return default
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.startswith('0x'):
+        return int(value, 16)
+    return int(value)
+
+
+def _jsonable(value):
+    if isinstance(value, tuple):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, list):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _format_log(log):
+    return {
+        'address': log.address,
+        'blockNumber': hex(log.block_number),
+        'logIndex': hex(log.log_index),
+        'transactionHash': log.transaction_hash,
+        'event': log.event,
+        'topics': [log.event],
+        'args': log.args,
+    }
+
+
+def _format_receipt(receipt):
+    formatted = dict(receipt)
+    formatted['blockNumber'] = hex(receipt['blockNumber'])
+    formatted['nonce'] = hex(receipt['nonce'])
+    formatted['status'] = hex(receipt['status'])
+    formatted['gasUsed'] = hex(receipt['gasUsed'])
+    formatted['effectiveGasPrice'] = hex(receipt['effectiveGasPrice'])
+    formatted['result'] = _jsonable(receipt['result'])
+    formatted['logs'] = [_format_log(log) for log in receipt['logs']]
+    return formatted
+
+
+class ChainRPCDispatcher:
+    """Routes JSON-RPC requests to a ``SimulatedChain``."""
+
+    def __init__(self, chain, faults=None):
+        self.chain = chain
+        self.faults = faults or FaultInjector()
+        self.methods = {
+            'web3_clientVersion': lambda: 'GreenTraceSimulator/1.0',
+            'net_version': lambda: str(self.chain.chain_id),
+            'eth_chainId': lambda: hex(self.chain.chain_id),
+            'eth_blockNumber': lambda: hex(self.chain.block_number),
+            'eth_gasPrice': lambda: hex(self.chain.min_gas_price),
+            'eth_getTransactionCount': self.eth_get_transaction_count,
+            'eth_sendTransaction': self.eth_send_transaction,
+            'eth_call': self.eth_call,
+            'eth_getTransactionReceipt': self.eth_get_transaction_receipt,
+            'eth_getTransactionByHash': self.eth_get_transaction_by_hash,
+            'eth_getBlockByNumber': self.eth_get_block_by_number,
+            'eth_getLogs': self.eth_get_logs,
+            'evm_mine': self.evm_mine,
+            'evm_setAutomine': self.evm_set_automine,
+            'sim_setMinGasPrice': self.sim_set_min_gas_price,
+            'sim_pendingTransactions': self.chain.pending_transactions,
+        }
+
+    def _block_number(self, tag):
+        if tag in (None, 'latest', 'pending', 'safe', 'finalized'):
+            return self.chain.block_number
+        if tag == 'earliest':
+            return 0
+        return _to_int(tag)
+
+    def eth_get_transaction_count(self, address, tag='latest'):
+        return hex(self.chain.get_transaction_count(address, pending=(tag == 'pending')))
+
+    def eth_send_transaction(self, tx):
+        try:
+            return self.chain.send_transaction(
+                sender=tx['from'],
+                to=tx['to'],
+                method=tx.get('method', ''),
+                args=tx.get('args', ()),
+                nonce=_to_int(tx.get('nonce')),
+                gas_price=_to_int(tx.get('gasPrice')),
+            )
+        except KeyError as exc:
+            raise RPCError(f'Missing transaction field: {exc.args[0]}', code=INVALID_PARAMS)
+
+    def eth_call(self, call, tag='latest'):
+        try:
+            result = self.chain.call(call['to'], call['method'], call.get('args', ()),
+                                     sender=call.get('from', '0x' + '0' * 40))
+        except ContractRevert as exc:
+            raise RPCError(f'execution reverted: {exc}', code=EXECUTION_REVERTED, data=str(exc))
+        return _jsonable(result)
+
+    def eth_get_transaction_receipt(self, tx_hash):
+        receipt = self.chain.get_receipt(tx_hash)
+        return _format_receipt(receipt) if receipt else None
+
+    def eth_get_transaction_by_hash(self, tx_hash):
+        tx = self.chain.get_transaction(tx_hash)
+        if tx is None:
+            return None
+        tx['nonce'] = hex(tx['nonce'])
+        tx['gasPrice'] = hex(tx['gasPrice'])
+        if tx['blockNumber'] is not None:
+            tx['blockNumber'] = hex(tx['blockNumber'])
+        return tx
+
+    def eth_get_block_by_number(self, tag='latest', full_transactions=False):
+        number = self._block_number(tag)
+        if number > self.chain.block_number:
+            return None
+        block = self.chain.blocks[number]
+        return {
+            'number': hex(block.number),
+            'timestamp': hex(block.timestamp),
+            'transactions': list(block.transactions),
+        }
+
+    def eth_get_logs(self, log_filter=None):
+        log_filter = log_filter or {}
+        topics = log_filter.get('topics') or []
+        events = topics[0] if topics else None
+        if isinstance(events, str):
+            events = [events]
+        logs = self.chain.get_logs(
+            from_block=self._block_number(log_filter.get('fromBlock', 'earliest')),
+            to_block=self._block_number(log_filter.get('toBlock', 'latest')),
+            address=log_filter.get('address'),
+            events=events,
+        )
+        return [_format_log(log) for log in logs]
+
+    def evm_mine(self, blocks=1):
+        return hex(self.chain.mine(_to_int(blocks, 1)))
+
+    def evm_set_automine(self, enabled):
+        self.chain.automine = bool(enabled)
+        return True
+
+    def sim_set_min_gas_price(self, gas_price):
+        self.chain.min_gas_price = _to_int(gas_price)
+        return True
+
+    def _dispatch_one(self, request):
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                raise RPCError('Invalid Request', code=INVALID_REQUEST)
+            method = request['method']
+            handler = self.methods.get(method)
+            if handler is None:
+                raise RPCError(f'Method not found: {method}', code=METHOD_NOT_FOUND)
+            params = request.get('params') or []
+            self.faults.before_call(method)
+            try:
+                result = handler(*params) if isinstance(params, list) else handler(**params)
+            except TypeError as exc:
+                raise RPCError(str(exc), code=INVALID_PARAMS)
+            except ChainError as exc:
+                raise RPCError(str(exc), code=SERVER_ERROR)
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except RPCError as exc:
+            return {'jsonrpc': '2.0', 'id': request_id, 'error': exc.as_dict()}
+        except Exception as exc:
+            logger.exception("Simulator RPC call failed")
+            return {'jsonrpc': '2.0', 'id': request_id,
+                    'error': {'code': INTERNAL_ERROR, 'message': str(exc)}}
+
+    def handle(self, payload):
+        """Handle a decoded JSON-RPC request or batch."""
+        if isinstance(payload, list):
+            if not payload:
+                return self._dispatch_one(None)
+            return [self._dispatch_one(request) for request in payload]
+        return self._dispatch_one(payload)
+
+    def handle_json(self, body):
+        """Handle a raw JSON-RPC body and return the encoded response."""
+        try:
+            payload = json.loads(body)
+        except (TypeError, ValueError):
+            response = {'jsonrpc': '2.0', 'id': None,
+                        'error': {'code': PARSE_ERROR, 'message': 'Parse error'}}
+        else:
+            response = self.handle(payload)
+        return json.dumps(response).encode()
+
+
+class InProcessTransport:
+    """Calls a dispatcher directly, skipping HTTP and JSON encoding."""
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+
+    def send(self, payload):
+        return self.dispatcher.handle(payload)
+
+
+class HTTPTransport:
+    """Posts JSON-RPC payloads to a node over HTTP."""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, payload):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+class ChainRPCClient:
+    """Minimal JSON-RPC client used by backend services to talk to a chain."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self._ids = itertools.count(1)
+
+    def request(self, method, *params):
+        response = self.transport.send({
+            'jsonrpc': '2.0', 'id': next(self._ids), 'method': method, 'params': list(params),
+        })
+        if 'error' in response:
+            error = response['error']
+            raise RPCError(error.get('message', 'RPC error'), code=error.get('code', SERVER_ERROR),
+                           data=error.get('data'))
+        return response.get('result')
+
+    def batch(self, calls):
+        """Send ``[(method, params), ...]`` as one batch; errors come back as ``RPCError`` values."""
+        payload = [
+            {'jsonrpc': '2.0', 'id': next(self._ids), 'method': method, 'params': list(params)}
+            for method, params in calls
+        ]
+        results = []
+        for response in sorted(self.transport.send(payload), key=lambda r: r.get('id') or 0):
+            if 'error' in response:
+                error = response['error']
+                results.append(RPCError(error.get('message'), code=error.get('code', SERVER_ERROR)))
+            else:
+                results.append(response.get('result'))
+        return results
+
+    def block_number(self):
+        return _to_int(self.request('eth_blockNumber'))
+
+    def gas_price(self):
+        return _to_int(self.request('eth_gasPrice'))
+
+    def transaction_count(self, address, tag='pending'):
+        return _to_int(self.request('eth_getTransactionCount', address, tag))
+
+    def call(self, contract, method, *args):
+        return self.request('eth_call', {'to': contract, 'method': method, 'args': list(args)}, 'latest')
+
+    def send_transaction(self, sender, contract, method, *args, nonce=None, gas_price=None):
+        """Send a contract write; without ``method``, a zero-value transfer to ``contract``."""
+        if method:
+            tx = {'from': sender, 'to': contract, 'method': method, 'args': list(args)}
+        else:
+            tx = {'from': sender, 'to': contract, 'value': '0x0'}
+        if nonce is not None:
+            tx['nonce'] = hex(nonce)
+        if gas_price is not None:
+            tx['gasPrice'] = hex(gas_price)
+        return self.request('eth_sendTransaction', tx)
+
+    def receipt(self, tx_hash):
+        return self.request('eth_getTransactionReceipt', tx_hash)
+
+    def logs(self, from_block=0, to_block='latest', address=None, events=None):
+        log_filter = {
+            'fromBlock': hex(from_block) if isinstance(from_block, int) else from_block,
+            'toBlock': hex(to_block) if isinstance(to_block, int) else to_block,
+        }
+        if address:
+            log_filter['address'] = address
+        if events:
+            log_filter['topics'] = [list(events)]
+        return self.request('eth_getLogs', log_filter)
+
+
+_default_dispatcher = None
+_default_lock = threading.Lock()
+
+
+def get_simulator_dispatcher():
+    """Return the process-wide simulator dispatcher, configured from settings."""
+    global _default_dispatcher
+    with _default_lock:
+        if _default_dispatcher is None:
+            faults = FaultInjector(
+                latency=getattr(settings, 'CHAIN_SIMULATOR_LATENCY_MS', 0) / 1000,
+                jitter=getattr(settings, 'CHAIN_SIMULATOR_JITTER_MS', 0) / 1000,
+                failure_rate=getattr(settings, 'CHAIN_SIMULATOR_FAILURE_RATE', 0.0),
+            )
+            _default_dispatcher = ChainRPCDispatcher(SimulatedChain(), faults)
+        return _default_dispatcher
+
+
+def get_chain_client():
+    """
+    Build a client for ``settings.CHAIN_RPC_URL``.
+
+    ``sim://`` (the default) targets the in-process simulator; anything else
+    is treated as an HTTP JSON-RPC endpoint.
+    """
+    url = getattr(settings, 'CHAIN_RPC_URL', 'sim://')
+    if url.startswith('sim://'):
+        return ChainRPCClient(InProcessTransport(get_simulator_dispatcher()))
+    return ChainRPCClient(HTTPTransport(url, timeout=getattr(settings, 'CHAIN_RPC_TIMEOUT', 10)))
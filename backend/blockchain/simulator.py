@@ -0,0 +1,495 @@
+"""
+In-process simulator for the ProductRegistry and CarbonCredit contracts.
+
+Mirrors the semantics of ``contracts/ProductRegistry.sol`` and
+``contracts/CarbonCredit.sol`` closely enough for the backend's indexing,
+anchoring and cross-chain code to run offline.
+"""
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import NamedTuple
+
+PRODUCT_REGISTRY_ADDRESS = '0x5fbdb2315678afecb367f032d93f642f64180aa3'
+CARBON_CREDIT_ADDRESS = '0xe7f1725e7734ce288f8367e1bb143e90bb3f0512'
+
+# Mirrors the ProductRegistry constructor.
+CROSS_CHAIN_NETWORKS = {
+    'ethereum': '0x742d35Cc6634C0532925A3B8D4C9dB96C4B4d8B6',
+    'polygon': '0x1234567890123456789012345678901234567890',
+    'bsc': '0x0987654321098765432109876543210987654321',
+}
+SUPPORTED_NETWORKS = ['ethereum', 'polygon', 'bsc']
+CERTIFICATION_SCORES = {
+    'organic': 85,
+    'fair-trade': 80,
+    'carbon-neutral': 90,
+    'sustainable': 75,
+}
+CARBON_ACTIVITY_BONUS = {
+    'low-carbon': 10,
+    'carbon-neutral': 15,
+    'carbon-negative': 20,
+}
+COMPLIANCE_THRESHOLD = 70
+
+GWEI = 10 ** 9
+BASE_GAS = 21000
+
+
+class ContractRevert(Exception):
+    """Raised when a simulated contract call hits a ``require``."""
+
+
+class LogEntry(NamedTuple):
+    """An event emitted by a mined transaction."""
+    block_number: int
+    log_index: int
+    transaction_hash: str
+    address: str
+    event: str
+    args: dict
+
+
+class Block(NamedTuple):
+    """A mined block; ``first_log`` indexes into the chain's flat log list."""
+    number: int
+    timestamp: int
+    transactions: tuple
+    first_log: int
+    log_count: int
+
+
+class CallContext:
+    """Per-call execution context (``msg.sender``, ``block.timestamp``, emitted events)."""
+
+    __slots__ = ('sender', 'timestamp', 'events')
+
+    def __init__(self, sender, timestamp):
+        self.sender = sender
+        self.timestamp = timestamp
+        self.events = []
+
+    def emit(self, address, event, **args):
+        self.events.append((address, event, args))
+
+
+class SimulatedProduct:
+    """Storage layout of ``ProductRegistry.Product``."""
+
+    __slots__ = (
+        'batch_id', 'product', 'carbon_activity', 'certification', 'timestamp',
+        'producer', 'private_data', 'is_compliant', 'compliance_score',
+        'cross_chain_proofs', 'cross_chain_verified',
+    )
+
+    def __init__(self, batch_id, product, carbon_activity, certification, timestamp, producer, private_data):
+        self.batch_id = batch_id
+        self.product = product
+        self.carbon_activity = carbon_activity
+        self.certification = certification
+        self.timestamp = timestamp
+        self.producer = producer
+        self.private_data = private_data
+        self.is_compliant = False
+        self.compliance_score = 0
+        self.cross_chain_proofs = []
+        self.cross_chain_verified = set()
+
+
+class ProductRegistryContract:
+    """Python port of ``ProductRegistry.sol``."""
+
+    address = PRODUCT_REGISTRY_ADDRESS
+
+    WRITE_METHODS = {
+        'addProduct': 'add_product',
+        'syncToOtherChain': 'sync_to_other_chain',
+        'updateComplianceScore': 'update_compliance_score',
+    }
+    READ_METHODS = {
+        'getCrossChainStatus': 'get_cross_chain_status',
+        'getCrossChainProofs': 'get_cross_chain_proofs',
+        'getProductWithCompliance': 'get_product_with_compliance',
+        'getSupportedNetworks': 'get_supported_networks',
+        'viewPrivateData': 'view_private_data',
+        'getProduct': 'get_product',
+        'getProductCount': 'get_product_count',
+        'getProductBatchIdByIndex': 'get_product_batch_id_by_index',
+        'getAllProductBatchIds': 'get_all_product_batch_ids',
+    }
+
+    def __init__(self):
+        self.products = {}
+        self.product_batch_ids = []
+
+    def _require_product(self, batch_id):
+        product = self.products.get(batch_id)
+        if product is None:
+            raise ContractRevert('Product not found')
+        return product
+
+    @staticmethod
+    def calculate_compliance_score(certification, carbon_activity):
+        """Calculate compliance score based on certification and carbon activity."""
+        score = CERTIFICATION_SCORES.get(certification, 50)
+        score += CARBON_ACTIVITY_BONUS.get(carbon_activity, 0)
+        return min(score, 100)
+
+    def add_product(self, ctx, batch_id, product, carbon_activity, certification, private_data):
+        if batch_id in self.products:
+            raise ContractRevert('Product with this batch ID already exists')
+
+        entry = SimulatedProduct(
+            batch_id, product, carbon_activity, certification,
+            ctx.timestamp, ctx.sender, private_data,
+        )
+        score = self.calculate_compliance_score(certification, carbon_activity)
+        entry.compliance_score = score
+        entry.is_compliant = score >= COMPLIANCE_THRESHOLD
+
+        self.products[batch_id] = entry
+        self.product_batch_ids.append(batch_id)
+
+        ctx.emit(self.address, 'ProductAdded', batchId=batch_id, producer=ctx.sender,
+                 certification=certification, complianceScore=score)
+        ctx.emit(self.address, 'ComplianceUpdated', batchId=batch_id,
+                 isCompliant=entry.is_compliant, score=score)
+
+    def sync_to_other_chain(self, ctx, batch_id, network):
+        product = self._require_product(batch_id)
+        if network not in CROSS_CHAIN_NETWORKS:
+            raise ContractRevert('Network not supported')
+
+        network_address = int(CROSS_CHAIN_NETWORKS[network], 16)
+        proof = f"0x{batch_id}_{network}_{ctx.timestamp}_{network_address}"
+
+        product.cross_chain_proofs.append(proof)
+        product.cross_chain_verified.add(network)
+
+        ctx.emit(self.address, 'CrossChainSync', batchId=batch_id, network=network, proof=proof)
+        return proof
+
+    def update_compliance_score(self, ctx, batch_id, new_score):
+        product = self._require_product(batch_id)
+        if not 0 <= new_score <= 100:
+            raise ContractRevert('Score must be 0-100')
+
+        product.compliance_score = new_score
+        product.is_compliant = new_score >= COMPLIANCE_THRESHOLD
+
+        ctx.emit(self.address, 'ComplianceUpdated', batchId=batch_id,
+                 isCompliant=product.is_compliant, score=new_score)
+
+    def get_cross_chain_status(self, ctx, batch_id):
+        product = self._require_product(batch_id)
+        verified = [network in product.cross_chain_verified for network in SUPPORTED_NETWORKS]
+        return list(SUPPORTED_NETWORKS), verified
+
+    def get_cross_chain_proofs(self, ctx, batch_id):
+        return list(self._require_product(batch_id).cross_chain_proofs)
+
+    def get_product_with_compliance(self, ctx, batch_id):
+        p = self._require_product(batch_id)
+        return (p.product, p.carbon_activity, p.certification, p.timestamp,
+                p.producer, p.is_compliant, p.compliance_score)
+
+    def get_supported_networks(self, ctx):
+        return list(SUPPORTED_NETWORKS)
+
+    def view_private_data(self, ctx, batch_id):
+        product = self.products.get(batch_id)
+        return product.private_data if product else ''
+
+    def get_product(self, ctx, batch_id):
+        p = self._require_product(batch_id)
+        return (p.product, p.carbon_activity, p.certification, p.timestamp, p.producer)
+
+    def get_product_count(self, ctx):
+        return len(self.product_batch_ids)
+
+    def get_product_batch_id_by_index(self, ctx, index):
+        if not 0 <= index < len(self.product_batch_ids):
+            raise ContractRevert('Index out of bounds')
+        return self.product_batch_ids[index]
+
+    def get_all_product_batch_ids(self, ctx):
+        return list(self.product_batch_ids)
+
+
+class CarbonCreditContract:
+    """Python port of ``CarbonCredit.sol``."""
+
+    address = CARBON_CREDIT_ADDRESS
+
+    WRITE_METHODS = {
+        'issueCredit': 'issue_credit',
+        'retireCredit': 'retire_credit',
+    }
+    READ_METHODS = {
+        'credits': 'credits_of',
+    }
+
+    def __init__(self):
+        self.credits = defaultdict(int)
+
+    def issue_credit(self, ctx, to, amount):
+        self.credits[to.lower()] += amount
+        ctx.emit(self.address, 'CreditIssued', to=to, amount=amount)
+
+    def retire_credit(self, ctx, amount):
+        holder = ctx.sender.lower()
+        if self.credits[holder] < amount:
+            raise ContractRevert('Not enough credits')
+        self.credits[holder] -= amount
+        ctx.emit(self.address, 'CreditRetired', **{'from': ctx.sender, 'amount': amount})
+
+    def credits_of(self, ctx, account):
+        return self.credits.get(account.lower(), 0)
+
+
+class ChainError(Exception):
+    """Raised for node-level errors (bad nonce, unknown contract, underpriced replacement)."""
+
+
+class PendingTransaction:
+    """A transaction sitting in the simulated mempool."""
+
+    __slots__ = ('hash', 'sender', 'nonce', 'gas_price', 'to', 'method', 'args')
+
+    def __init__(self, tx_hash, sender, nonce, gas_price, to, method, args):
+        self.hash = tx_hash
+        self.sender = sender
+        self.nonce = nonce
+        self.gas_price = gas_price
+        self.to = to
+        self.method = method
+        self.args = args
+
+    def as_dict(self, block_number=None):
+        return {
+            'hash': self.hash,
+            'from': self.sender,
+            'nonce': self.nonce,
+            'gasPrice': self.gas_price,
+            'to': self.to,
+            'method': self.method,
+            'args': list(self.args),
+            'blockNumber': block_number,
+        }
+
+
+class SimulatedChain:
+    """
+    A single-node chain hosting both contracts.
+
+    Transactions go through a mempool keyed by ``(sender, nonce)`` so nonce
+    gaps, stuck low-gas transactions and gas-bump replacements behave like a
+    real node. With ``automine`` every accepted transaction is mined at once;
+    otherwise blocks are produced by ``mine()``.
+    """
+
+    REPLACEMENT_BUMP = 1.1
+
+    def __init__(self, chain_id=43113, automine=True, min_gas_price=25 * GWEI,
+                 max_block_transactions=1000, clock=time.time):
+        self.chain_id = chain_id
+        self.automine = automine
+        self.min_gas_price = min_gas_price
+        self.max_block_transactions = max_block_transactions
+        self.clock = clock
+
+        self.product_registry = ProductRegistryContract()
+        self.carbon_credit = CarbonCreditContract()
+        self.contracts = {
+            self.product_registry.address: self.product_registry,
+            self.carbon_credit.address: self.carbon_credit,
+        }
+
+        self.blocks = [Block(0, int(clock()), (), 0, 0)]
+        self.logs = []
+        self.transactions = {}
+        self.receipts = {}
+        self.nonces = defaultdict(int)
+        self.mempool = {}
+        self._pending_nonces = {}
+        self._lock = threading.RLock()
+
+    @property
+    def block_number(self):
+        return self.blocks[-1].number
+
+    def _resolve_contract(self, to):
+        to = (to or '').lower()
+        if to in self.contracts:
+            return self.contracts[to]
+        for contract in self.contracts.values():
+            if type(contract).__name__.replace('Contract', '').lower() == to:
+                return contract
+        raise ChainError(f'Unknown contract: {to}')
+
+    @staticmethod
+    def _transaction_hash(sender, nonce, gas_price, to, method, args):
+        payload = f"{sender}:{nonce}:{gas_price}:{to}:{method}:{args!r}".encode()
+        return '0x' + hashlib.sha256(payload).hexdigest()
+
+    def get_transaction_count(self, address, pending=False):
+        """Return the next nonce for ``address`` (mined, or including the mempool)."""
+        address = address.lower()
+        with self._lock:
+            nonce = self.nonces[address]
+            if pending:
+                nonce = max(nonce, self._pending_nonces.get(address, 0))
+                while (address, nonce) in self.mempool:
+                    nonce += 1
+                self._pending_nonces[address] = nonce
+            return nonce
+
+    def call(self, to, method, args=(), sender='0x' + '0' * 40):
+        """Execute a read-only contract method against the latest state."""
+        contract = self._resolve_contract(to)
+        name = contract.READ_METHODS.get(method)
+        if name is None:
+            raise ChainError(f'Unknown view method: {method}')
+        with self._lock:
+            return getattr(contract, name)(CallContext(sender, self.blocks[-1].timestamp), *args)
+
+    def send_transaction(self, sender, to, method, args=(), nonce=None, gas_price=None):
+        """
+        Accept a transaction into the mempool and return its hash.
+
+        Without a ``method`` it is a plain (zero-value) transfer to ``to``,
+        which may be any address.
+        """
+        if method:
+            contract = self._resolve_contract(to)
+            if method not in contract.WRITE_METHODS:
+                raise ChainError(f'Unknown transaction method: {method}')
+            to = contract.address
+        else:
+            method, to = '', to.lower()
+        sender = sender.lower()
+        gas_price = self.min_gas_price if gas_price is None else int(gas_price)
+        args = tuple(args)
+
+        with self._lock:
+            if nonce is None:
+                nonce = self.get_transaction_count(sender, pending=True)
+            nonce = int(nonce)
+            if nonce < self.nonces[sender]:
+                raise ChainError('nonce too low')
+
+            existing = self.mempool.get((sender, nonce))
+            if existing is not None and gas_price < existing.gas_price * self.REPLACEMENT_BUMP:
+                raise ChainError('replacement transaction underpriced')
+
+            tx_hash = self._transaction_hash(sender, nonce, gas_price, to, method, args)
+            tx = PendingTransaction(tx_hash, sender, nonce, gas_price, to, method, args)
+            self.mempool[(sender, nonce)] = tx
+            self.transactions[tx_hash] = tx
+            if existing is not None:
+                self.transactions.pop(existing.hash, None)
+
+            if self.automine:
+                self.mine(skip_empty=True)
+            return tx_hash
+
+    def _executable(self):
+        """Yield mempool transactions that can be mined, in per-sender nonce order."""
+        senders = sorted({sender for sender, _ in self.mempool})
+        picked = []
+        for sender in senders:
+            nonce = self.nonces[sender]
+            while len(picked) < self.max_block_transactions:
+                tx = self.mempool.get((sender, nonce))
+                if tx is None or tx.gas_price < self.min_gas_price:
+                    break
+                picked.append(tx)
+                nonce += 1
+        return picked
+
+    def _execute(self, tx, block_number, timestamp):
+        ctx = CallContext(tx.sender, timestamp)
+        status, result, revert_reason = 1, None, None
+        if tx.method:
+            contract = self.contracts[tx.to]
+            try:
+                result = getattr(contract, contract.WRITE_METHODS[tx.method])(ctx, *tx.args)
+            except ContractRevert as exc:
+                status, revert_reason = 0, str(exc)
+                ctx.events = []
+
+        logs = []
+        for address, event, args in ctx.events:
+            entry = LogEntry(block_number, len(self.logs), tx.hash, address, event, args)
+            self.logs.append(entry)
+            logs.append(entry)
+
+        self.receipts[tx.hash] = {
+            'transactionHash': tx.hash,
+            'blockNumber': block_number,
+            'from': tx.sender,
+            'to': tx.to,
+            'nonce': tx.nonce,
+            'status': status,
+            'gasUsed': BASE_GAS + 16 * len(repr(tx.args)),
+            'effectiveGasPrice': tx.gas_price,
+            'result': result,
+            'revertReason': revert_reason,
+            'logs': logs,
+        }
+
+    def mine(self, blocks=1, skip_empty=False):
+        """Mine ``blocks`` blocks and return the latest block number."""
+        with self._lock:
+            for _ in range(blocks):
+                included = self._executable()
+                if skip_empty and not included:
+                    break
+                number = self.block_number + 1
+                timestamp = max(int(self.clock()), self.blocks[-1].timestamp)
+                first_log = len(self.logs)
+                for tx in included:
+                    del self.mempool[(tx.sender, tx.nonce)]
+                    self.nonces[tx.sender] = tx.nonce + 1
+                    self._execute(tx, number, timestamp)
+                self.blocks.append(Block(
+                    number, timestamp, tuple(tx.hash for tx in included),
+                    first_log, len(self.logs) - first_log,
+                ))
+            return self.block_number
+
+    def get_receipt(self, tx_hash):
+        return self.receipts.get(tx_hash)
+
+    def get_transaction(self, tx_hash):
+        tx = self.transactions.get(tx_hash)
+        if tx is None:
+            return None
+        receipt = self.receipts.get(tx_hash)
+        return tx.as_dict(receipt['blockNumber'] if receipt else None)
+
+    def get_logs(self, from_block=0, to_block=None, address=None, events=None):
+        """Return logs in ``[from_block, to_block]`` filtered by address and event name."""
+        with self._lock:
+            latest = self.block_number
+            to_block = latest if to_block is None else min(to_block, latest)
+            if from_block > to_block:
+                return []
+            start = self.blocks[from_block].first_log
+            end_block = self.blocks[to_block]
+            end = end_block.first_log + end_block.log_count
+            selected = self.logs[start:end]
+
+        if address:
+            address = address.lower()
+            selected = [log for log in selected if log.address == address]
+        if events:
+            events = set(events)
+            selected = [log for log in selected if log.event in events]
+        return selected
+
+    def pending_transactions(self):
+        with self._lock:
+            return [tx.as_dict() for tx in self.mempool.values()]
@@ -0,0 +1,127 @@
+"""
+Cross-chain sync queue (anchoring, retries, who may enqueue) and nonce gaps in the transaction manager.
+"""
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from products.models import Product
+from users.models import UserProfile
+from users.tokens import issue_token
+from .crosschain import CrossChainSyncService
+from .models import ChainTransaction, CrossChainSync
+from .rpc import ChainRPCClient, ChainRPCDispatcher, InProcessTransport
+from .simulator import SimulatedChain
+from .transactions import TransactionManager, anchor_product, queue_transaction
+
+
+class CrossChainSyncServiceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('producer')
+        cls.product = Product.objects.create(name='Coffee', batch_id='BATCH-1', created_by=cls.owner)
+
+    def setUp(self):
+        self.chain = SimulatedChain()
+        self.service = CrossChainSyncService(
+            client=ChainRPCClient(InProcessTransport(ChainRPCDispatcher(self.chain))),
+            poll_interval=0, max_attempts=2, retry_delay=30,
+        )
+
+    def run_once(self, sync):
+        self.assertTrue(self.service.claim(sync.pk))
+        self.service.process(sync.pk)
+        sync.refresh_from_db()
+        return sync
+
+    def test_unanchored_product_is_anchored_then_synced(self):
+        sync = self.run_once(self.service.enqueue('BATCH-1', 'polygon'))
+        self.assertEqual(sync.status, CrossChainSync.SyncStatus.SYNCED)
+        self.assertTrue(self.service.is_anchored('BATCH-1'))
+
+    def test_waits_for_a_pending_anchor_transaction(self):
+        anchor_product(self.product)
+        sync = self.run_once(self.service.enqueue('BATCH-1', 'polygon'))
+        self.assertEqual(sync.status, CrossChainSync.SyncStatus.QUEUED)
+        self.assertGreater(sync.retry_at, timezone.now())
+        self.assertIn('not anchored', sync.error)
+        self.assertFalse(self.service.claim(sync.pk))  # not due yet
+        self.assertFalse(self.service.is_anchored('BATCH-1'))
+
+    def test_fails_after_max_attempts(self):
+        ChainTransaction.objects.create(
+            sender='0x' + '0' * 40, contract='productregistry', method='addProduct',
+            target_model='products.Product', target_pk=str(self.product.pk),
+        )
+        sync = self.service.enqueue('BATCH-1', 'polygon')
+        for status in (CrossChainSync.SyncStatus.QUEUED, CrossChainSync.SyncStatus.FAILED):
+            CrossChainSync.objects.filter(pk=sync.pk).update(retry_at=None)
+            sync = self.run_once(sync)
+            self.assertEqual(sync.status, status)
+        self.assertEqual(sync.attempts, 2)
+
+        sync = self.run_once(self.service.enqueue('BATCH-1', 'polygon'))
+        self.assertEqual(sync.attempts, 1)  # a new request starts over
+
+
+class TransactionManagerGapTests(TestCase):
+
+    def test_released_nonce_is_filled_so_later_ones_mine(self):
+        owner = User.objects.create_user('producer')
+        product = Product.objects.create(name='Coffee', batch_id='BATCH-1', created_by=owner)
+        broken = queue_transaction('productregistry', 'noSuchMethod', [])
+        anchor = anchor_product(product)
+        chain = SimulatedChain()
+        manager = TransactionManager(
+            client=ChainRPCClient(InProcessTransport(ChainRPCDispatcher(chain))), max_broadcast_attempts=2,
+        )
+
+        manager.tick()  # nonce 0 fails to broadcast; nonce 1 waits behind it
+        anchor.refresh_from_db()
+        self.assertEqual((anchor.nonce, anchor.status), (1, ChainTransaction.TxStatus.PENDING))
+
+        manager.tick()  # nonce 0 is given up and released with nothing queued to take it
+        manager.tick()
+        broken.refresh_from_db()
+        anchor.refresh_from_db()
+        self.assertEqual(broken.status, ChainTransaction.TxStatus.FAILED)
+        self.assertEqual(anchor.status, ChainTransaction.TxStatus.CONFIRMED)
+        filler = ChainTransaction.objects.get(method='')
+        self.assertEqual((filler.nonce, filler.contract, filler.status), (0, manager.sender, 'confirmed'))
+        self.assertTrue(Product.objects.get(pk=product.pk).blockchain_hash)
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class CrossChainSyncViewTests(TestCase):
+    url = '/api/crosschain/sync/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('producer')
+        cls.other = User.objects.create_user('other')
+        Product.objects.create(name='Coffee', batch_id='BATCH-1', created_by=cls.owner)
+        cls.profiles = {
+            user: UserProfile.objects.create(user=user, wallet_address='0x' + f'{n:02x}' * 20)
+            for n, user in enumerate((cls.owner, cls.other), start=1)
+        }
+
+    def post(self, user=None):
+        headers = {}
+        if user is not None:
+            token, _ = issue_token(self.profiles[user])
+            headers['HTTP_AUTHORIZATION'] = f'Wallet {token}'
+        body = json.dumps({'batch_id': 'BATCH-1', 'target_network': 'polygon'})
+        return self.client.post(self.url, body, content_type='application/json', **headers)
+
+    def test_requires_wallet_token(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self.post().status_code, 401)
+
+    def test_only_the_owner_can_enqueue(self):
+        self.assertEqual(self.post(self.other).status_code, 403)
+        self.assertFalse(CrossChainSync.objects.exists())
+        self.assertEqual(self.post(self.owner).status_code, 202)
+        self.assertEqual(CrossChainSync.objects.get().requested_by, self.owner)
@@ -0,0 +1,295 @@
+"""
+Nonce-managed transaction submitter.
+
+Request handlers only insert ``ChainTransaction`` rows. A single manager
+process owns the sender account: it hands out nonces locally so many
+transactions can be in flight at once, replaces stuck ones with a gas bump,
+and copies confirmed hashes onto ``Product``/``CarbonCredit`` in batches.
+Nonces and hashes are persisted before broadcast, so a restart resumes.
+
+Every hash broadcast for a nonce is kept, and receipts are checked for all
+of them, since any version of a replaced transaction may be the one mined.
+A row whose first broadcast keeps failing is marked failed after
+``max_broadcast_attempts`` and its nonce goes to the next queued row. A
+released nonce that no queued row takes is filled with a zero-value
+transfer to the sender itself (a row with no ``method``), since a gap would
+hold back every later nonce.
+"""
+import heapq
+import logging
+import math
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ChainTransaction
+from .rpc import RPCError, get_chain_client
+
+logger = logging.getLogger(__name__)
+
+
+def _sender():
+    return getattr(settings, 'CHAIN_SENDER_ADDRESS', '0x' + '0' * 40).lower()
+
+
+def queue_transaction(contract, method, args, target=None, sender=None):
+    """Record a contract write for the transaction manager to broadcast."""
+    return ChainTransaction.objects.create(
+        sender=(sender or _sender()).lower(),
+        contract=contract,
+        method=method,
+        args=list(args),
+        target_model=target._meta.label if target is not None else '',
+        target_pk=str(target.pk) if target is not None else '',
+    )
+
+
+def anchor_product(product):
+    """Queue ``ProductRegistry.addProduct`` for a product; private fields stay off-chain."""
+    return queue_transaction(
+        'productregistry', 'addProduct',
+        [product.batch_id, product.name, product.carbon_activity, product.certification, ''],
+        target=product,
+    )
+
+
+def mirror_credit_issuance(credit, wallet_address):
+    """Queue ``CarbonCredit.issueCredit``; amounts go on-chain in hundredths of a unit."""
+    amount = int(Decimal(str(credit.amount)) * 100)
+    return queue_transaction('carboncredit', 'issueCredit', [wallet_address, amount], target=credit)
+
+
+class TransactionManager:
+    """Broadcasts queued transactions and tracks them to confirmation."""
+
+    def __init__(self, client=None, sender=None, max_in_flight=256, stuck_after=60,
+                 gas_bump=1.125, max_gas_price=None, max_broadcast_attempts=5):
+        self.client = client or get_chain_client()
+        self.sender = (sender or _sender()).lower()
+        self.max_in_flight = max_in_flight
+        self.stuck_after = stuck_after
+        self.gas_bump = gas_bump
+        self.max_gas_price = max_gas_price
+        self.max_broadcast_attempts = max_broadcast_attempts
+        self._next_nonce = None
+        self._free_nonces = []
+
+    def _pending(self):
+        return ChainTransaction.objects.filter(sender=self.sender, status=ChainTransaction.TxStatus.PENDING)
+
+    def sync_nonce(self):
+        """Resynchronise the local nonce counter with the node and the persisted rows."""
+        chain_nonce = self.client.transaction_count(self.sender, 'pending')
+        local = ChainTransaction.objects.filter(
+            sender=self.sender, nonce__isnull=False
+        ).aggregate(Max('nonce'))['nonce__max']
+        self._next_nonce = max(chain_nonce, local + 1 if local is not None else 0)
+        # Unmined nonces below the counter that no row holds (released by failed broadcasts)
+        mined = self.client.transaction_count(self.sender, 'latest')
+        held = set(ChainTransaction.objects.filter(
+            sender=self.sender, nonce__gte=mined, nonce__lt=self._next_nonce
+        ).values_list('nonce', flat=True))
+        self._free_nonces = [nonce for nonce in range(mined, self._next_nonce) if nonce not in held]
+        heapq.heapify(self._free_nonces)
+        return self._next_nonce
+
+    def _allocate_nonce(self):
+        if self._free_nonces:
+            return heapq.heappop(self._free_nonces)
+        nonce = self._next_nonce
+        self._next_nonce += 1
+        return nonce
+
+    def _send(self, tx):
+        tx.tx_hash = self.client.send_transaction(
+            self.sender, tx.contract, tx.method, *tx.args, nonce=tx.nonce, gas_price=tx.gas_price
+        )
+        tx.broadcast_hashes = [*tx.broadcast_hashes, tx.tx_hash]
+        tx.submitted_at = timezone.now()
+        tx.error = ''
+        tx.save(update_fields=['tx_hash', 'broadcast_hashes', 'gas_price', 'submitted_at', 'error', 'replacements'])
+
+    def _first_broadcast_failed(self, tx, exc):
+        """
+        Handle a failed first broadcast of ``tx``; returns ``True`` if the nonce counter was resynced.
+
+        The row stays pending for a retry on the next round until
+        ``max_broadcast_attempts``; then it fails and its nonce is handed to
+        the next queued row.
+        """
+        if 'nonce too low' in str(exc):
+            # Someone else used this account; put the row back and resync. A gap filler has nothing left to do.
+            if tx.method:
+                ChainTransaction.objects.filter(pk=tx.pk).update(
+                    status=ChainTransaction.TxStatus.QUEUED, nonce=None
+                )
+            else:
+                ChainTransaction.objects.filter(pk=tx.pk).delete()
+            self.sync_nonce()
+            return True
+        logger.warning("Broadcast of %s nonce %s failed: %s", tx.method, tx.nonce, exc)
+        tx.broadcast_failures += 1
+        if tx.broadcast_failures < self.max_broadcast_attempts:
+            ChainTransaction.objects.filter(pk=tx.pk).update(
+                error=str(exc), broadcast_failures=tx.broadcast_failures
+            )
+            return False
+        logger.error("Giving up on %s after %s failed broadcasts; releasing nonce %s",
+                     tx.method, tx.broadcast_failures, tx.nonce)
+        ChainTransaction.objects.filter(pk=tx.pk).update(
+            status=ChainTransaction.TxStatus.FAILED, nonce=None,
+            error=str(exc), broadcast_failures=tx.broadcast_failures,
+        )
+        heapq.heappush(self._free_nonces, tx.nonce)
+        return False
+
+    def broadcast_queued(self):
+        """Assign nonces to queued rows and broadcast them, up to ``max_in_flight``."""
+        if self._next_nonce is None:
+            self.sync_nonce()
+        room = self.max_in_flight - self._pending().count()
+        if room <= 0:
+            return 0
+
+        queued = list(ChainTransaction.objects.filter(
+            sender=self.sender, status=ChainTransaction.TxStatus.QUEUED
+        ).order_by('created_at', 'pk')[:room])
+        if not queued and not self._free_nonces:
+            return 0
+
+        gas_price = self.client.gas_price()
+        sent = 0
+        for tx in queued:
+            tx.nonce = self._allocate_nonce()
+            tx.gas_price = gas_price
+            tx.status = ChainTransaction.TxStatus.PENDING
+            tx.save(update_fields=['nonce', 'gas_price', 'status'])
+            try:
+                self._send(tx)
+                sent += 1
+            except RPCError as exc:
+                if self._first_broadcast_failed(tx, exc):
+                    break
+        return sent + self.fill_gaps(gas_price)
+
+    def fill_gaps(self, gas_price):
+        """Broadcast a zero-value self-transfer for every released nonce no queued row took."""
+        # A filler that gives up releases its nonce again, for the next round
+        nonces, self._free_nonces = sorted(self._free_nonces), []
+        sent = 0
+        for nonce in nonces:
+            tx = ChainTransaction.objects.create(
+                sender=self.sender, contract=self.sender, method='', nonce=nonce,
+                gas_price=gas_price, status=ChainTransaction.TxStatus.PENDING,
+            )
+            try:
+                self._send(tx)
+                sent += 1
+            except RPCError as exc:
+                if self._first_broadcast_failed(tx, exc):
+                    break
+        return sent
+
+    def _bumped_price(self, tx, network_price):
+        price = max(math.ceil(tx.gas_price * self.gas_bump), network_price)
+        if self.max_gas_price is not None:
+            price = min(price, self.max_gas_price)
+        return price
+
+    def check_pending(self):
+        """Collect receipts for in-flight transactions and replace stuck ones."""
+        pending = list(self._pending().exclude(tx_hash=''))
+        unsent = list(self._pending().filter(tx_hash=''))
+
+        confirmed = []
+        if pending:
+            # Any broadcast version of a replaced transaction may be the one mined
+            calls = [(tx, tx_hash) for tx in pending for tx_hash in (tx.broadcast_hashes or [tx.tx_hash])]
+            results = self.client.batch([('eth_getTransactionReceipt', [tx_hash]) for _, tx_hash in calls])
+            receipts = {}
+            for (tx, tx_hash), receipt in zip(calls, results):
+                if receipt is not None and not isinstance(receipt, RPCError):
+                    receipts[tx.pk] = (tx_hash, receipt)
+            now = timezone.now()
+            stuck = []
+            for tx in pending:
+                if tx.pk not in receipts:
+                    if tx.submitted_at and (now - tx.submitted_at).total_seconds() >= self.stuck_after:
+                        stuck.append(tx)
+                    continue
+                tx.tx_hash, receipt = receipts[tx.pk]
+                tx.block_number = int(receipt['blockNumber'], 16)
+                tx.confirmed_at = now
+                if int(receipt['status'], 16) == 1:
+                    tx.status = ChainTransaction.TxStatus.CONFIRMED
+                    confirmed.append(tx)
+                else:
+                    tx.status = ChainTransaction.TxStatus.FAILED
+                    tx.error = receipt.get('revertReason') or 'Transaction reverted'
+            done = [tx for tx in pending if tx.status != ChainTransaction.TxStatus.PENDING]
+            ChainTransaction.objects.bulk_update(
+                done, ['status', 'tx_hash', 'block_number', 'confirmed_at', 'error'], batch_size=500
+            )
+            if stuck:
+                self._replace(stuck)
+
+        for tx in unsent:
+            try:
+                self._send(tx)
+            except RPCError as exc:
+                if self._first_broadcast_failed(tx, exc):
+                    break
+
+        self.apply_confirmations(confirmed)
+        return len(confirmed)
+
+    def _replace(self, stuck):
+        network_price = self.client.gas_price()
+        for tx in stuck:
+            new_price = self._bumped_price(tx, network_price)
+            if new_price <= tx.gas_price:
+                continue
+            old_price = tx.gas_price
+            tx.gas_price = new_price
+            tx.replacements += 1
+            try:
+                self._send(tx)
+                logger.info("Replaced stuck %s nonce %s: gas %s -> %s", tx.method, tx.nonce, old_price, new_price)
+            except RPCError as exc:
+                tx.gas_price = old_price
+                tx.replacements -= 1
+                logger.warning("Replacement of %s nonce %s failed: %s", tx.method, tx.nonce, exc)
+
+    def apply_confirmations(self, transactions):
+        """Write confirmed hashes to their target rows, one bulk update per model."""
+        by_model = defaultdict(list)
+        for tx in transactions:
+            if tx.target_model and tx.target_pk:
+                by_model[tx.target_model].append(tx)
+
+        for label, txs in by_model.items():
+            model = apps.get_model(label)
+            objects = [model(pk=tx.target_pk, blockchain_hash=tx.tx_hash) for tx in txs]
+            model.objects.bulk_update(objects, ['blockchain_hash'], batch_size=500)
+
+    def tick(self):
+        """One broadcast-and-poll round; returns ``(sent, confirmed)``."""
+        sent = self.broadcast_queued()
+        confirmed = self.check_pending()
+        return sent, confirmed
+
+    def run(self, interval=1.0):
+        self.sync_nonce()
+        logger.info("Transaction manager for %s starting at nonce %s", self.sender, self._next_nonce)
+        while True:
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Transaction manager round failed")
+                self._next_nonce = None
+            time.sleep(interval)
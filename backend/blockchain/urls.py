@@ -0,0 +1,10 @@
+"""
+Blockchain URLs.
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # API endpoints
+    path('rpc/', views.simulator_rpc, name='chain_simulator_rpc'),
+]
@@ -0,0 +1,79 @@
+"""
+Blockchain views for GreenTrace.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from greentrace.responses import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from products.models import Product
+from django.contrib.auth.models import User
+from users.authentication import get_token_claims
+from users.tokens import InvalidWalletToken
+import json
+from .crosschain import get_crosschain_service
+from .rpc import get_simulator_dispatcher
+from .simulator import SUPPORTED_NETWORKS
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def simulator_rpc(request):
+    """JSON-RPC endpoint for the in-process chain simulator."""
+    if not getattr(settings, 'CHAIN_SIMULATOR_ENDPOINT', False):
+        return JsonResponse({'error': 'Chain simulator is disabled'}, status=404)
+
+    body = get_simulator_dispatcher().handle_json(request.body)
+    return HttpResponse(body, content_type='application/json')
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def crosschain_sync(request):
+    """
+    Queue a product sync to another chain; returns immediately.
+
+    Requires the wallet token of the product's creator (or a staff user) in
+    the Authorization header; the view is CSRF-exempt, so cookies are not
+    accepted.
+    """
+    try:
+        claims = get_token_claims(request)
+    except InvalidWalletToken as e:
+        return JsonResponse({'error': str(e)}, status=401)
+    if claims is None:
+        return JsonResponse({'error': 'Wallet token required'}, status=401)
+    try:
+        data = json.loads(request.body)
+        batch_id = data.get('batch_id')
+        network = data.get('target_network')
+
+        if not batch_id or not network:
+            return JsonResponse({'error': 'batch_id and target_network required'}, status=400)
+        if network not in SUPPORTED_NETWORKS:
+            return JsonResponse({'error': f'Network not supported: {network}'}, status=400)
+        owner_id = Product.objects.filter(batch_id=batch_id).values_list('created_by_id', flat=True).first()
+        if owner_id is None:
+            return JsonResponse({'error': 'Product not found'}, status=404)
+        if owner_id != claims['uid'] and not claims['staff']:
+            return JsonResponse({'error': 'Only the product owner can sync it'}, status=403)
+
+        sync = get_crosschain_service().enqueue(batch_id, network, user=User(pk=claims['uid']))
+        return JsonResponse({
+            'success': True,
+            'message': f'Sync to {network} queued',
+            'batch_id': batch_id,
+            'target_network': network,
+            'status': sync.status,
+        }, status=202)
+
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def crosschain_status(request, batch_id):
+    """Cross-chain sync status for a product, served from the local cache."""
+    return JsonResponse(get_crosschain_service().get_status(batch_id))
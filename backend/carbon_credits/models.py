@@ -1,7 +1,7 @@
 """
 Carbon credit models for GreenTrace.
 """
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
@@ -85,8 +85,12 @@ class CarbonCredit(models.Model):
     def save(self, *args, **kwargs):
         """Auto-generate ID if not provided."""
         if not self.id:
-            # Generate ID based on timestamp and amount
+            # Timestamp plus a random suffix, so credits created in the same second don't collide
+            import secrets
             import time
             timestamp = int(time.time())
-            self.id = f"CC-{timestamp:06d}"
-        super().save(*args, **kwargs)
+            self.id = f"CC-{timestamp:06d}-{secrets.token_hex(3)}"
+        # Commit together with the webhook outbox event written on post_save
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
@@ -0,0 +1,21 @@
+"""
+Query budgets of the carbon credit views and admin against a seeded dataset.
+"""
+from django.urls import reverse
+
+from greentrace.testing import SeededTestCase
+
+
+class CreditQueryTests(SeededTestCase):
+
+    def test_credit_list(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('credit_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['credits']), self.products)
+
+    def test_changelist(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('admin:carbon_credits_carboncredit_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, self.products)
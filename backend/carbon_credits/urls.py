@@ -2,11 +2,12 @@
 Carbon credit management URLs.
 """
 from django.urls import path
+from django.conf import settings
 from . import views
 
 urlpatterns = [
     # API endpoints
-    path('create/', views.create_carbon_credit_api, name='create_carbon_credit_api'),
+    path('create/', views.acreate_carbon_credit_api if settings.ASYNC_API_VIEWS else views.create_carbon_credit_api, name='create_carbon_credit_api'),
     
     # Carbon credit views
     path('', views.carbon_credit_list, name='credit_list'),
@@ -2,15 +2,31 @@
 Carbon credit views for GreenTrace.
 """
 from django.shortcuts import render
-from django.http import JsonResponse
+from greentrace.responses import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.models import User
-from users.models import UserProfile
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from users.authentication import resolve_request_wallet
+from users.provisioning import aensure_wallet_identity, ensure_wallet_identity
+from blockchain.transactions import mirror_credit_issuance
 import json
 from .models import CarbonCredit
 
 
+def _credit_fields(data, user):
+    return dict(
+        amount=data.get('amount', 0),
+        unit=data.get('unit', 'tonnes'),
+        description=data.get('description', ''),
+        carbon_offset=data.get('carbon_offset', ''),
+        created_by=user,
+        blockchain_network=data.get('blockchain_network', 'avalanche-fuji'),
+        status='issued'
+    )
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def create_carbon_credit_api(request):
@@ -18,41 +34,53 @@ def create_carbon_credit_api(request):
     try:
         data = json.loads(request.body)
         
-        # Create or get user based on wallet address
-        wallet_address = data.get('wallet_address')
-        if not wallet_address:
-            return JsonResponse({'error': 'Wallet address required'}, status=400)
+        # Wallet from the session token, or the request body when tokens are optional
+        wallet_address, error = resolve_request_wallet(request, data)
+        if error:
+            return error
         
-        # Try to find existing user with this wallet address
-        try:
-            user_profile = UserProfile.objects.get(wallet_address=wallet_address)
-            user = user_profile.user
-        except UserProfile.DoesNotExist:
-            # Create new user if not found
-            username = f"user_{wallet_address[:8]}"
-            user = User.objects.create_user(
-                username=username,
-                email=f"{username}@greentrace.local",
-                password=None  # No password for wallet-based auth
-            )
-            # Create user profile
-            UserProfile.objects.create(
-                user=user,
-                wallet_address=wallet_address,
-                role='public',
-                blockchain_network=data.get('blockchain_network', 'avalanche-fuji')
-            )
+        # Resolve the wallet's user (cached, no SQL on a hit), provisioning it on first use
+        identity = ensure_wallet_identity(
+            wallet_address, network=data.get('blockchain_network', 'avalanche-fuji')
+        )
+        user = User(pk=identity.user_id)
         
         # Create the carbon credit
-        credit = CarbonCredit.objects.create(
-            amount=data.get('amount', 0),
-            unit=data.get('unit', 'tonnes'),
-            description=data.get('description', ''),
-            carbon_offset=data.get('carbon_offset', ''),
-            created_by=user,
-            blockchain_network=data.get('blockchain_network', 'avalanche-fuji'),
-            status='issued'
+        credit = CarbonCredit.objects.create(**_credit_fields(data, user))
+        
+        if settings.CHAIN_ANCHORING_ENABLED:
+            mirror_credit_issuance(credit, wallet_address)
+        
+        return JsonResponse({
+            'success': True,
+            'credit_id': credit.id,
+            'message': 'Carbon credit created successfully'
+        })
+        
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def acreate_carbon_credit_api(request):
+    """Async ``create_carbon_credit_api``, routed to under ASGI (ASYNC_API_VIEWS)."""
+    try:
+        data = json.loads(request.body)
+        
+        wallet_address, error = await sync_to_async(resolve_request_wallet)(request, data)
+        if error:
+            return error
+        
+        identity = await aensure_wallet_identity(
+            wallet_address, network=data.get('blockchain_network', 'avalanche-fuji')
         )
+        user = User(pk=identity.user_id)
+        
+        credit = await CarbonCredit.objects.acreate(**_credit_fields(data, user))
+        
+        if settings.CHAIN_ANCHORING_ENABLED:
+            await sync_to_async(mirror_credit_issuance)(credit, wallet_address)
         
         return JsonResponse({
             'success': True,
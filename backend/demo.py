@@ -13,10 +13,24 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'greentrace.settings')
 django.setup()
 
-from users.models import User
+from django.contrib.auth.models import User
+from users.models import UserProfile
 from products.models import Product
 
 
+def get_or_create_demo_user(username, role):
+    """A demo user with a profile of ``role``; the role decides what the user may see."""
+    user, created = User.objects.get_or_create(username=username, defaults={'email': f'{username}@example.com'})
+    if created:
+        user.set_password('password123')
+        user.save()
+    profile, _ = UserProfile.objects.get_or_create(user=user, defaults={'role': role})
+    if profile.role != role:
+        profile.role = role
+        profile.save()
+    return user, created
+
+
 def demonstrate_privacy_controls():
     """
     Demonstrate how privacy controls work in the Django backend.
@@ -27,77 +41,13 @@ def demonstrate_privacy_controls():
     # Create sample users with different roles
     print("\n👥 Creating sample users...")
     
-    # Public user
-    public_user, created = User.objects.get_or_create(
-        username='public_user',
-        defaults={
-            'email': 'public@example.com',
-            'role': User.UserRole.PUBLIC,
-            'show_sensitive_data': False,
-            'show_producer_details': False,
-            'show_iot_data': False,
-            'show_carbon_details': False,
-            'show_certification_details': False,
-        }
-    )
-    if created:
-        public_user.set_password('password123')
-        public_user.save()
-        print("✅ Created public user")
-    
-    # Private user
-    private_user, created = User.objects.get_or_create(
-        username='private_user',
-        defaults={
-            'email': 'private@example.com',
-            'role': User.UserRole.PRIVATE,
-            'show_sensitive_data': True,
-            'show_producer_details': True,
-            'show_iot_data': False,
-            'show_carbon_details': True,
-            'show_certification_details': True,
-        }
-    )
-    if created:
-        private_user.set_password('password123')
-        private_user.save()
-        print("✅ Created private user")
-    
-    # Enterprise user
-    enterprise_user, created = User.objects.get_or_create(
-        username='enterprise_user',
-        defaults={
-            'email': 'enterprise@example.com',
-            'role': User.UserRole.ENTERPRISE,
-            'show_sensitive_data': True,
-            'show_producer_details': True,
-            'show_iot_data': True,
-            'show_carbon_details': True,
-            'show_certification_details': True,
-        }
-    )
-    if created:
-        enterprise_user.set_password('password123')
-        enterprise_user.save()
-        print("✅ Created enterprise user")
-    
-    # Admin user
-    admin_user, created = User.objects.get_or_create(
-        username='admin_user',
-        defaults={
-            'email': 'admin@example.com',
-            'role': User.UserRole.ADMIN,
-            'show_sensitive_data': True,
-            'show_producer_details': True,
-            'show_iot_data': True,
-            'show_carbon_details': True,
-            'show_certification_details': True,
-        }
-    )
-    if created:
-        admin_user.set_password('password123')
-        admin_user.save()
-        print("✅ Created admin user")
+    users = []
+    for role in UserProfile.UserRole.values:
+        user, created = get_or_create_demo_user(f'{role}_user', role)
+        users.append(user)
+        if created:
+            print(f"✅ Created {role} user")
+    public_user, private_user, enterprise_user, admin_user = users
     
     # Create a sample product with complete data
     print("\n🌱 Creating sample product...")
@@ -122,12 +72,11 @@ def demonstrate_privacy_controls():
     print("\n🔍 Demonstrating data access for different user roles:")
     print("-" * 60)
     
-    users = [public_user, private_user, enterprise_user, admin_user]
     user_names = ['Public User', 'Private User', 'Enterprise User', 'Admin User']
     
     for user, user_name in zip(users, user_names):
-        print(f"\n👤 {user_name} ({user.role.upper()})")
-        print(f"   Privacy Settings: {user.get_privacy_settings()}")
+        print(f"\n👤 {user_name} ({user.profile.role.upper()})")
+        print(f"   Privacy Settings: {user.profile.get_privacy_settings()}")
         
         # Get data based on user permissions
         accessible_data = product.get_private_data(user)
@@ -0,0 +1,20 @@
+"""
+ASGI config for GreenTrace project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serving through it routes the JSON API to the async views, so a slow client
+or query holds a coroutine rather than a worker thread. Run it under
+gunicorn with ``python start.py --asgi``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'greentrace.settings')
+os.environ.setdefault('ASYNC_API_VIEWS', 'True')
+
+application = get_asgi_application()
@@ -0,0 +1,426 @@
+"""
+Two-tier cache backends for GreenTrace.
+
+``TwoTierCache`` keeps a small in-process LRU (L1) in front of a cache
+shared by every worker on the host (L2, another ``CACHES`` alias). Reads
+hit L1 first; writes go to both. Each write or delete also bumps a version
+stamp in L2 and records which key changed. Every worker checks the stamp
+at most once per ``SYNC_INTERVAL`` and drops the changed keys from its L1,
+so L1 is never more than that far behind another worker's write.
+
+``get_or_set`` with a callable is stampede-protected: one thread per
+process and one process per host (through a lease in L2) computes a
+missing value while the others wait for it.
+
+``SQLiteCache`` is the default L2, a cache table in a WAL-mode SQLite file
+that all workers share. Any other Django backend (e.g. Redis) works too.
+"""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+EPOCH_KEY = 'twotier:epoch'
+INVALIDATION_KEY = 'twotier:inv:{}'
+LEASE_KEY = 'twotier:lease:{}'
+CLEAR_ALL = '*'
+# Beyond this many missed changes L1 is simply cleared
+MAX_REPLAY = 1000
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries=5000, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires = entry
+            if expires < self.clock():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TwoTierCache(BaseCache):
+    """
+    In-process L1 in front of a shared L2 cache alias.
+
+    ``LOCATION`` names the L2 alias. ``OPTIONS``: ``L1_MAX_ENTRIES``,
+    ``L1_TIMEOUT`` (longest an entry lives in L1), ``SYNC_INTERVAL``
+    (seconds between version stamp checks), ``INVALIDATION_TTL`` and
+    ``LEASE_TIMEOUT`` (longest a ``get_or_set`` computation may hold its lease).
+    """
+
+    # Striped locks for in-process single flight in get_or_set
+    _STRIPES = 64
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = location or 'shared'
+        self.l1 = LocalLRU(options.get('L1_MAX_ENTRIES', 5000))
+        self.l1_timeout = options.get('L1_TIMEOUT', 30)
+        self.sync_interval = options.get('SYNC_INTERVAL', 0.5)
+        self.invalidation_ttl = options.get('INVALIDATION_TTL', 120)
+        self.lease_timeout = options.get('LEASE_TIMEOUT', 30)
+        self._epoch = None
+        self._own_epochs = set()
+        self._synced_at = float('-inf')
+        self._sync_lock = threading.Lock()
+        self._flight_locks = [threading.Lock() for _ in range(self._STRIPES)]
+
+    @cached_property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    # Cross-worker invalidation
+
+    def _sync(self):
+        """Drop L1 entries other workers changed since the last check."""
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_interval:
+            return
+        with self._sync_lock:
+            if now - self._synced_at < self.sync_interval:
+                return
+            self._synced_at = now
+            epoch = self.l2.get(EPOCH_KEY) or 0
+            if self._epoch is None or epoch == self._epoch:
+                self._epoch = epoch
+                return
+            if epoch < self._epoch:
+                # L2 was cleared or restarted
+                self.l1.clear()
+                self._own_epochs.clear()
+                self._epoch = epoch
+                return
+
+            missed = range(self._epoch + 1, epoch + 1)
+            if len(missed) > MAX_REPLAY:
+                self.l1.clear()
+                self._own_epochs.clear()
+                self._epoch = epoch
+                return
+            records = self.l2.get_many([INVALIDATION_KEY.format(n) for n in missed])
+            for n in missed:
+                if n in self._own_epochs:
+                    self._own_epochs.discard(n)
+                    continue
+                key = records.get(INVALIDATION_KEY.format(n))
+                if key is None or key == CLEAR_ALL:
+                    # Record expired (or not written yet): we can't tell what changed
+                    self.l1.clear()
+                    break
+                self.l1.delete(key)
+            self._own_epochs = {n for n in self._own_epochs if n > epoch}
+            self._epoch = epoch
+
+    def _publish(self, key):
+        """Bump the version stamp and record ``key`` as changed."""
+        try:
+            epoch = self.l2.incr(EPOCH_KEY)
+        except ValueError:
+            self.l2.add(EPOCH_KEY, 0, None)
+            epoch = self.l2.incr(EPOCH_KEY)
+        self.l2.set(INVALIDATION_KEY.format(epoch), key, self.invalidation_ttl)
+        with self._sync_lock:
+            self._own_epochs.add(epoch)
+
+    # Helpers
+
+    def _l2_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _l1_ttl(self, timeout):
+        timeout = self._l2_timeout(timeout)
+        return self.l1_timeout if timeout is None else min(self.l1_timeout, timeout)
+
+    def _fill(self, key, value, epoch, timeout=DEFAULT_TIMEOUT):
+        """Put a value read or written at ``epoch`` into L1, unless a sync has happened since."""
+        ttl = self._l1_ttl(timeout)
+        if ttl <= 0:
+            return
+        with self._sync_lock:
+            if self._epoch == epoch:
+                self.l1.set(key, value, ttl)
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._sync()
+        value = self.l1.get(key)
+        if value is not _MISSING:
+            return value
+        epoch = self._epoch
+        value = self.l2.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._fill(key, value, epoch)
+        return value
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        full_keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = {}
+        for full_key, key in full_keys.items():
+            value = self.l1.get(full_key)
+            if value is not _MISSING:
+                found[key] = value
+        missing = [full_key for full_key, key in full_keys.items() if key not in found]
+        if missing:
+            epoch = self._epoch
+            for full_key, value in self.l2.get_many(missing).items():
+                self._fill(full_key, value, epoch)
+                found[full_keys[full_key]] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._sync()
+        epoch = self._epoch
+        self.l2.set(key, value, self._l2_timeout(timeout))
+        self._publish(key)
+        self._fill(key, value, epoch, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # L1 never holds misses, so a successful add needs no invalidation
+        self._sync()
+        epoch = self._epoch
+        added = self.l2.add(key, value, self._l2_timeout(timeout))
+        if added:
+            self._fill(key, value, epoch, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.l2.touch(key, self._l2_timeout(timeout))
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.l1.delete(key)
+        deleted = self.l2.delete(key)
+        self._publish(key)
+        return deleted
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.l1.delete(key)
+        value = self.l2.incr(key, delta)
+        self._publish(key)
+        return value
+
+    def clear(self):
+        self.l2.clear()
+        self.l1.clear()
+        self._publish(CLEAR_ALL)
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout=timeout, version=version)
+            return self.get(key, default, version=version)
+
+        full_key = self.make_and_validate_key(key, version=version)
+        with self._flight_locks[hash(full_key) % self._STRIPES]:
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                return value
+
+            lease, token = LEASE_KEY.format(full_key), uuid.uuid4().hex
+            deadline = time.monotonic() + self.lease_timeout
+            while not self.l2.add(lease, token, self.lease_timeout):
+                # Another process is computing this value; wait for it
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.05)
+                epoch = self._epoch
+                value = self.l2.get(full_key, _MISSING)
+                if value is not _MISSING:
+                    self._fill(full_key, value, epoch, timeout)
+                    return value
+            try:
+                value = default()
+                self.set(key, value, timeout=timeout, version=version)
+                return value
+            finally:
+                if self.l2.get(lease) == token:
+                    self.l2.delete(lease)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache table in a SQLite file (``LOCATION``), shared by every process that opens it.
+
+    Values are pickled. Expired and excess rows are culled on roughly one
+    write in ``CULL_EVERY`` (``OPTIONS``), bounded by ``MAX_ENTRIES``.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self.cull_every = params.get('OPTIONS', {}).get('CULL_EVERY', 100)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # A forked worker must not reuse its parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _live(self, conn, key, now):
+        row = conn.execute('SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        return row[0]
+
+    def _write(self, conn, key, value, timeout):
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self.get_backend_timeout(timeout)),
+        )
+
+    def _cull(self, conn):
+        conn.execute('DELETE FROM cache_entries WHERE expires <= ?', (time.time(),))
+        count = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        if count > self._max_entries:
+            # Soonest to expire first; entries without an expiry (such as EPOCH_KEY) last
+            conn.execute(
+                'DELETE FROM cache_entries WHERE key IN '
+                '(SELECT key FROM cache_entries ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        raw = self._live(self._connection(), key, time.time())
+        return default if raw is None else pickle.loads(raw)
+
+    def get_many(self, keys, version=None):
+        full_keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not full_keys:
+            return {}
+        placeholders = ','.join('?' * len(full_keys))
+        rows = self._connection().execute(
+            f'SELECT key, value FROM cache_entries WHERE key IN ({placeholders}) '
+            f'AND (expires IS NULL OR expires > ?)',
+            (*full_keys, time.time()),
+        )
+        return {full_keys[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        self._write(conn, key, value, timeout)
+        if random.randrange(self.cull_every) == 0:
+            self._cull(conn)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._live(conn, key, time.time()) is not None:
+                conn.execute('ROLLBACK')
+                return False
+            self._write(conn, key, value, timeout)
+            conn.execute('COMMIT')
+            return True
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute('DELETE FROM cache_entries WHERE key = ?', (key,)).rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._live(self._connection(), key, time.time()) is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            raw = self._live(conn, key, now)
+            if raw is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(raw) + delta
+            conn.execute(
+                'UPDATE cache_entries SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+            conn.execute('COMMIT')
+            return value
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entries')
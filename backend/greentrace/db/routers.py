@@ -0,0 +1,145 @@
+"""
+Primary/replica routing for GreenTrace.
+
+Reads of the models in ``REPLICATED_MODELS`` go to a replica from
+``DATABASE_REPLICAS``; every write goes to ``default``. Once a client
+writes, it is pinned to the primary for ``REPLICA_PIN_SECONDS`` (for the
+rest of the request, then via a cookie set by ``PrimaryPinMiddleware``),
+so it reads its own writes. Reads inside a transaction on the primary, and
+reads outside a request (management commands, background workers), where
+nothing tracks writes, also stay on the primary. Replicas lagging more than
+``REPLICA_MAX_LAG_SECONDS`` behind the heartbeat are skipped.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+PIN_COOKIE = 'primary_pin'
+
+
+class PinState:
+    """Per-request pinning state; mutable so changes made in worker threads are seen by the request."""
+
+    def __init__(self, pinned_until=0.0):
+        self.pinned_until = pinned_until
+        self.wrote = False
+
+    def pin(self, seconds):
+        self.wrote = True
+        self.pinned_until = max(self.pinned_until, time.time() + seconds)
+
+    @property
+    def pinned(self):
+        return self.wrote or self.pinned_until > time.time()
+
+
+_pin_state = contextvars.ContextVar('primary_pin_state', default=None)
+
+
+def begin_request(pinned_until=0.0):
+    """Start tracking writes for the current request; returns its ``PinState``."""
+    state = PinState(pinned_until)
+    _pin_state.set(state)
+    return state
+
+
+def end_request():
+    _pin_state.set(None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+class ReplicaLagMonitor:
+    """Measures replica lag from the heartbeat row, cached for ``ttl`` seconds per process."""
+
+    def __init__(self, ttl=5.0, clock=time.time):
+        self.ttl = ttl
+        self.clock = clock
+        self._lags = {}
+        self._lock = threading.Lock()
+
+    def measure(self, alias):
+        """Seconds since the heartbeat visible on ``alias`` was stamped (``None`` if unreadable)."""
+        from greentrace.models import ReplicationHeartbeat
+
+        try:
+            stamped_at = ReplicationHeartbeat.objects.using(alias).values_list('stamped_at', flat=True).first()
+        except Exception as exc:
+            logger.warning(f"Could not read heartbeat from {alias}: {exc}")
+            return None
+        if stamped_at is None:
+            return None
+        return max(0.0, self.clock() - stamped_at)
+
+    def lag(self, alias):
+        now = self.clock()
+        with self._lock:
+            cached = self._lags.get(alias)
+            if cached is not None and now - cached[1] < self.ttl:
+                return cached[0]
+        lag = self.measure(alias)
+        with self._lock:
+            self._lags[alias] = (lag, now)
+        return lag
+
+    def lags(self):
+        return {alias: self.lag(alias) for alias in replica_aliases()}
+
+    def is_healthy(self, alias):
+        max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', None)
+        if not max_lag:
+            return True
+        lag = self.lag(alias)
+        return lag is not None and lag <= max_lag
+
+
+lag_monitor = ReplicaLagMonitor()
+
+
+def stamp_heartbeat():
+    """Write the current time to the heartbeat row on the primary."""
+    from greentrace.models import ReplicationHeartbeat
+
+    ReplicationHeartbeat.objects.using(PRIMARY).update_or_create(pk=1, defaults={'stamped_at': time.time()})
+
+
+class PrimaryReplicaRouter:
+    """Database router: replicated reads in a request go to a healthy replica unless the client is pinned."""
+
+    def _replicated(self, model):
+        return model._meta.label in getattr(settings, 'REPLICATED_MODELS', ())
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if not self._replicated(model) or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        state = _pin_state.get()
+        if state is None or state.pinned:
+            return PRIMARY
+        healthy = [alias for alias in replica_aliases() if lag_monitor.is_healthy(alias)]
+        return random.choice(healthy) if healthy else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _pin_state.get()
+        if state is not None:
+            state.pin(getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas are copies of the primary, so rows from any of them may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,224 @@
+"""
+Slow-query log for GreenTrace.
+
+Every connection of the ``greentrace.db.sqlite3`` backend runs statements
+through ``slow_query_log``. A statement that takes longer than
+``SLOW_QUERY_MS`` is logged with its fingerprint (the SQL with literals
+and ``IN`` lists collapsed), the application call site and, the first time
+each fingerprint is seen in a process, its ``EXPLAIN QUERY PLAN``.
+
+Per fingerprint, each process aggregates the count, total and max time,
+recent durations (for p95), call sites and the plan. The aggregate is
+written to ``SLOW_QUERY_DIR/<pid>.json`` every ``SLOW_QUERY_FLUSH_INTERVAL``
+seconds; ``manage.py slow_queries`` merges the files into a report.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_SAMPLES = 500
+MAX_CALL_SITES = 10
+EXPLAINABLE = ('select', 'update', 'delete', 'with')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'(?<!%)%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """SQL with literals and placeholders as ``?`` and ``IN`` lists collapsed."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+# Modules whose execute wrappers sit between the ORM and the caller
+WRAPPER_MODULES = ('greentrace/metrics.py', 'greentrace/querybudget.py')
+
+
+def call_site():
+    """First frame of application code (outside Django, site-packages, this package and execute wrappers)."""
+    base_dir = str(settings.BASE_DIR)
+    own_dir = os.path.dirname(os.path.abspath(__file__))
+    wrappers = tuple(os.path.join(base_dir, path) for path in WRAPPER_MODULES)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(base_dir) and not filename.startswith(own_dir)
+                and not filename.startswith(wrappers) and 'site-packages' not in filename):
+            return f'{os.path.relpath(filename, base_dir)}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return '<unknown>'
+
+
+def explain(connection, sql, params):
+    """Query plan for ``sql``, run on a raw cursor so no execute wrapper sees it."""
+    prefix = connection.ops.explain_query_prefix()
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'{prefix} {sql}', params or ())
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Per-process aggregate of slow statements by fingerprint."""
+
+    def __init__(self, directory, threshold_ms=100, flush_interval=10.0):
+        self.directory = Path(directory)
+        self.threshold = threshold_ms / 1000
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._entries = {}
+            self._flushed_at = time.monotonic()
+            self._dirty = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                try:
+                    self.record(context['connection'], sql, None if many else params, elapsed)
+                except Exception:
+                    logger.exception('Could not record slow query')
+
+    def record(self, connection, sql, params, elapsed):
+        normalized = normalize_sql(sql)
+        key = fingerprint(normalized)
+        site = call_site()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    'sql': normalized, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'samples': deque(maxlen=MAX_SAMPLES), 'call_sites': Counter(), 'plan': None,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += elapsed * 1000
+            entry['max_ms'] = max(entry['max_ms'], elapsed * 1000)
+            entry['samples'].append(round(elapsed * 1000, 3))
+            entry['call_sites'][site] += 1
+            needs_plan = entry['plan'] is None
+            self._dirty = True
+
+        plan = None
+        if needs_plan and normalized.lower().startswith(EXPLAINABLE) and params is not None:
+            try:
+                plan = explain(connection, sql, params)
+            except Exception as exc:
+                plan = [f'EXPLAIN failed: {exc}']
+            with self._lock:
+                entry['plan'] = plan
+        logger.warning(
+            f"Slow query {key} {elapsed * 1000:.1f}ms at {site}: {normalized[:500]}"
+            + (''.join(f'\n    {line}' for line in plan) if plan else '')
+        )
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: {
+                    **entry,
+                    'samples': list(entry['samples']),
+                    'call_sites': dict(entry['call_sites'].most_common(MAX_CALL_SITES)),
+                }
+                for key, entry in self._entries.items()
+            }
+
+    def flush(self):
+        if not self._dirty:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f'{os.getpid()}.json'
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, path)
+        self._flushed_at = time.monotonic()
+        self._dirty = False
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            try:
+                self.flush()
+            except OSError as exc:
+                logger.warning(f"Could not write slow query log: {exc}")
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def load_report(directory=None):
+    """Merge every process's file into ``[{fingerprint, sql, count, total_ms, p95_ms, ...}]``, slowest total first."""
+    slow_query_log.flush()
+    merged = {}
+    for path in Path(directory or slow_query_log.directory).glob('*.json'):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for key, entry in data.items():
+            target = merged.get(key)
+            if target is None:
+                merged[key] = {**entry, 'call_sites': Counter(entry['call_sites'])}
+                continue
+            target['count'] += entry['count']
+            target['total_ms'] += entry['total_ms']
+            target['max_ms'] = max(target['max_ms'], entry['max_ms'])
+            target['samples'] += entry['samples']
+            target['call_sites'].update(entry['call_sites'])
+            target['plan'] = target['plan'] or entry['plan']
+
+    report = []
+    for key, entry in merged.items():
+        samples = entry.pop('samples')
+        report.append({
+            'fingerprint': key,
+            **entry,
+            'total_ms': round(entry['total_ms'], 3),
+            'max_ms': round(entry['max_ms'], 3),
+            'p95_ms': percentile(samples, 0.95),
+            'call_sites': dict(entry['call_sites'].most_common(MAX_CALL_SITES)),
+        })
+    return sorted(report, key=lambda item: item['total_ms'], reverse=True)
+
+
+slow_query_log = SlowQueryLog(
+    getattr(settings, 'SLOW_QUERY_DIR', Path(settings.BASE_DIR) / 'var' / 'slow-queries'),
+    threshold_ms=getattr(settings, 'SLOW_QUERY_MS', 100),
+    flush_interval=getattr(settings, 'SLOW_QUERY_FLUSH_INTERVAL', 10.0),
+)
+os.register_at_fork(after_in_child=slow_query_log.reset)
+atexit.register(slow_query_log.flush)
@@ -0,0 +1,165 @@
+"""
+SQLite backend tuned for a multi-worker deployment.
+
+Every new connection switches the file to WAL (readers never block the
+writer), relaxes ``synchronous`` to NORMAL, memory-maps the file and sets
+the page cache and busy timeout. Transactions start with ``BEGIN
+IMMEDIATE`` so a transaction that reads before it writes waits for the
+write lock up front instead of failing with "database is locked" when it
+tries to upgrade.
+
+With ``serialize_writes`` enabled, transactions also queue on an exclusive
+lock file next to the database, so writers from every gunicorn worker take
+turns instead of racing the busy timeout.
+
+Tuning comes from ``DATABASES[...]['OPTIONS']``; any other option is passed
+to ``sqlite3.connect`` as usual. Statements run through the slow-query log
+(``greentrace/db/slowlog.py``) unless ``SLOW_QUERY_MS`` is 0.
+"""
+import os
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within the process
+    fcntl = None
+
+TUNING_DEFAULTS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size_kb': 64 * 1024,
+    'busy_timeout_ms': 5000,
+    'transaction_mode': 'IMMEDIATE',
+    'serialize_writes': False,
+}
+
+
+class WriteQueue:
+    """Exclusive write lock shared by the threads of this process and, via ``flock``, other processes."""
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def acquire(self):
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise OperationalError('database is locked (write queue timeout)')
+        if fcntl is None:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a+b')
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise OperationalError('database is locked (write queue timeout)')
+                    time.sleep(0.002)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        if fcntl is not None and self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+_write_queues = {}
+_write_queues_lock = threading.Lock()
+# flock belongs to the open file, which a forked worker would share with its parent
+os.register_at_fork(after_in_child=_write_queues.clear)
+
+
+def get_write_queue(database, timeout):
+    """One ``WriteQueue`` per database file and process."""
+    path = f'{database}.write-lock'
+    with _write_queues_lock:
+        if path not in _write_queues:
+            _write_queues[path] = WriteQueue(path, timeout)
+        return _write_queues[path]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._holds_write_lock = False
+        from greentrace.db.slowlog import slow_query_log
+
+        if slow_query_log.threshold > 0:
+            self.execute_wrappers.append(slow_query_log)
+
+    @property
+    def tuning(self):
+        options = self.settings_dict['OPTIONS']
+        return {name: options.get(name, default) for name, default in TUNING_DEFAULTS.items()}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for name in TUNING_DEFAULTS:
+            params.pop(name, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        if self.is_in_memory_db():
+            return conn
+        tuning = self.tuning
+        conn.execute(f"PRAGMA busy_timeout = {int(tuning['busy_timeout_ms'])}")
+        conn.execute(f"PRAGMA journal_mode = {tuning['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {tuning['synchronous']}")
+        conn.execute(f"PRAGMA mmap_size = {int(tuning['mmap_size'])}")
+        # Negative cache_size is in KiB rather than pages
+        conn.execute(f"PRAGMA cache_size = -{int(tuning['cache_size_kb'])}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _write_queue(self):
+        if not self.tuning['serialize_writes'] or self.is_in_memory_db():
+            return None
+        return get_write_queue(self.settings_dict['NAME'], self.tuning['busy_timeout_ms'] / 1000)
+
+    def _start_transaction_under_autocommit(self):
+        queue = self._write_queue()
+        if queue is not None:
+            queue.acquire()
+            self._holds_write_lock = True
+        try:
+            self.cursor().execute(f"BEGIN {self.tuning['transaction_mode']}")
+        except BaseException:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            self._write_queue().release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self._release_write_lock()
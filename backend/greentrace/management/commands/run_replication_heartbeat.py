@@ -0,0 +1,28 @@
+"""
+Stamp the replication heartbeat on the primary so replica lag can be measured.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from greentrace.db.routers import lag_monitor, stamp_heartbeat
+
+
+class Command(BaseCommand):
+    help = 'Write the replication heartbeat on the primary and report replica lag'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds between stamps (the resolution of the lag measurement)')
+        parser.add_argument('--once', action='store_true', help='Stamp once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            stamp_heartbeat()
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS('Heartbeat stamped'))
+                return
+            for alias, lag in lag_monitor.lags().items():
+                if lag is None or lag > 10 * options['interval']:
+                    self.stderr.write(f'{alias}: lag {lag if lag is None else round(lag, 1)}s')
+            time.sleep(options['interval'])
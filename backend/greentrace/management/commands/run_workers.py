@@ -0,0 +1,77 @@
+"""
+Run every background worker in one process, restarting any that stops.
+
+Each worker is its own management command looping on an interval. On a
+single instance with a local SQLite database (Render's free plan) they must
+run next to the web server, so they share one process here, one thread
+each, instead of one Django process apiece.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def worker_commands():
+    """``[(command, args), ...]`` of the background workers this deployment needs."""
+    commands = [
+        ('run_transaction_manager', []),
+        ('process_crosschain_sync', []),
+        ('run_webhook_dispatcher', []),
+        ('snapshot_compliance_report', []),
+        ('compact_access_logs', []),
+        ('process_data_subject_requests', []),
+    ]
+    if settings.DATABASE_REPLICAS:
+        commands.append(('run_replication_heartbeat', []))
+    return commands
+
+
+class Command(BaseCommand):
+    help = 'Run the background workers (transactions, syncs, webhooks, reports, access logs, GDPR jobs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exclude', default='', help='Comma-separated worker commands not to run')
+        parser.add_argument('--max-restart-delay', type=float, default=60.0,
+                            help='Longest wait before restarting a worker that stopped (doubles from 1s)')
+
+    def handle(self, *args, **options):
+        excluded = {name.strip() for name in options['exclude'].split(',') if name.strip()}
+        threads = [
+            threading.Thread(
+                target=self.supervise, args=(name, command_args, options['max_restart_delay']),
+                name=name, daemon=True,
+            )
+            for name, command_args in worker_commands() if name not in excluded
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(self.style.SUCCESS(f'Running {", ".join(thread.name for thread in threads)}'))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+    def supervise(self, name, command_args, max_delay):
+        failures = 0
+        while True:
+            started = time.monotonic()
+            try:
+                call_command(name, *command_args)
+                logger.warning(f"Worker {name} returned")
+            except Exception:
+                logger.exception(f"Worker {name} crashed")
+            finally:
+                close_old_connections()
+            # A worker that ran for a while before stopping starts over at the shortest delay
+            failures = failures + 1 if time.monotonic() - started < max_delay else 1
+            delay = min(max_delay, 2 ** (failures - 1))
+            logger.info(f"Restarting worker {name} in {delay:.0f}s")
+            time.sleep(delay)
@@ -0,0 +1,41 @@
+"""
+Report slow SQL statements aggregated by fingerprint across all workers.
+"""
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from greentrace.db.slowlog import load_report, slow_query_log
+
+
+class Command(BaseCommand):
+    help = 'Show slow queries by fingerprint (count, total, p95, max, call sites and plan)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of fingerprints to show')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+        parser.add_argument('--reset', action='store_true', help='Delete the collected data after reporting')
+
+    def handle(self, *args, **options):
+        report = load_report()[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=1))
+        elif not report:
+            self.stdout.write(f'No slow queries recorded in {slow_query_log.directory}')
+        for entry in report if not options['json'] else ():
+            self.stdout.write(self.style.WARNING(
+                f"{entry['fingerprint']}  count={entry['count']}  total={entry['total_ms']:.1f}ms  "
+                f"p95={entry['p95_ms']:.1f}ms  max={entry['max_ms']:.1f}ms"
+            ))
+            self.stdout.write(f"  {entry['sql'][:1000]}")
+            for site, count in entry['call_sites'].items():
+                self.stdout.write(f'  {count:>6}x {site}')
+            for line in entry['plan'] or ():
+                self.stdout.write(f'    {line}')
+            self.stdout.write('')
+
+        if options['reset']:
+            slow_query_log.reset()
+            for path in Path(slow_query_log.directory).glob('*.json'):
+                path.unlink(missing_ok=True)
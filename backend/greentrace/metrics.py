@@ -0,0 +1,286 @@
+"""
+Request metrics for GreenTrace, in Prometheus text format.
+
+Each worker keeps its counters and histograms in memory and writes them
+to its own file in ``METRICS_DIR`` every ``METRICS_FLUSH_INTERVAL``
+seconds (and at exit). ``collect`` merges the files of all workers. It
+also folds files left by exited workers into an archive file, so totals
+survive worker recycling without the directory growing.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: dead workers' files are merged but never compacted
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# name: (type, help, buckets)
+METRICS = {
+    'greentrace_http_requests_total': ('counter', 'Requests by view, method and status', None),
+    'greentrace_http_request_duration_seconds': ('histogram', 'Request latency', LATENCY_BUCKETS),
+    'greentrace_http_response_size_bytes': ('histogram', 'Response body size', SIZE_BUCKETS),
+    'greentrace_db_queries_per_request': ('histogram', 'SQL statements per request', QUERY_COUNT_BUCKETS),
+    'greentrace_db_queries_total': ('counter', 'SQL statements executed', None),
+    'greentrace_db_query_seconds_total': ('counter', 'Time spent in SQL', None),
+    'greentrace_rate_limited_total': ('counter', 'Requests refused by rate limiting', None),
+    'greentrace_webhook_events_total': ('counter', 'Webhook events sent, by delivery result', None),
+    'greentrace_db_replica_lag_seconds': ('gauge', 'Seconds each read replica trails the primary', None),
+}
+
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = '.lock'
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """Per-process counters and histograms, persisted to ``<directory>/<pid>.json``."""
+
+    def __init__(self, directory, flush_interval=5.0):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = defaultdict(float)
+            self._histograms = {}
+            self._flushed_at = time.monotonic()
+
+    def inc(self, name, labels, value=1):
+        with self._lock:
+            self._counters[(name, _labels_key(labels))] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[0][index] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(map(list, labels)), value] for (name, labels), value in self._counters.items()],
+                'histograms': [
+                    [name, list(map(list, labels)), list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self._histograms.items()
+                ],
+            }
+
+    def flush(self):
+        """Write this process's metrics file (atomically)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f'{os.getpid()}.json'
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, path)
+        self._flushed_at = time.monotonic()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            try:
+                self.flush()
+            except OSError as exc:
+                logger.warning(f"Could not write metrics: {exc}")
+
+    def collect(self):
+        """Merge every worker's file (this one freshly flushed); returns ``(counters, histograms)``."""
+        self.flush()
+        counters, histograms = defaultdict(float), {}
+        with self._directory_lock():
+            self._compact()
+            for path in self.directory.glob('*.json'):
+                try:
+                    data = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue
+                _merge(data, counters, histograms)
+        return counters, histograms
+
+    def _directory_lock(self):
+        return _FileLock(self.directory / LOCK_FILE)
+
+    def _compact(self):
+        """Fold files of exited workers into the archive file."""
+        if fcntl is None:
+            return
+        dead = [path for path in self.directory.glob('*.json')
+                if path.name != ARCHIVE_FILE and not _alive(int(path.stem))]
+        if not dead:
+            return
+        archive_path = self.directory / ARCHIVE_FILE
+        counters, histograms = defaultdict(float), {}
+        for path in [archive_path, *dead]:
+            try:
+                _merge(json.loads(path.read_text()), counters, histograms)
+            except (OSError, ValueError):
+                continue
+        tmp = archive_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            'counters': [[name, list(map(list, labels)), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(map(list, labels)), *histogram] for (name, labels), histogram in histograms.items()],
+        }))
+        os.replace(tmp, archive_path)
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(data, counters, histograms):
+    for name, labels, value in data.get('counters', []):
+        counters[(name, tuple(map(tuple, labels)))] += value
+    for name, labels, counts, total, count in data.get('histograms', []):
+        key = (name, tuple(map(tuple, labels)))
+        histogram = histograms.get(key)
+        if histogram is None:
+            histograms[key] = [list(counts), total, count]
+        else:
+            histogram[0] = [a + b for a, b in zip(histogram[0], counts)]
+            histogram[1] += total
+            histogram[2] += count
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def render(counters, histograms, gauges=None):
+    """Prometheus text exposition of merged metrics plus ``gauges`` (``{name: {labels_key: value}}``)."""
+    by_name = defaultdict(list)
+    for (name, labels), value in counters.items():
+        by_name[name].append((labels, value))
+    for (name, labels), histogram in histograms.items():
+        by_name[name].append((labels, histogram))
+    for name, series in (gauges or {}).items():
+        if series:
+            by_name[name].extend(series.items())
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        if name not in by_name:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+            if kind != 'histogram':
+                lines.append(f'{name}{_format_labels(labels)} {value:g}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", f"{bound:g}")])} {cumulative}')
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {count}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {total:g}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(
+    getattr(settings, 'METRICS_DIR', Path(settings.BASE_DIR) / 'var' / 'metrics'),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0),
+)
+# A forked worker must not report its parent's numbers as its own
+os.register_at_fork(after_in_child=registry.reset)
+atexit.register(registry.flush)
+
+
+class QueryCounter:
+    """``execute_wrapper`` that counts statements and time for one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def record_request(view, method, status, seconds, size, queries):
+    """Record one finished request."""
+    labels = {'view': view, 'method': method}
+    registry.inc('greentrace_http_requests_total', {**labels, 'status': str(status)})
+    registry.observe('greentrace_http_request_duration_seconds', labels, seconds)
+    if size is not None:
+        registry.observe('greentrace_http_response_size_bytes', {'view': view}, size)
+    registry.observe('greentrace_db_queries_per_request', {'view': view}, queries.count)
+    if queries.count:
+        registry.inc('greentrace_db_queries_total', {'view': view}, queries.count)
+        registry.inc('greentrace_db_query_seconds_total', {'view': view}, queries.seconds)
+    registry.maybe_flush()
+
+
+def export():
+    """All workers' metrics, plus current replica lag, as Prometheus text."""
+    from greentrace.db.routers import lag_monitor
+
+    counters, histograms = registry.collect()
+    lags = {
+        (('replica', alias),): lag for alias, lag in lag_monitor.lags().items() if lag is not None
+    }
+    return render(counters, histograms, {'greentrace_db_replica_lag_seconds': lags})
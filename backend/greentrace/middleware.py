@@ -2,9 +2,17 @@
 Custom middleware for GreenTrace admin security
 """
 import logging
+import math
+import random
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.http import HttpResponseForbidden
 from django.conf import settings
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+from whitenoise.middleware import WhiteNoiseMiddleware
+from greentrace.responses import JsonResponse
 
 logger = logging.getLogger(__name__)
 
@@ -48,3 +56,225 @@ class AdminIPRestrictionMiddleware(MiddlewareMixin):
         else:
             ip = request.META.get('REMOTE_ADDR')
         return ip
+
+
+class PermissionContextMiddleware(MiddlewareMixin):
+    """
+    Attach ``request.permissions``, the caller's resolved ``PermissionContext``.
+
+    Resolution is lazy and happens at most once per request.
+    """
+    
+    def process_request(self, request):
+        from users.permissions import get_permission_context
+        
+        request.permissions = SimpleLazyObject(lambda: get_permission_context(request))
+        return None
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also sit in an async middleware chain.
+
+    Plain ``WhiteNoiseMiddleware`` is sync-only, which makes Django run every
+    ASGI request through a thread. Here static files are served from a thread
+    and everything else is awaited directly.
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+    
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class RateLimitMiddleware(MiddlewareMixin):
+    """
+    Enforce ``RATE_LIMITS`` with token buckets shared by all workers.
+
+    Adds ``X-RateLimit-Limit``, ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset``
+    to responses and answers 429 with ``Retry-After`` when a bucket is empty.
+    """
+    
+    def process_request(self, request):
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            return None
+        if request.path_info.startswith(tuple(getattr(settings, 'RATE_LIMIT_EXEMPT_PATHS', ()))):
+            return None
+        from greentrace.ratelimit import check
+        
+        decision = check(request)
+        if decision is None:
+            return None
+        request._rate_limit = decision
+        if decision.allowed:
+            return None
+        from greentrace.metrics import registry
+        
+        registry.inc('greentrace_rate_limited_total', {'method': request.method})
+        response = JsonResponse({'error': 'Rate limit exceeded'}, status=429)
+        response['Retry-After'] = str(max(1, math.ceil(decision.retry_after)))
+        return response
+    
+    def process_response(self, request, response):
+        decision = getattr(request, '_rate_limit', None)
+        if decision is not None:
+            response['X-RateLimit-Limit'] = str(decision.limit)
+            response['X-RateLimit-Remaining'] = str(decision.remaining)
+            response['X-RateLimit-Reset'] = str(math.ceil(decision.reset))
+        return response
+
+
+class PrimaryPinMiddleware(MiddlewareMixin):
+    """
+    Read-your-writes for replica routing (see ``greentrace.db.routers``).
+
+    A request that writes pins its client to the primary with a short-lived
+    cookie; requests carrying a live cookie read from the primary too.
+    """
+    
+    def process_request(self, request):
+        from greentrace.db.routers import PIN_COOKIE, begin_request
+        
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0.0
+        request.primary_pin = begin_request(pinned_until)
+        return None
+    
+    def process_response(self, request, response):
+        from greentrace.db.routers import PIN_COOKIE, end_request
+        
+        end_request()
+        state = getattr(request, 'primary_pin', None)
+        if state is not None and state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, f'{state.pinned_until:.3f}',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Record latency, status, response size and SQL usage per URL name.
+
+    Metrics go to ``greentrace.metrics`` and are served at ``/metrics/``.
+    """
+    
+    def process_request(self, request):
+        from greentrace.metrics import QueryCounter
+        
+        request._metrics_started = time.perf_counter()
+        request._metrics_queries = QueryCounter()
+        for connection in connections.all():
+            connection.execute_wrappers.append(request._metrics_queries)
+        return None
+    
+    def process_response(self, request, response):
+        from greentrace.metrics import record_request
+        
+        queries = getattr(request, '_metrics_queries', None)
+        if queries is None:
+            return response
+        for connection in connections.all():
+            if queries in connection.execute_wrappers:
+                connection.execute_wrappers.remove(queries)
+        
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else '<unresolved>'
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+        record_request(
+            view, request.method, response.status_code,
+            time.perf_counter() - request._metrics_started, size, queries,
+        )
+        return response
+
+
+class QueryInspectorMiddleware(MiddlewareMixin):
+    """
+    Flag likely N+1 queries and ``QUERY_BUDGETS`` overruns per request.
+
+    ``QUERY_INSPECTOR`` selects 'warn', 'raise' or 'off' (see ``greentrace.querybudget``).
+    """
+    
+    def process_request(self, request):
+        from greentrace.querybudget import QueryInspector
+        
+        if getattr(settings, 'QUERY_INSPECTOR', 'off') == 'off':
+            return None
+        request._query_inspector = QueryInspector()
+        request._query_inspector.install()
+        return None
+    
+    def process_response(self, request, response):
+        from greentrace.querybudget import check
+        
+        inspector = getattr(request, '_query_inspector', None)
+        if inspector is None:
+            return response
+        inspector.uninstall()
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else '<unresolved>'
+        check(inspector, view, settings.QUERY_INSPECTOR)
+        return response
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """
+    Profile a request when staff ask for it (``X-Profile: 1`` or ``?__profile=1``)
+    or, at ``PROFILE_SAMPLE_RATE``, at random. See ``greentrace.profiling``.
+    """
+    
+    def _trigger(self, request):
+        asked = request.headers.get('X-Profile') == '1' or request.GET.get('__profile') == '1'
+        if asked and request.permissions.is_staff:
+            return 'requested'
+        rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0.0)
+        if rate and random.random() < rate:
+            return 'sampled'
+        return None
+    
+    def process_request(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return None
+        from greentrace.profiling import RequestProfile
+        
+        request._profile = RequestProfile(trigger)
+        request._profile.start()
+        return None
+    
+    def process_response(self, request, response):
+        profile = getattr(request, '_profile', None)
+        if profile is None:
+            return response
+        profile.stop()
+        try:
+            profile.save(request, response)
+        except OSError as exc:
+            logger.warning(f"Could not save profile {profile.id}: {exc}")
+            return response
+        if profile.trigger == 'requested':
+            response['X-Profile-Id'] = profile.id
+        return response
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicationHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stamped_at', models.FloatField(help_text='Unix time of the last stamp on the primary')),
+            ],
+            options={
+                'verbose_name': 'Replication Heartbeat',
+                'verbose_name_plural': 'Replication Heartbeats',
+            },
+        ),
+    ]
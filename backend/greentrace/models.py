@@ -0,0 +1,17 @@
+"""
+Infrastructure models for GreenTrace.
+"""
+from django.db import models
+
+
+class ReplicationHeartbeat(models.Model):
+    """
+    Single row stamped on the primary by ``run_replication_heartbeat``.
+
+    Reading it back from a replica shows how far behind that replica is.
+    """
+    stamped_at = models.FloatField(help_text='Unix time of the last stamp on the primary')
+
+    class Meta:
+        verbose_name = 'Replication Heartbeat'
+        verbose_name_plural = 'Replication Heartbeats'
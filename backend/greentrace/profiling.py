@@ -0,0 +1,170 @@
+"""
+On-demand request profiling for GreenTrace.
+
+A profiled request is sampled by a background thread that reads the
+request thread's stack every ``PROFILE_INTERVAL_MS`` (no tracing hooks, so
+the request runs at nearly full speed), while a DB execute wrapper records
+each statement and its duration. The result is written to ``PROFILE_DIR``
+as ``<id>.folded`` (collapsed stacks, the input format of flamegraph.pl and
+speedscope) and ``<id>.json`` (request details and the query list).
+
+Staff trigger a profile with an ``X-Profile: 1`` header or a ``__profile=1``
+query parameter; ``PROFILE_SAMPLE_RATE`` profiles that fraction of all
+traffic. Under ASGI only the request's sync thread is sampled.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+MAX_QUERIES = 2000
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILE_DIR', Path(settings.BASE_DIR) / 'logs' / 'profiles'))
+
+
+def _frame_label(code, base_dir):
+    filename = code.co_filename
+    if filename.startswith(base_dir):
+        filename = filename[len(base_dir):].lstrip(os.sep)
+    else:
+        filename = os.path.basename(filename)
+    return f'{filename}:{code.co_name}:{code.co_firstlineno}'
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval from a background thread."""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._base_dir = str(settings.BASE_DIR)
+
+    def _run(self):
+        labels = {}
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code, self._base_dir)
+                stack.append(label)
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class QueryCapture:
+    """``execute_wrapper`` recording each statement with its duration."""
+
+    def __init__(self):
+        self.queries = []
+        self.dropped = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({
+                    'sql': sql,
+                    'ms': round((time.perf_counter() - started) * 1000, 3),
+                    'many': many,
+                })
+            else:
+                self.dropped += 1
+
+
+class RequestProfile:
+    """Profiler plus SQL capture for the request running on the current thread."""
+
+    def __init__(self, trigger):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.trigger = trigger
+        self.profiler = SamplingProfiler(
+            threading.get_ident(), interval=getattr(settings, 'PROFILE_INTERVAL_MS', 5) / 1000
+        )
+        self.queries = QueryCapture()
+
+    def start(self):
+        self._started = time.perf_counter()
+        for connection in connections.all():
+            connection.execute_wrappers.append(self.queries)
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        for connection in connections.all():
+            if self.queries in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self.queries)
+
+    def save(self, request, response):
+        """Write ``<id>.folded`` and ``<id>.json``, then prune old profiles."""
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        match = getattr(request, 'resolver_match', None)
+        (directory / f'{self.id}.folded').write_text(self.profiler.collapsed())
+        (directory / f'{self.id}.json').write_text(json.dumps({
+            'id': self.id,
+            'trigger': self.trigger,
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else '',
+            'status': response.status_code,
+            'duration_ms': self.duration_ms,
+            'samples': self.profiler.samples,
+            'interval_ms': self.profiler.interval * 1000,
+            'sql_count': len(self.queries.queries) + self.queries.dropped,
+            'sql_ms': round(sum(query['ms'] for query in self.queries.queries), 3),
+            'queries': self.queries.queries,
+            'queries_dropped': self.queries.dropped,
+        }, indent=1))
+        prune_profiles(getattr(settings, 'PROFILE_KEEP', 200))
+
+
+def prune_profiles(keep):
+    reports = sorted(profile_dir().glob('*.json'))
+    for report in reports[:max(0, len(reports) - keep)]:
+        report.unlink(missing_ok=True)
+        report.with_suffix('.folded').unlink(missing_ok=True)
+
+
+def recent_profiles(limit=100):
+    """Summaries of the newest profiles, newest first."""
+    profiles = []
+    for report in sorted(profile_dir().glob('*.json'), reverse=True)[:limit]:
+        try:
+            data = json.loads(report.read_text())
+        except (OSError, ValueError):
+            continue
+        data.pop('queries', None)
+        profiles.append(data)
+    return profiles
@@ -0,0 +1,88 @@
+"""
+N+1 detection and per-endpoint query budgets.
+
+``QueryInspector`` is an ``execute_wrapper`` that groups a request's
+statements by fingerprint (``greentrace.db.slowlog.normalize_sql``) and
+records where each one was issued. The same SELECT shape running
+``N_PLUS_ONE_THRESHOLD`` or more times in one request is reported as a
+likely N+1; more statements than the URL name's entry in ``QUERY_BUDGETS``
+is a budget overrun.
+
+``QueryInspectorMiddleware`` checks every request according to
+``QUERY_INSPECTOR``: ``'warn'`` logs, ``'raise'`` raises ``QueryProblem``
+and ``'off'`` does nothing. The test runner in ``greentrace.testing``
+switches to ``'raise'``, so regressions fail the test suite.
+"""
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+
+from greentrace.db.slowlog import call_site, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProblem(AssertionError):
+    """A request ran a likely N+1 or more statements than its budget."""
+
+
+class QueryInspector:
+    """``execute_wrapper`` grouping statements by fingerprint with their call sites."""
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+        self.call_sites = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        shape = normalize_sql(sql)
+        self.shapes[shape] += 1
+        self.call_sites.setdefault(shape, Counter())[call_site()] += 1
+        return execute(sql, params, many, context)
+
+    def install(self):
+        for connection in connections.all():
+            connection.execute_wrappers.append(self)
+
+    def uninstall(self):
+        for connection in connections.all():
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+    def repeated(self, threshold=None):
+        """``[(sql, count, call_sites)]`` for SELECT shapes run at least ``threshold`` times."""
+        if threshold is None:
+            threshold = getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5)
+        return [
+            (shape, count, dict(self.call_sites[shape].most_common(3)))
+            for shape, count in self.shapes.most_common()
+            if count >= threshold and shape.lower().startswith('select')
+        ]
+
+    def problems(self, budget=None, threshold=None):
+        """Human-readable descriptions of every N+1 and budget overrun."""
+        problems = [
+            f'{count}x same query (likely N+1) from {", ".join(sites)}: {shape[:300]}'
+            for shape, count, sites in self.repeated(threshold)
+        ]
+        if budget is not None and self.count > budget:
+            problems.append(f'{self.count} queries, budget is {budget}')
+        return problems
+
+
+def budget_for(view_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+def check(inspector, view_name, mode):
+    """Log or raise (per ``mode``) the problems ``inspector`` found for ``view_name``."""
+    problems = inspector.problems(budget_for(view_name))
+    if not problems:
+        return
+    message = f"Query problems in {view_name}:\n  " + '\n  '.join(problems)
+    if mode == 'raise':
+        raise QueryProblem(message)
+    logger.warning(message)
@@ -0,0 +1,312 @@
+"""
+Token-bucket rate limiting shared by every worker.
+
+Each caller has a bucket per limit that refills at ``limit / period``
+tokens per second up to ``limit``; a request takes one token or is refused
+with 429. Limits come from ``RATE_LIMITS`` by the caller's role (``staff``
+for staff users, ``anonymous`` without a wallet token or session), and
+unsafe methods also draw from a ``RATE_LIMIT_WRITES`` bucket. A request
+takes from all of its buckets or, if any is empty, from none.
+
+Buckets live in ``SharedMemoryBuckets``, a fixed-size table in a memory-
+mapped file that all workers on the host map. A key hashes to a group of
+``WAYS`` slots; each update is a few struct reads and writes under the
+striped locks of its buckets (a thread lock plus an ``fcntl`` byte-range
+lock per stripe, taken in stripe order), so it is O(1) and atomic across
+processes. When the table is full the least recently used slot in the
+group is reused, which only ever gives that caller a fresh bucket. With
+``RATE_LIMIT_STORE = 'redis'`` the same update runs as a Lua script in the
+shared Redis cache, for limits across hosts.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are only atomic within the process
+    fcntl = None
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+SLOT = struct.Struct('<Qdd')  # key hash (0 = empty), tokens, last update (epoch seconds)
+WAYS = 8
+STRIPES = 1024
+
+
+class Limit(NamedTuple):
+    limit: int
+    period: int
+
+    @property
+    def rate(self):
+        return self.limit / self.period
+
+
+def parse_limit(spec):
+    """``'100/h'`` -> ``Limit(100, 3600)``; a bare period letter means one of it."""
+    count, _, period = spec.partition('/')
+    multiplier = period[:-1] or '1'
+    return Limit(int(count), int(multiplier) * PERIODS[period[-1]])
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float  # epoch seconds when the bucket is full again
+    retry_after: float  # seconds until one token is available (0 if allowed)
+
+
+def _decision(allowed, tokens, limit, now):
+    return Decision(
+        allowed,
+        limit.limit,
+        max(0, math.floor(tokens)),
+        now + (limit.limit - tokens) / limit.rate,
+        0.0 if allowed else (1 - tokens) / limit.rate,
+    )
+
+
+def _refill(tokens, updated, limit, now):
+    return min(limit.limit, tokens + max(0.0, now - updated) * limit.rate)
+
+
+class SharedMemoryBuckets:
+    """Bucket table in a memory-mapped file shared by the processes on this host."""
+
+    def __init__(self, path, slots=65536):
+        self.path = Path(path)
+        self.groups = max(1, slots // WAYS)
+        self.size = self.groups * WAYS * SLOT.size
+        self._pid = None
+        self._open_lock = threading.Lock()
+
+    def _open(self):
+        # Opened lazily in each worker: locks and the mapping must not come from a preloading parent
+        with self._open_lock:
+            if self._pid == os.getpid():
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < self.size:
+                os.ftruncate(fd, self.size)
+            self._fd = fd
+            self._map = mmap.mmap(fd, self.size)
+            self._locks = [threading.Lock() for _ in range(STRIPES)]
+            self._pid = os.getpid()
+
+    def take(self, key, limit, now=None, cost=1):
+        return self.take_all([(key, limit)], now, cost)[0]
+
+    def take_all(self, buckets, now=None, cost=1):
+        """
+        Take ``cost`` from every ``(key, limit)`` bucket, or from none if any is short.
+
+        Returns a ``Decision`` per bucket; each says whether that bucket alone had enough.
+        """
+        if self._pid != os.getpid():
+            self._open()
+        now = time.time() if now is None else now
+        located = []
+        for key, limit in buckets:
+            digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+            located.append((digest, digest % self.groups, limit))
+        # Always locked in ascending order, so two requests can't each hold a stripe the other wants
+        stripes = sorted({group % STRIPES for _, group, _ in located})
+
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            if fcntl is not None:
+                for stripe in stripes:
+                    fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                found = []
+                for digest, group, limit in located:
+                    slot, tokens, updated = self._find(group * WAYS * SLOT.size, digest)
+                    found.append((slot, limit.limit if slot is None else _refill(tokens, updated, limit, now)))
+                allowed = all(tokens >= cost for _, tokens in found)
+                decisions = []
+                for (digest, group, limit), (slot, tokens) in zip(located, found):
+                    enough = tokens >= cost
+                    if allowed:
+                        tokens -= cost
+                    offset = slot if slot is not None else self._victim(group * WAYS * SLOT.size)
+                    SLOT.pack_into(self._map, offset, digest, tokens, now)
+                    decisions.append(_decision(enough, tokens, limit, now))
+            finally:
+                if fcntl is not None:
+                    for stripe in reversed(stripes):
+                        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+        return decisions
+
+    def _find(self, base, digest):
+        for way in range(WAYS):
+            offset = base + way * SLOT.size
+            stored, tokens, updated = SLOT.unpack_from(self._map, offset)
+            if stored == digest:
+                return offset, tokens, updated
+        return None, 0.0, 0.0
+
+    def _victim(self, base):
+        """An empty slot in the group, else the least recently updated one."""
+        oldest, oldest_offset = None, base
+        for way in range(WAYS):
+            offset = base + way * SLOT.size
+            stored, _, updated = SLOT.unpack_from(self._map, offset)
+            if stored == 0:
+                return offset
+            if oldest is None or updated < oldest:
+                oldest, oldest_offset = updated, offset
+        return oldest_offset
+
+
+# KEYS buckets; ARGV now, cost, then capacity and rate per bucket. Returns {allowed, tokens per bucket};
+# tokens are taken from every bucket, and only if each had ``cost``.
+REDIS_SCRIPT = """
+local now, cost = tonumber(ARGV[1]), tonumber(ARGV[2])
+local tokens, allowed = {}, 1
+for i, key in ipairs(KEYS) do
+    local capacity, rate = tonumber(ARGV[2 * i + 1]), tonumber(ARGV[2 * i + 2])
+    local bucket = redis.call('HMGET', key, 't', 'u')
+    local updated = tonumber(bucket[2]) or now
+    tokens[i] = math.min(capacity, (tonumber(bucket[1]) or capacity) + math.max(0, now - updated) * rate)
+    if tokens[i] < cost then
+        allowed = 0
+    end
+end
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local capacity, rate = tonumber(ARGV[2 * i + 1]), tonumber(ARGV[2 * i + 2])
+    if allowed == 1 then
+        tokens[i] = tokens[i] - cost
+    end
+    redis.call('HSET', key, 't', tostring(tokens[i]), 'u', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    result[i + 1] = tostring(tokens[i])
+end
+return result
+"""
+
+
+class RedisBuckets:
+    """Buckets as Redis hashes in the ``shared`` cache, updated by one Lua script call."""
+
+    def __init__(self, alias='shared'):
+        self.alias = alias
+        self._script = None
+
+    def take(self, key, limit, now=None, cost=1):
+        return self.take_all([(key, limit)], now, cost)[0]
+
+    def take_all(self, buckets, now=None, cost=1):
+        """Same contract as ``SharedMemoryBuckets.take_all``, in one script call."""
+        from django.core.cache import caches
+
+        now = time.time() if now is None else now
+        cache = caches[self.alias]
+        keys = [cache.make_key(f'ratelimit:{key}') for key, _ in buckets]
+        client = cache._cache.get_client(keys[0], write=True)
+        if self._script is None:
+            self._script = client.register_script(REDIS_SCRIPT)
+        args = [now, cost]
+        for _, limit in buckets:
+            args += [limit.limit, limit.rate]
+        allowed, *left = self._script(keys=keys, args=args, client=client)
+        # When nothing was taken, each bucket still holds what it had before the request
+        return [
+            _decision(bool(allowed) or float(tokens) >= cost, float(tokens), limit, now)
+            for tokens, (_, limit) in zip(left, buckets)
+        ]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if getattr(settings, 'RATE_LIMIT_STORE', 'shm') == 'redis':
+                    _store = RedisBuckets()
+                else:
+                    _store = SharedMemoryBuckets(settings.RATE_LIMIT_SHM_PATH, settings.RATE_LIMIT_SLOTS)
+    return _store
+
+
+_limits = {}
+
+
+def get_limit(spec):
+    limit = _limits.get(spec)
+    if limit is None:
+        limit = _limits[spec] = parse_limit(spec)
+    return limit
+
+
+def client_ip(request):
+    """Client address, taking ``RATE_LIMIT_PROXY_COUNT`` trusted proxies' ``X-Forwarded-For`` into account."""
+    proxies = getattr(settings, 'RATE_LIMIT_PROXY_COUNT', 0)
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def identify(request):
+    """``(bucket identity, tier)``: the wallet or user for authenticated callers, else the IP."""
+    permissions = request.permissions
+    if permissions.user_id is None:
+        return f'ip:{client_ip(request)}', 'anonymous'
+    tier = 'staff' if permissions.is_staff else permissions.role
+    claims = getattr(request, 'wallet_claims', None)
+    if claims is None:
+        from users.authentication import get_token_claims
+        from users.tokens import InvalidWalletToken
+
+        try:
+            claims = get_token_claims(request)
+        except InvalidWalletToken:
+            claims = None
+    if claims is not None:
+        return f"wallet:{claims['wal']}", tier
+    return f'user:{permissions.user_id}', tier
+
+
+def check(request):
+    """
+    Take a token from every bucket that applies to ``request``, or from none if any is empty.
+
+    Returns the ``Decision`` of the tier's ``requests`` bucket (what the
+    ``X-RateLimit-*`` headers report, whichever bucket refused), refused
+    with the longest wait of the empty buckets; ``None`` if no limit applies.
+    """
+    identity, tier = identify(request)
+    limits = getattr(settings, 'RATE_LIMITS', {})
+    spec = limits.get(tier) or limits.get('default')
+    specs = [('requests', spec)] if spec else []
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and getattr(settings, 'RATE_LIMIT_WRITES', None):
+        specs.append(('writes', settings.RATE_LIMIT_WRITES))
+    if not specs:
+        return None
+
+    decisions = get_store().take_all([(f'{scope}:{spec}:{identity}', get_limit(spec)) for scope, spec in specs])
+    refused = [decision for decision in decisions if not decision.allowed]
+    if not refused:
+        return decisions[0]
+    return decisions[0]._replace(allowed=False, retry_after=max(decision.retry_after for decision in refused))
@@ -0,0 +1,116 @@
+"""
+Worker readiness for GreenTrace.
+
+A process is ready once its database connection works with no migrations
+pending, the cache answers, and the hot in-process caches (URL resolver,
+wallet identities) are primed. The gunicorn launcher runs ``warm_up`` in
+each worker before it accepts connections; ``/health/ready/`` reports the
+result for load balancers.
+"""
+import logging
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+class NotReady(Exception):
+    """Raised when a readiness check fails."""
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    executor = MigrationExecutor(connection)
+    pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if pending:
+        raise NotReady(f'{len(pending)} migration(s) not applied')
+    return 'ok'
+
+
+def check_cache():
+    key, token = 'readiness:probe', secrets.token_hex(8)
+    cache.set(key, token, 30)
+    if cache.get(key) != token:
+        raise NotReady('Cache did not return the probe value')
+    return 'ok'
+
+
+def warm_url_resolver():
+    return len(get_resolver().reverse_dict)
+
+
+def warm_wallets():
+    from users.wallets import warm_wallet_cache
+
+    return warm_wallet_cache(getattr(settings, 'READINESS_WARM_WALLETS', 1000))
+
+
+CHECKS = (
+    ('database', check_database),
+    ('cache', check_cache),
+    ('urls', warm_url_resolver),
+    ('wallets', warm_wallets),
+)
+
+
+class Readiness:
+    """Readiness state of the current process."""
+
+    def __init__(self, checks=CHECKS):
+        self.checks = checks
+        self.report = {}
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def warm_up(self):
+        """Run every check in order; raises ``NotReady`` on the first failure."""
+        with self._lock:
+            report = {}
+            for name, check in self.checks:
+                started = time.perf_counter()
+                try:
+                    result = check()
+                except Exception as exc:
+                    report[name] = {'ok': False, 'error': str(exc)}
+                    self.report = report
+                    raise NotReady(f'{name}: {exc}') from exc
+                report[name] = {
+                    'ok': True,
+                    'result': result,
+                    'ms': round((time.perf_counter() - started) * 1000, 1),
+                }
+            self.report = report
+            self._ready.set()
+            return report
+
+    def wait(self, timeout, interval=1.0, heartbeat=None):
+        """Retry ``warm_up`` until it succeeds or ``timeout`` seconds pass."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if heartbeat:
+                heartbeat()
+            try:
+                return self.warm_up()
+            except NotReady as exc:
+                if time.monotonic() >= deadline:
+                    raise
+                logger.warning(f"Not ready yet ({exc}); retrying")
+                connection.close()
+                time.sleep(interval)
+
+    def reset(self):
+        self._ready.clear()
+
+
+readiness = Readiness()
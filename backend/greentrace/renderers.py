@@ -0,0 +1,58 @@
+"""
+DRF renderer sharing the API's JSON encoder (see ``greentrace/responses.py``).
+"""
+import datetime
+import math
+import uuid
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .responses import dumps
+
+# Values of these types are never NaN or infinite
+FINITE_TYPES = frozenset({str, int, bool, type(None), datetime.datetime, datetime.date, datetime.time, uuid.UUID})
+
+# U+2028 and U+2029 in UTF-8: valid in JSON strings, line terminators in JavaScript
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def has_non_finite(value):
+    """Whether ``value`` holds a NaN or infinite float or ``Decimal``."""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, Decimal):
+        return not value.is_finite()
+    if isinstance(value, dict):
+        values = value.values()
+    elif isinstance(value, (list, tuple)):
+        values = value
+    else:
+        return False
+    # Classify a container's values in one pass; only floats, decimals and nested containers are visited
+    if FINITE_TYPES.issuperset(map(type, values)):
+        return False
+    return any(has_non_finite(item) for item in values if type(item) not in FINITE_TYPES)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` through the configured encoder; indented output still uses the stdlib.
+
+    Output matches DRF's: with ``STRICT_JSON`` NaN and infinities raise
+    ``ValueError`` (orjson would write them as ``null``, the stdlib as bare
+    ``NaN``), and U+2028/U+2029 are escaped.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) or (self.strict and has_non_finite(data)):
+            return super().render(data, accepted_media_type, renderer_context)
+        content = dumps(data, JSONEncoder)
+        # Both separators start with this byte, which ASCII output never contains
+        if b'\xe2' in content:
+            for raw, escaped in LINE_SEPARATORS:
+                content = content.replace(raw, escaped)
+        return content
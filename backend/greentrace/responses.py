@@ -0,0 +1,109 @@
+"""
+JSON responses for every API path, with a pluggable encoder.
+
+``JsonResponse`` is a drop-in for Django's: same arguments, same
+``DjangoJSONEncoder`` types, compact output. It encodes with orjson when
+it is installed (``JSON_ENCODER = 'auto'``) and with the stdlib ``json``
+module otherwise or when ``JSON_ENCODER = 'stdlib'``. orjson formats
+datetimes natively, which is most of its gain on product lists; they keep
+microseconds where the Django encoder cuts to milliseconds (both ISO 8601,
+``Z`` for UTC). Payloads orjson cannot represent (integers beyond 64 bits,
+such as wei amounts) are re-encoded with the stdlib.
+
+Responses whose body never changes are encoded once at import with
+``StaticJson`` and served from those bytes.
+"""
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # stdlib encoding only
+    orjson = None
+
+JSON_CONTENT_TYPE = 'application/json'
+
+_defaults = {}
+
+
+def _default_for(encoder):
+    """The ``default`` hook of one shared instance of ``encoder``."""
+    default = _defaults.get(encoder)
+    if default is None:
+        default = _defaults[encoder] = encoder().default
+    return default
+
+
+def stdlib_dumps(data, encoder=DjangoJSONEncoder):
+    return json.dumps(data, cls=encoder, separators=(',', ':')).encode()
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def orjson_dumps(data, encoder=DjangoJSONEncoder):
+        try:
+            return orjson.dumps(data, default=_default_for(encoder), option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError as exc:
+            if 'Integer exceeds 64-bit range' not in str(exc):
+                raise
+            return stdlib_dumps(data, encoder)
+else:
+    orjson_dumps = None
+
+ENCODERS = {'orjson': orjson_dumps, 'stdlib': stdlib_dumps}
+
+_dumps = None
+
+
+def get_dumps():
+    """The encoding function selected by ``JSON_ENCODER`` (``'auto'``, ``'orjson'`` or ``'stdlib'``)."""
+    global _dumps
+    if _dumps is None:
+        name = getattr(settings, 'JSON_ENCODER', 'auto')
+        if name == 'auto':
+            name = 'orjson' if orjson is not None else 'stdlib'
+        if name not in ENCODERS:
+            raise ValueError(f'Unknown JSON_ENCODER {name!r}; expected auto, orjson or stdlib')
+        if ENCODERS[name] is None:
+            raise ValueError(f'JSON_ENCODER is {name!r} but orjson is not installed')
+        _dumps = ENCODERS[name]
+    return _dumps
+
+
+def dumps(data, encoder=DjangoJSONEncoder):
+    """``data`` as compact UTF-8 JSON bytes."""
+    return get_dumps()(data, encoder)
+
+
+class JsonResponse(HttpResponse):
+    """
+    ``django.http.JsonResponse`` using the configured encoder.
+
+    ``json_dumps_params`` (indent, sort_keys, ...) are stdlib options, so
+    passing them encodes that response with the stdlib.
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', JSON_CONTENT_TYPE)
+        if json_dumps_params:
+            content = json.dumps(data, cls=encoder, **json_dumps_params)
+        else:
+            content = dumps(data, encoder)
+        super().__init__(content=content, **kwargs)
+
+
+class StaticJson:
+    """A payload encoded once; ``response()`` serves it without encoding again."""
+
+    def __init__(self, data, encoder=DjangoJSONEncoder):
+        self.content = stdlib_dumps(data, encoder)
+
+    def response(self, **kwargs):
+        kwargs.setdefault('content_type', JSON_CONTENT_TYPE)
+        return HttpResponse(self.content, **kwargs)
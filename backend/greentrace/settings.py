@@ -41,17 +41,27 @@ INSTALLED_APPS = [
     'products',
     'carbon_credits',
     'privacy',
+    'blockchain',
+    'webhooks',
+    'analytics',
+    'greentrace',
 ]
 
 MIDDLEWARE = [
+    'greentrace.middleware.MetricsMiddleware',  # First, so it times the whole stack
+    'greentrace.middleware.QueryInspectorMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'greentrace.middleware.StaticFilesMiddleware',  # WhiteNoise, async-capable
     'greentrace.middleware.AdminIPRestrictionMiddleware',  # Custom admin security
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'greentrace.middleware.PermissionContextMiddleware',
+    'greentrace.middleware.RateLimitMiddleware',  # Needs the caller's permission context
+    'greentrace.middleware.PrimaryPinMiddleware',
+    'greentrace.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,15 +85,50 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'greentrace.wsgi.application'
+ASGI_APPLICATION = 'greentrace.asgi.application'
 
-# Database
+# Route the JSON API to its async views (greentrace/asgi.py turns this on)
+ASYNC_API_VIEWS = config('ASYNC_API_VIEWS', default=False, cast=bool)
+
+# Database (SQLite tuned for concurrent workers, see greentrace/db/sqlite3/base.py)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'greentrace.db.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Persistent connections; Django can't reuse them under ASGI, so they are off there
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0 if ASYNC_API_VIEWS else 600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+            'cache_size_kb': config('SQLITE_CACHE_SIZE_KB', default=64 * 1024, cast=int),
+            'busy_timeout_ms': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+            # Queue write transactions from all workers on a lock file
+            'serialize_writes': config('SQLITE_SERIALIZE_WRITES', default=False, cast=bool),
+        },
     }
 }
 
+# Read replicas as comma-separated database files (aliases replica1, replica2, ...)
+DATABASE_REPLICA_PATHS = config('DATABASE_REPLICA_PATHS', default='', cast=lambda v: [p.strip() for p in v.split(',') if p.strip()])
+DATABASE_REPLICAS = [f'replica{index}' for index in range(1, len(DATABASE_REPLICA_PATHS) + 1)]
+DATABASES.update({
+    alias: {**DATABASES['default'], 'NAME': path, 'TEST': {'MIRROR': 'default'}}
+    for alias, path in zip(DATABASE_REPLICAS, DATABASE_REPLICA_PATHS)
+})
+
+DATABASE_ROUTERS = ['greentrace.db.routers.PrimaryReplicaRouter']
+REPLICATED_MODELS = [
+    'products.Product',
+    'products.ProductDetail',
+    'products.ProductAuditLog',
+    'carbon_credits.CarbonCredit',
+    'privacy.DataAccessLog',
+]
+# After a write the client reads from the primary for this long
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+# Replicas whose heartbeat (run_replication_heartbeat) is older than this are skipped; 0 disables the check
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=30, cast=float)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -134,10 +179,187 @@ ADMIN_ALLOWED_IPS = config('ADMIN_ALLOWED_IPS', default='', cast=lambda v: [ip.s
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.WalletTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'greentrace.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'UNAUTHENTICATED_USER': None,
 }
+
+# API JSON encoder: 'auto' (orjson if installed, else stdlib), 'orjson' or 'stdlib'
+JSON_ENCODER = config('JSON_ENCODER', default='auto')
+
+# Caches: per-process L1 in front of a host-wide L2 ('shared'), see greentrace/cache.py.
+# L2 is a SQLite file unless REDIS_URL is set (needs the redis package).
+REDIS_URL = config('REDIS_URL', default='')
+CACHES = {
+    'default': {
+        'BACKEND': 'greentrace.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': config('CACHE_L1_MAX_ENTRIES', default=5000, cast=int),
+            'L1_TIMEOUT': config('CACHE_L1_TIMEOUT', default=30, cast=int),
+            'SYNC_INTERVAL': config('CACHE_SYNC_INTERVAL', default=0.5, cast=float),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'greentrace.cache.SQLiteCache',
+        'LOCATION': config('CACHE_SQLITE_PATH', default=str(BASE_DIR / 'var' / 'cache.sqlite3')),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': config('CACHE_SQLITE_MAX_ENTRIES', default=200000, cast=int)},
+    },
+}
+
+# Blockchain settings
+# 'sim://' runs against the in-process ProductRegistry/CarbonCredit simulator
+CHAIN_RPC_URL = config('CHAIN_RPC_URL', default='sim://')
+CHAIN_RPC_TIMEOUT = config('CHAIN_RPC_TIMEOUT', default=10, cast=int)
+CHAIN_SIMULATOR_ENDPOINT = config('CHAIN_SIMULATOR_ENDPOINT', default=DEBUG, cast=bool)
+CHAIN_SIMULATOR_LATENCY_MS = config('CHAIN_SIMULATOR_LATENCY_MS', default=0, cast=float)
+CHAIN_SIMULATOR_JITTER_MS = config('CHAIN_SIMULATOR_JITTER_MS', default=0, cast=float)
+CHAIN_SIMULATOR_FAILURE_RATE = config('CHAIN_SIMULATOR_FAILURE_RATE', default=0.0, cast=float)
+CHAIN_SENDER_ADDRESS = config('CHAIN_SENDER_ADDRESS', default='0x0000000000000000000000000000000000000000')
+
+# Transaction manager (run with 'manage.py run_transaction_manager')
+CHAIN_ANCHORING_ENABLED = config('CHAIN_ANCHORING_ENABLED', default=False, cast=bool)
+CHAIN_MAX_IN_FLIGHT = config('CHAIN_MAX_IN_FLIGHT', default=256, cast=int)
+CHAIN_STUCK_AFTER_SECONDS = config('CHAIN_STUCK_AFTER_SECONDS', default=60, cast=int)
+CHAIN_GAS_BUMP = config('CHAIN_GAS_BUMP', default=1.125, cast=float)
+CHAIN_MAX_GAS_PRICE = config('CHAIN_MAX_GAS_PRICE', default=0, cast=int)
+CHAIN_MAX_BROADCAST_ATTEMPTS = config('CHAIN_MAX_BROADCAST_ATTEMPTS', default=5, cast=int)
+
+# Cross-chain sync queue, drained by 'manage.py process_crosschain_sync' (per-network limits as "network:limit,...")
+CROSSCHAIN_SYNC_WORKERS = config('CROSSCHAIN_SYNC_WORKERS', default=4, cast=int)
+CROSSCHAIN_SYNC_LEASE = config('CROSSCHAIN_SYNC_LEASE', default=120, cast=int)
+# Failed attempts are retried after RETRY_DELAY seconds, doubling each time, up to MAX_ATTEMPTS
+CROSSCHAIN_SYNC_MAX_ATTEMPTS = config('CROSSCHAIN_SYNC_MAX_ATTEMPTS', default=8, cast=int)
+CROSSCHAIN_SYNC_RETRY_DELAY = config('CROSSCHAIN_SYNC_RETRY_DELAY', default=15, cast=int)
+CROSSCHAIN_NETWORK_CONCURRENCY = config(
+    'CROSSCHAIN_NETWORK_CONCURRENCY',
+    default='ethereum:2,polygon:4,bsc:4',
+    cast=lambda v: {k.strip(): int(n) for k, n in (item.split(':') for item in v.split(',') if ':' in item)}
+)
+
+# Wallet identity cache (per process; profile saves/deletes evict it in every worker
+# through the shared cache within the refresh interval)
+WALLET_CACHE_SIZE = config('WALLET_CACHE_SIZE', default=10000, cast=int)
+WALLET_CACHE_TTL = config('WALLET_CACHE_TTL', default=60, cast=int)
+WALLET_CACHE_REFRESH_INTERVAL = config('WALLET_CACHE_REFRESH_INTERVAL', default=1.0, cast=float)
+
+# Wallet sign-in tokens (signed with SECRET_KEY, validated without DB access)
+WALLET_TOKEN_TTL = config('WALLET_TOKEN_TTL', default=900, cast=int)
+WALLET_CHALLENGE_TTL = config('WALLET_CHALLENGE_TTL', default=300, cast=int)
+# Off only trusts a wallet_address in the request body, for local development
+WALLET_TOKEN_REQUIRED = config('WALLET_TOKEN_REQUIRED', default=True, cast=bool)
+PERMISSION_CONTEXT_TTL = config('PERMISSION_CONTEXT_TTL', default=300, cast=int)
+
+# Field encryption master keys as "id:base64key,..."; the first one wraps new data keys.
+# Unset falls back to a key derived from SECRET_KEY (development only).
+FIELD_ENCRYPTION_KEYS = config(
+    'FIELD_ENCRYPTION_KEYS',
+    default='',
+    cast=lambda v: dict(item.strip().split(':', 1) for item in v.split(',') if ':' in item)
+)
+FIELD_ENCRYPTION_KEY_TTL = config('FIELD_ENCRYPTION_KEY_TTL', default=300, cast=int)
+
+# Data access log: appended to per-process segment files, compacted into DataAccessLog
+DATA_ACCESS_LOG_DIR = config('DATA_ACCESS_LOG_DIR', default=str(BASE_DIR / 'var' / 'access-log'))
+DATA_ACCESS_LOG_SEGMENT_SIZE = config('DATA_ACCESS_LOG_SEGMENT_SIZE', default=8 * 1024 * 1024, cast=int)
+DATA_ACCESS_LOG_SEGMENT_SECONDS = config('DATA_ACCESS_LOG_SEGMENT_SECONDS', default=60, cast=int)
+
+# GDPR subject-access exports and erasure jobs, run by 'manage.py process_data_subject_requests'
+GDPR_EXPORT_DIR = config('GDPR_EXPORT_DIR', default=str(BASE_DIR / 'var' / 'gdpr-exports'))
+GDPR_WORKERS = config('GDPR_WORKERS', default=2, cast=int)
+GDPR_CHUNK_SIZE = config('GDPR_CHUNK_SIZE', default=1000, cast=int)
+# Seconds a worker holds a job without renewing; expired jobs are taken over
+GDPR_LEASE = config('GDPR_LEASE', default=300, cast=int)
+
+# Worker warm-up before accepting traffic (see greentrace/readiness.py and gunicorn.conf.py)
+READINESS_WARM_WALLETS = config('READINESS_WARM_WALLETS', default=1000, cast=int)
+
+# Per-view request metrics (Prometheus text at /metrics/), merged across workers via METRICS_DIR
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'var' / 'metrics'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)
+# Scrapers send "Authorization: Bearer <token>"; staff sessions work too
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Request profiling (staff: "X-Profile: 1" header or ?__profile=1); listed at /<admin>/profiles/
+PROFILE_DIR = config('PROFILE_DIR', default=str(BASE_DIR / 'logs' / 'profiles'))
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+PROFILE_INTERVAL_MS = config('PROFILE_INTERVAL_MS', default=5, cast=float)
+PROFILE_KEEP = config('PROFILE_KEEP', default=200, cast=int)
+
+# Slow-query log: statements slower than this are logged with their plan; 0 disables.
+# Aggregated per fingerprint in SLOW_QUERY_DIR, reported by 'manage.py slow_queries'.
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=100, cast=float)
+SLOW_QUERY_DIR = config('SLOW_QUERY_DIR', default=str(BASE_DIR / 'var' / 'slow-queries'))
+SLOW_QUERY_FLUSH_INTERVAL = config('SLOW_QUERY_FLUSH_INTERVAL', default=10.0, cast=float)
+
+# Rate limits per role as "count/period" (s, m, h, d), token buckets shared by all workers.
+# Callers are keyed by wallet token, session user or (anonymous) client IP; 'staff' covers staff users.
+RATE_LIMIT_ENABLED = config('RATE_LIMIT_ENABLED', default=True, cast=bool)
+RATE_LIMITS = {
+    'anonymous': config('RATE_LIMIT_ANONYMOUS', default='100/h'),
+    'default': config('RATE_LIMIT_AUTHENTICATED', default='1000/h'),
+    'admin': config('RATE_LIMIT_ADMIN', default='5000/h'),
+    'staff': config('RATE_LIMIT_STAFF', default='5000/h'),
+}
+# Extra bucket for POST/PUT/PATCH/DELETE, protecting the SQLite writer
+RATE_LIMIT_WRITES = config('RATE_LIMIT_WRITES', default='60/m')
+RATE_LIMIT_EXEMPT_PATHS = ('/health/', '/metrics/', '/static/', '/favicon.ico')
+# Number of proxies in front of the app that append to X-Forwarded-For (Render: 1)
+RATE_LIMIT_PROXY_COUNT = config('RATE_LIMIT_PROXY_COUNT', default=0, cast=int)
+# 'shm' (memory-mapped table shared on this host) or 'redis' (the shared cache, across hosts)
+RATE_LIMIT_STORE = config('RATE_LIMIT_STORE', default='redis' if REDIS_URL else 'shm')
+RATE_LIMIT_SHM_PATH = config(
+    'RATE_LIMIT_SHM_PATH',
+    default='/dev/shm/greentrace-ratelimit' if os.path.isdir('/dev/shm') else str(BASE_DIR / 'var' / 'ratelimit'),
+)
+RATE_LIMIT_SLOTS = config('RATE_LIMIT_SLOTS', default=65536, cast=int)
+
+# N+1 and query budget checks per request: 'warn' logs, 'raise' fails the request, 'off'.
+# The test runner switches to 'raise'. Budgets are statements per URL name, middleware included.
+QUERY_INSPECTOR = config('QUERY_INSPECTOR', default='warn' if DEBUG else 'off')
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+QUERY_BUDGETS = {
+    'product_list': 6,
+    'product_detail': 8,
+    'credit_list': 4,
+    # Session, user, snapshot and body, plus role and privacy settings on a cold permission cache
+    'compliance_report': 6,
+    'admin:auth_user_changelist': 10,
+    'admin:users_userprofile_changelist': 10,
+    'admin:products_product_changelist': 10,
+    'admin:products_productauditlog_changelist': 10,
+    'admin:carbon_credits_carboncredit_changelist': 10,
+}
+TEST_RUNNER = 'greentrace.testing.QueryBudgetTestRunner'
+
+# Webhooks: events go to an outbox table in the change's transaction and are delivered by
+# 'manage.py run_webhook_dispatcher' in signed batches, retried with exponential backoff.
+WEBHOOK_BATCH_SIZE = config('WEBHOOK_BATCH_SIZE', default=50, cast=int)
+WEBHOOK_MAX_CONNECTIONS = config('WEBHOOK_MAX_CONNECTIONS', default=64, cast=int)
+WEBHOOK_TIMEOUT = config('WEBHOOK_TIMEOUT', default=10.0, cast=float)
+WEBHOOK_MAX_ATTEMPTS = config('WEBHOOK_MAX_ATTEMPTS', default=10, cast=int)
+WEBHOOK_RETRY_BASE_DELAY = config('WEBHOOK_RETRY_BASE_DELAY', default=30.0, cast=float)
+WEBHOOK_RETRY_MAX_DELAY = config('WEBHOOK_RETRY_MAX_DELAY', default=6 * 3600.0, cast=float)
+WEBHOOK_RETENTION_DAYS = config('WEBHOOK_RETENTION_DAYS', default=14, cast=int)
+# Private and loopback targets are refused in production (e.g. http://169.254.169.254/)
+WEBHOOK_ALLOW_PRIVATE_HOSTS = config('WEBHOOK_ALLOW_PRIVATE_HOSTS', default=DEBUG, cast=bool)
+
+# Compliance report: scores and tallies follow product saves (see analytics/compliance.py);
+# 'manage.py snapshot_compliance_report' stores the report every interval if it changed.
+COMPLIANCE_REPORT_INTERVAL = config('COMPLIANCE_REPORT_INTERVAL', default=3600.0, cast=float)
+# Producers and non-compliant products listed per report
+COMPLIANCE_REPORT_DETAIL_LIMIT = config('COMPLIANCE_REPORT_DETAIL_LIMIT', default=500, cast=int)
+COMPLIANCE_REPORT_RETENTION_DAYS = config('COMPLIANCE_REPORT_RETENTION_DAYS', default=365, cast=int)
@@ -0,0 +1,76 @@
+"""
+Test helpers for query budgets (see ``greentrace/querybudget.py``).
+
+``QueryBudgetTestRunner`` (the project's ``TEST_RUNNER``) turns the query
+inspector to ``'raise'``, so any request made through the test client that
+runs a likely N+1 or exceeds its URL's budget fails the test. It also turns
+off rate limiting, whose buckets would otherwise carry over between runs.
+``assert_queries`` applies the same checks to a block of code, and
+``SeededTestCase`` loads a small synthetic dataset (``benchmarks.dataset``)
+so list views are checked against many rows, where N+1s show up.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.test.runner import DiscoverRunner
+
+from greentrace.querybudget import QueryInspector, QueryProblem, budget_for
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_INSPECTOR = 'raise'
+        settings.RATE_LIMIT_ENABLED = False
+
+
+@contextmanager
+def assert_queries(budget=None, url_name=None, threshold=None):
+    """
+    Fail if the block runs a likely N+1 or more than ``budget`` statements
+    (or the ``QUERY_BUDGETS`` entry for ``url_name``). Yields the inspector.
+    """
+    if budget is None and url_name is not None:
+        budget = budget_for(url_name)
+    inspector = QueryInspector()
+    inspector.install()
+    try:
+        yield inspector
+    finally:
+        inspector.uninstall()
+    problems = inspector.problems(budget, threshold)
+    if problems:
+        raise QueryProblem('\n'.join(problems))
+
+
+@override_settings(
+    QUERY_INSPECTOR='raise',
+    RATE_LIMIT_ENABLED=False,
+    ADMIN_ALLOWED_IPS=[],
+    # Templates resolve static URLs without a collectstatic manifest
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class SeededTestCase(TestCase):
+    """
+    Loads ``products`` synthetic products with their owners' wallets, credits
+    and audit logs once per class, plus ``staff`` (a superuser) and
+    ``member`` (a wallet user). Requests fail on any query problem, whichever
+    runner is used.
+    """
+
+    products = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        from benchmarks.dataset import DatasetGenerator
+
+        generator = DatasetGenerator(cls.products, seed=7, batch_size=25, out=None)
+        user_ids = generator.load_wallets(10)
+        product_ids = generator.load_products(user_ids)
+        generator.load_credits(user_ids, cls.products)
+        generator.load_audit_logs(user_ids, product_ids, cls.products)
+        cls.staff = User.objects.create_superuser('staff', 'staff@example.com', 'password')
+        cls.member = User.objects.get(pk=user_ids[0])
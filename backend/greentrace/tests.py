@@ -0,0 +1,247 @@
+"""
+``FastJSONRenderer`` against DRF's ``JSONRenderer``, the two-tier cache, the readiness endpoint, the worker runner,
+replica routing and rate limit buckets.
+"""
+import json
+import os
+import tempfile
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from products.models import Product
+from .cache import EPOCH_KEY, INVALIDATION_KEY, LEASE_KEY, SQLiteCache, TwoTierCache
+from .db.routers import PRIMARY, PrimaryReplicaRouter, begin_request, end_request
+from .management.commands.run_workers import Command as RunWorkers
+from .ratelimit import SharedMemoryBuckets, check, parse_limit
+from .readiness import NotReady, Readiness
+from .renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_non_finite_numbers_raise(self):
+        for value in (float('nan'), float('inf'), -float('inf'), Decimal('NaN')):
+            with self.subTest(value):
+                data = {'rows': [{'score': value, 'note': None}]}
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render(data)
+
+    def test_line_separators_are_escaped(self):
+        data = {'description': 'first\u2028second\u2029third'}
+        content = FastJSONRenderer().render(data)
+        self.assertNotIn('\u2028'.encode(), content)
+        self.assertNotIn('\u2029'.encode(), content)
+        self.assertIn(b'\\u2028', content)
+        self.assertEqual(json.loads(content), data)
+
+    def test_finite_payload_matches_drf(self):
+        data = {'rows': [{'score': 1.5, 'amount': Decimal('12.50'), 'hash': None, 'name': 'NaN Infinity'}]}
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+
+class ReadinessViewTests(SimpleTestCase):
+
+    def test_first_probe_warms_up_outside_gunicorn(self):
+        calls = []
+
+        def check():
+            calls.append(1)
+            if len(calls) == 1:
+                raise NotReady('cache down')
+            return 'ok'
+
+        with mock.patch('greentrace.views.readiness', Readiness(checks=(('probe', check),))):
+            self.assertEqual(self.client.get('/health/ready/').status_code, 503)
+            response = self.client.get('/health/ready/')
+            self.assertEqual((response.status_code, response.json()['status']), (200, 'ready'))
+            self.client.get('/health/ready/')
+        self.assertEqual(len(calls), 2)  # not re-run once ready
+
+
+class RunWorkersTests(SimpleTestCase):
+
+    def test_restarts_a_stopped_worker_with_backoff(self):
+        outcomes = [RuntimeError('boom'), None, KeyboardInterrupt]
+        with mock.patch(f'{RunWorkers.__module__}.call_command', side_effect=outcomes) as call_command, \
+                mock.patch(f'{RunWorkers.__module__}.time.sleep') as sleep:
+            with self.assertLogs(RunWorkers.__module__, 'WARNING') as logs, self.assertRaises(KeyboardInterrupt):
+                RunWorkers().supervise('run_webhook_dispatcher', [], max_delay=60)
+        self.assertEqual(call_command.call_count, 3)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1, 2])
+        self.assertEqual([r.levelname for r in logs.records], ['ERROR', 'WARNING'])
+
+
+class SQLiteCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = self.open()
+
+    def open(self, **options):
+        return SQLiteCache(self.path, {'TIMEOUT': 300, 'OPTIONS': options})
+
+    def test_shared_between_instances(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.open().get('key'), {'value': 1})
+        self.assertFalse(self.open().add('key', 2))
+        self.assertTrue(self.cache.add('count', 1))
+        self.assertEqual(self.open().incr('count'), 2)
+        self.assertTrue(self.cache.delete('key'))
+        self.assertIsNone(self.open().get('key'))
+
+    def test_expired_entries_are_gone(self):
+        self.cache.set('short', 1, timeout=0.05)
+        self.assertTrue(self.cache.touch('short', timeout=0.05))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertEqual(self.cache.get_many(['short']), {})
+        self.assertFalse(self.cache.touch('short'))
+        self.assertTrue(self.cache.add('short', 2))
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_cull_keeps_entries_without_expiry(self):
+        cache = self.open(MAX_ENTRIES=10, CULL_FREQUENCY=2, CULL_EVERY=1)
+        cache.set(EPOCH_KEY, 7, timeout=None)
+        for n in range(20):
+            cache.set(f'key-{n}', n, timeout=300 + n)
+        self.assertEqual(cache.get(EPOCH_KEY), 7)
+        self.assertIsNone(cache.get('key-0'))  # soonest to expire went first
+        self.assertEqual(cache.get('key-19'), 19)
+
+
+class TwoTierCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.l2 = SQLiteCache(os.path.join(directory.name, 'cache.sqlite3'), {'TIMEOUT': None})
+        # Two workers sharing one L2
+        self.first, self.second = self.worker(), self.worker()
+
+    def worker(self, **options):
+        cache = TwoTierCache('shared', {'TIMEOUT': 300, 'OPTIONS': {'SYNC_INTERVAL': 0, **options}})
+        cache.__dict__['l2'] = self.l2
+        return cache
+
+    def test_write_invalidates_other_workers_l1(self):
+        self.first.set('key', 1)
+        self.assertEqual(self.second.get('key'), 1)
+        self.assertEqual(len(self.second.l1), 1)
+
+        self.first.set('key', 2)
+        self.assertEqual(self.second.get('key'), 2)
+        self.first.delete('key')
+        self.assertIsNone(self.second.get('key'))
+
+    def test_replay_drops_only_changed_keys(self):
+        for key in ('changed', 'kept'):
+            self.first.set(key, 1)
+            self.second.get(key)
+        self.first.set('changed', 2)
+        self.second.get('unrelated')  # syncs
+        self.assertIsNotNone(self.second.l1.get(self.second.make_key('kept')))
+        self.assertEqual(self.second.get('changed'), 2)
+
+    def test_lost_invalidation_record_clears_l1(self):
+        self.first.set('key', 1)
+        self.second.get('key')
+        self.first.set('other', 1)
+        self.l2.delete(INVALIDATION_KEY.format(self.l2.get(EPOCH_KEY)))
+        self.second.get('unrelated')
+        self.assertEqual(len(self.second.l1), 0)
+
+    def test_cleared_l2_clears_l1(self):
+        self.first.set('other', 1)
+        self.first.set('key', 1)
+        self.second.get('key')
+        self.l2.clear()
+        self.first.set('other', 1)  # epoch restarts below the one second has seen
+        self.assertIsNone(self.second.get('key'))
+
+    def test_get_or_set_waits_for_the_lease_holder(self):
+        lease = LEASE_KEY.format(self.second.make_key('key'))
+        self.l2.add(lease, 'other-process', 30)
+        self.first.set('key', 'computed elsewhere')
+        self.second.l1.clear()
+        self.l2.delete(self.second.make_key('key'))
+
+        compute = mock.Mock(return_value='computed here')
+        with mock.patch('greentrace.cache.time.sleep', side_effect=lambda _: self.l2.set(
+            self.second.make_key('key'), 'computed elsewhere'
+        )):
+            self.assertEqual(self.second.get_or_set('key', compute), 'computed elsewhere')
+        compute.assert_not_called()
+
+    def test_get_or_set_computes_after_lease_timeout(self):
+        cache = self.worker(LEASE_TIMEOUT=0.2)
+        # The holder died without releasing its lease
+        self.l2.add(LEASE_KEY.format(cache.make_key('key')), 'stuck-process', 30)
+        started = time.monotonic()
+        self.assertEqual(cache.get_or_set('key', lambda: 'computed'), 'computed')
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(self.first.get('key'), 'computed')
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICATED_MODELS=['products.Product'], REPLICA_MAX_LAG_SECONDS=None)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    databases = {'default'}
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.addCleanup(end_request)
+
+    def test_request_reads_go_to_a_replica_until_it_writes(self):
+        begin_request()
+        self.assertEqual(self.router.db_for_read(Product), 'replica1')
+        self.router.db_for_write(Product)
+        self.assertEqual(self.router.db_for_read(Product), PRIMARY)
+
+    def test_reads_in_a_primary_transaction_stay_on_the_primary(self):
+        begin_request()
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Product), PRIMARY)
+
+    def test_reads_outside_a_request_stay_on_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Product), PRIMARY)
+
+
+@override_settings(RATE_LIMITS={'anonymous': '100/h'}, RATE_LIMIT_WRITES='1/m')
+class RateLimitTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = SharedMemoryBuckets(os.path.join(directory.name, 'buckets'), slots=64)
+        patcher = mock.patch('greentrace.ratelimit.get_store', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self):
+        request = RequestFactory().post('/api/products/create/')
+        request.permissions = mock.Mock(user_id=None)
+        return check(request)
+
+    def test_refused_write_takes_nothing_from_the_request_bucket(self):
+        self.assertTrue(self.post().allowed)
+        refused = self.post()
+        self.assertFalse(refused.allowed)
+        self.assertGreater(refused.retry_after, 0)
+        # Headers keep describing the per-request bucket, which the refusal left alone
+        self.assertEqual((refused.limit, refused.remaining), (100, 99))
+
+    def test_take_all_is_all_or_nothing(self):
+        roomy, single = parse_limit('10/m'), parse_limit('1/m')
+        self.store.take('b', single, now=1000)
+        first, second = self.store.take_all([('a', roomy), ('b', single)], now=1000)
+        self.assertEqual((first.allowed, second.allowed), (True, False))
+        self.assertEqual(self.store.take('a', roomy, now=1000).remaining, 9)
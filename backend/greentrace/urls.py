@@ -5,7 +5,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.http import JsonResponse, HttpResponse
+from django.http import HttpResponse
+from .views import liveness, metrics, profile_download, profile_list, readiness_check, replica_lag
 import logging
 
 logger = logging.getLogger(__name__)
@@ -27,16 +28,31 @@ urlpatterns = [
     path('', health_check, name='health_check'),
     path('test/', test_endpoint, name='test_endpoint'),
     path('favicon.ico', favicon_view, name='favicon'),
+    path('health/live/', liveness, name='liveness'),
+    path('health/ready/', readiness_check, name='readiness'),
+    path('health/replicas/', replica_lag, name='replica_lag'),
+    path('metrics/', metrics, name='metrics'),
     path('api/', include('api.urls')),
     path('api/auth/', include('users.urls')),
     path('api/products/', include('products.urls')),
     path('api/credits/', include('carbon_credits.urls')),
+    path('api/chain/', include('blockchain.urls')),
+    path('api/crosschain/', include('blockchain.crosschain_urls')),
+    path('api/privacy/', include('privacy.urls')),
+    path('api/webhooks/', include('webhooks.urls')),
+    path('api/analytics/', include('analytics.urls')),
 ]
 
 # Hidden admin path - not exposed in URL patterns
 from django.conf import settings
 admin_path = getattr(settings, 'ADMIN_CUSTOM_PATH', 'admin')
 urlpatterns += [
+    path(f'{admin_path}/profiles/', admin.site.admin_view(profile_list), name='profile_list'),
+    path(
+        f'{admin_path}/profiles/<str:profile_id>.<str:kind>',
+        admin.site.admin_view(profile_download),
+        name='profile_download',
+    ),
     path(f'{admin_path}/', admin.site.urls),
 ]
 
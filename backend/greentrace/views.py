@@ -1,8 +1,14 @@
 """
 Custom views for GreenTrace
 """
-from django.http import HttpResponse, HttpResponseNotFound
+from django.contrib import admin
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotFound
 from django.shortcuts import render
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from .db.routers import lag_monitor
+from .readiness import NotReady, readiness
+from .responses import JsonResponse, StaticJson
 
 def custom_404(request, exception=None):
     """
@@ -101,3 +107,70 @@ def custom_500(request):
     </body>
     </html>
     """, status=500)
+
+
+ALIVE = StaticJson({'status': 'alive'})
+
+
+def liveness(request):
+    """The process is up and serving requests."""
+    return ALIVE.response()
+
+
+def readiness_check(request):
+    """
+    200 once this worker has warmed up, 503 (with the failing check) before that.
+
+    Gunicorn warms each worker before it accepts traffic; under any other
+    server (runserver, uvicorn) the first probe runs the warm-up instead.
+    """
+    if not readiness.is_ready():
+        try:
+            readiness.warm_up()
+        except NotReady:
+            return JsonResponse({'status': 'starting', 'checks': readiness.report}, status=503)
+    return JsonResponse({'status': 'ready', 'checks': readiness.report})
+
+
+def replica_lag(request):
+    """Seconds each read replica trails the primary (``null`` if its heartbeat is unreadable)."""
+    return JsonResponse({'replicas': lag_monitor.lags()})
+
+
+def metrics(request):
+    """Prometheus metrics for all workers; needs ``Authorization: Bearer <METRICS_TOKEN>`` or a staff session."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    authorized = (
+        (token and header.startswith('Bearer ') and constant_time_compare(header[7:], token))
+        or (request.user.is_authenticated and request.user.is_staff)
+    )
+    if not authorized:
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    
+    from .metrics import export
+    
+    return HttpResponse(export(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def profile_list(request):
+    """Admin page listing recent request profiles."""
+    from .profiling import recent_profiles
+    
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': recent_profiles(),
+        'sample_rate': getattr(settings, 'PROFILE_SAMPLE_RATE', 0.0),
+    }
+    return render(request, 'greentrace/profile_list.html', context)
+
+
+def profile_download(request, profile_id, kind):
+    """Download a profile's ``folded`` stacks or ``json`` report."""
+    from .profiling import profile_dir
+    
+    path = profile_dir() / f'{profile_id}.{kind}'
+    if kind not in ('folded', 'json') or not path.is_file():
+        raise Http404('Profile not found')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name, content_type='text/plain')
@@ -0,0 +1,119 @@
+"""
+Gunicorn configuration for GreenTrace.
+
+Picked up automatically by ``gunicorn greentrace.wsgi`` when run from this
+directory. The app is imported once in the master and forked into
+workers sized from the CPUs this container may use (its cgroup quota and
+affinity mask, not the host's core count). Workers are recycled after ``GUNICORN_MAX_REQUESTS``
+requests (with jitter), and each one warms its database connection and
+caches before it accepts connections (see ``greentrace.readiness``).
+``GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker`` with
+``greentrace.asgi:application`` serves the async API views instead.
+
+Signals to the master process:
+    HUP   re-read this file and replace workers gracefully (old workers finish
+          their requests; preloaded code is kept)
+    USR2  start a new master with freshly imported code; send QUIT (or TERM)
+          to the old master once the new one is serving, for code deploys
+    TTIN / TTOU   add / remove a worker
+"""
+import math
+import os
+import sys
+import time
+
+# Imported under another name: gunicorn reads a top-level ``config`` as its own setting
+from decouple import config as env
+
+
+def available_cpus():
+    """CPUs this process may run on, capped by a cgroup CPU quota (rounded up)."""
+    cpus = len(os.sched_getaffinity(0))
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>", quota "max" when unlimited
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            limit, period = f.read().split()
+        if limit != 'max':
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                limit = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+bind = f"0.0.0.0:{env('PORT', default='8000')}"
+worker_class = env('GUNICORN_WORKER_CLASS', default='gthread')
+cpus = available_cpus()
+# Async (uvicorn) workers never block on I/O, so one per CPU is enough
+workers = env('WEB_CONCURRENCY', default=0, cast=int) or (cpus if 'uvicorn' in worker_class else cpus * 2 + 1)
+threads = env('GUNICORN_THREADS', default=4, cast=int)
+preload_app = env('GUNICORN_PRELOAD', default=True, cast=bool)
+
+# Recycle workers to bound memory growth; jitter keeps them from restarting together
+max_requests = env('GUNICORN_MAX_REQUESTS', default=2000, cast=int)
+max_requests_jitter = env('GUNICORN_MAX_REQUESTS_JITTER', default=200, cast=int)
+
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = env('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = env('GUNICORN_LOG_LEVEL', default='info')
+
+readiness_timeout = env('READINESS_TIMEOUT', default=60, cast=float)
+# A worker that fails readiness waits 2, 4, 8... seconds (up to this) before exiting to be respawned
+readiness_retry_max_delay = env('READINESS_RETRY_MAX_DELAY', default=60, cast=float)
+
+
+def pre_fork(server, worker):
+    # Runs in the master: the forked worker inherits how many workers in a row failed to get ready
+    worker.spawned_at = time.monotonic()
+    worker.failed_boots = getattr(server, 'failed_boots', 0)
+
+
+def child_exit(server, worker):
+    # A worker that exits within its readiness window failed to get ready; one that lived longer resets the count
+    lifetime = time.monotonic() - getattr(worker, 'spawned_at', 0)
+    server.failed_boots = getattr(server, 'failed_boots', 0) + 1 if lifetime < readiness_timeout + 5 else 0
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading must not be shared between processes
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    """Readiness gate: the worker only starts accepting once warm-up passes."""
+    from greentrace.readiness import NotReady, readiness
+
+    try:
+        report = readiness.wait(readiness_timeout, heartbeat=worker.notify)
+    except NotReady as exc:
+        delay = min(readiness_retry_max_delay, 2 ** (worker.failed_boots + 1))
+        worker.log.error(f"Worker {worker.pid} not ready: {exc}; exiting in {delay:.0f}s to be respawned")
+        deadline = time.monotonic() + delay
+        while time.monotonic() < deadline:
+            worker.notify()
+            time.sleep(1)
+        # Not gunicorn's boot-error code 3, which would halt the master and every serving worker with it
+        sys.exit(1)
+    worker.log.info(f"Worker {worker.pid} ready: " + ', '.join(
+        f"{name} {check['ms']}ms" for name, check in report.items()
+    ))
+
+
+def on_reload(server):
+    server.log.info("Reloading: replacing workers gracefully")
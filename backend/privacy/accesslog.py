@@ -0,0 +1,342 @@
+"""
+Append-only sink for ``DataAccessLog`` entries.
+
+Recording an access appends a compact binary record to a memory-mapped
+segment file in ``DATA_ACCESS_LOG_DIR`` instead of inserting a row. Each
+process writes its own segment, sealing it once it is full or
+``DATA_ACCESS_LOG_SEGMENT_SECONDS`` after it was opened, even if nothing
+else is appended; ``compact_segments`` bulk-loads sealed segments into the
+table. Readers of the table therefore trail writes by at most that age plus
+the compactor's interval; the subject-access export also reads the entries
+still waiting in segment files (``pending_entries``).
+
+Record layout (little-endian)::
+
+    u32 payload length | u32 crc32(payload) |
+    f64 timestamp | u32 user id | u8 access type | u8 privacy level |
+    6 x (u16 length + utf-8): model, object id, fields, sensitivity, ip, user agent
+
+A zero length marks the end of the written part of a segment.
+"""
+import atexit
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+logger = logging.getLogger(__name__)
+
+OPEN_SUFFIX = '.open'
+SEALED_SUFFIX = '.seg'
+
+_HEADER = struct.Struct('<II')
+_FIXED = struct.Struct('<dIBB')
+_LENGTH = struct.Struct('<H')
+_MAX_STRING = 0xFFFF
+_MAX_USER_AGENT = 512
+_FIELD_SEPARATOR = ','
+
+
+def _codes():
+    from .models import DataAccessLog, PrivacySettings
+
+    # Codes are positions in the choices; only ever append new choices
+    return tuple(DataAccessLog.AccessType.values), tuple(PrivacySettings.PrivacyLevel.values)
+
+
+def _pack_string(value, limit=_MAX_STRING):
+    raw = (value or '').encode('utf-8')[:limit]
+    return _LENGTH.pack(len(raw)) + raw
+
+
+def encode_record(user_id, access_type, model_name, object_id, field_names=(),
+                  privacy_level='public', data_sensitivity='', ip_address=None,
+                  user_agent='', timestamp=None):
+    """Serialize one access into a segment record."""
+    access_types, privacy_levels = _codes()
+    payload = b''.join([
+        _FIXED.pack(
+            timestamp if timestamp is not None else time.time(),
+            user_id,
+            access_types.index(access_type),
+            privacy_levels.index(privacy_level),
+        ),
+        _pack_string(model_name),
+        _pack_string(str(object_id)),
+        _pack_string(_FIELD_SEPARATOR.join(field_names)),
+        _pack_string(data_sensitivity),
+        _pack_string(ip_address),
+        _pack_string(user_agent, _MAX_USER_AGENT),
+    ])
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_record(payload):
+    """Turn a record payload back into ``DataAccessLog`` field values."""
+    access_types, privacy_levels = _codes()
+    timestamp, user_id, access_type, privacy_level = _FIXED.unpack_from(payload)
+    offset = _FIXED.size
+    strings = []
+    for _ in range(6):
+        (length,) = _LENGTH.unpack_from(payload, offset)
+        offset += _LENGTH.size
+        strings.append(payload[offset:offset + length].decode('utf-8', 'replace'))
+        offset += length
+    model_name, object_id, fields, sensitivity, ip_address, user_agent = strings
+    return {
+        'user_id': user_id,
+        'access_type': access_types[access_type],
+        'model_name': model_name,
+        'object_id': object_id,
+        'field_names': fields.split(_FIELD_SEPARATOR) if fields else [],
+        'privacy_level': privacy_levels[privacy_level],
+        'data_sensitivity': sensitivity,
+        'ip_address': ip_address or None,
+        'user_agent': user_agent,
+        'timestamp': datetime.fromtimestamp(timestamp, tz=dt_timezone.utc),
+    }
+
+
+def read_segment(path):
+    """Yield the records of a segment file, stopping at the first unwritten or torn record."""
+    try:
+        data = Path(path).read_bytes()
+    except FileNotFoundError:
+        return
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, checksum = _HEADER.unpack_from(data, offset)
+        start = offset + _HEADER.size
+        payload = data[start:start + length]
+        if not length or len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        yield decode_record(payload)
+        offset = start + length
+
+
+class SegmentWriter:
+    """
+    Appends records to this process's memory-mapped segment file.
+
+    Segments are preallocated to ``segment_size`` bytes and named
+    ``<start ms>-<pid>-<seq>.open``; sealing truncates the unused tail and
+    renames them to ``.seg`` for the compactor. A timer seals a segment
+    ``max_age`` seconds after it was opened, so an idle process doesn't hold
+    its last accesses back.
+    """
+
+    def __init__(self, directory, segment_size=8 * 1024 * 1024, max_age=60, clock=time.time):
+        self.directory = Path(directory)
+        self.segment_size = segment_size
+        self.max_age = max_age
+        self.clock = clock
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._file = None
+        self._map = None
+        self._path = None
+        self._offset = 0
+        self._opened_at = 0.0
+        self._timer = None
+
+    def _open(self, size):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sequence += 1
+        self._opened_at = self.clock()
+        name = f'{int(self._opened_at * 1000):013d}-{self.pid}-{self._sequence:06d}{OPEN_SUFFIX}'
+        self._path = self.directory / name
+        self._file = open(self._path, 'w+b')
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._offset = 0
+        self._timer = threading.Timer(self.max_age, self._expire, args=(self._sequence,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _expire(self, sequence):
+        with self._lock:
+            if self._map is not None and self._sequence == sequence:
+                self._seal()
+
+    def _seal(self):
+        if self._map is None:
+            return
+        self._timer.cancel()
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._offset)
+        self._file.close()
+        if self._offset:
+            os.replace(self._path, self._path.with_suffix(SEALED_SUFFIX))
+        else:
+            self._path.unlink(missing_ok=True)
+        self._file = self._map = self._path = None
+
+    def append(self, record):
+        with self._lock:
+            if self._map is not None and (
+                self._offset + len(record) > len(self._map)
+                or self.clock() - self._opened_at >= self.max_age
+            ):
+                self._seal()
+            if self._map is None:
+                self._open(max(self.segment_size, len(record) + _HEADER.size))
+            # Body first, header last: readers never see a length before its payload
+            end = self._offset + len(record)
+            self._map[self._offset + _HEADER.size:end] = record[_HEADER.size:]
+            self._map[self._offset:self._offset + _HEADER.size] = record[:_HEADER.size]
+            self._offset = end
+
+    def seal(self):
+        """Seal the current segment so the compactor can load it."""
+        with self._lock:
+            self._seal()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_access_log():
+    """This process's ``SegmentWriter`` (recreated after a fork)."""
+    global _writer
+    if _writer is None or _writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = SegmentWriter(
+                    settings.DATA_ACCESS_LOG_DIR,
+                    segment_size=settings.DATA_ACCESS_LOG_SEGMENT_SIZE,
+                    max_age=settings.DATA_ACCESS_LOG_SEGMENT_SECONDS,
+                )
+                atexit.register(_writer.seal)
+    return _writer
+
+
+def record_access(user_id, access_type, model_name, object_id, field_names=(), **extra):
+    """Append one access to the log; ``extra`` takes the remaining ``DataAccessLog`` fields."""
+    try:
+        get_access_log().append(
+            encode_record(user_id, access_type, model_name, object_id, field_names, **extra)
+        )
+    except (OSError, ValueError) as exc:
+        # Access logging must never break the read it records
+        logger.error(f"Could not record access to {model_name} {object_id}: {exc}")
+
+
+def record_request_access(request, instance, field_names, privacy_level, data_sensitivity):
+    """Record that ``request``'s caller read ``field_names`` of ``instance``."""
+    user_id = request.permissions.user_id
+    if user_id is None or not field_names:
+        return
+    record_access(
+        user_id, 'view', instance._meta.label, instance.pk, field_names,
+        privacy_level=privacy_level,
+        data_sensitivity=data_sensitivity,
+        ip_address=request.META.get('REMOTE_ADDR'),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+    )
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def seal_abandoned_segments(directory=None):
+    """Seal ``.open`` segments whose writing process has exited."""
+    directory = Path(directory or settings.DATA_ACCESS_LOG_DIR)
+    sealed = 0
+    for path in directory.glob(f'*{OPEN_SUFFIX}'):
+        pid = int(path.stem.split('-')[1])
+        if pid == os.getpid() or _pid_alive(pid):
+            continue
+        written = sum(1 for _ in read_segment(path))
+        if written:
+            os.replace(path, path.with_suffix(SEALED_SUFFIX))
+            sealed += 1
+        else:
+            path.unlink(missing_ok=True)
+    return sealed
+
+
+def compact_segments(directory=None, batch_size=1000):
+    """
+    Bulk-load sealed segments into ``DataAccessLog`` and delete them.
+
+    Returns ``(segments, records)`` loaded.
+    """
+    from django.contrib.auth.models import User
+
+    from .models import AccessLogSegment, DataAccessLog, DataSubjectRequest
+
+    directory = Path(directory or settings.DATA_ACCESS_LOG_DIR)
+    if not directory.exists():
+        return 0, 0
+    seal_abandoned_segments(directory)
+    # Accesses buffered before a subject's erasure finished must not resurface
+    erased = dict(DataSubjectRequest.objects.filter(
+        request_type=DataSubjectRequest.RequestType.ERASURE,
+        status=DataSubjectRequest.RequestStatus.COMPLETED,
+    ).values_list('subject_id', 'completed_at'))
+
+    segments = records = 0
+    for path in sorted(directory.glob(f'*{SEALED_SUFFIX}')):
+        if not AccessLogSegment.objects.filter(name=path.name).exists():
+            pending = [
+                values for values in read_segment(path)
+                if not (values['user_id'] in erased and values['timestamp'] <= erased[values['user_id']])
+            ]
+            # Accesses by users deleted since would fail the foreign key; their rows would have cascaded anyway
+            users = set(User.objects.filter(
+                pk__in={values['user_id'] for values in pending}
+            ).values_list('pk', flat=True))
+            entries = [DataAccessLog(**values) for values in pending if values['user_id'] in users]
+            if len(entries) < len(pending):
+                logger.info(f"Dropped {len(pending) - len(entries)} access record(s) of deleted users from {path.name}")
+            try:
+                with transaction.atomic():
+                    _, created = AccessLogSegment.objects.get_or_create(
+                        name=path.name, defaults={'records': len(entries)}
+                    )
+                    if created:
+                        DataAccessLog.objects.bulk_create(entries, batch_size=batch_size)
+            except IntegrityError:
+                logger.exception(f"Could not load access-log segment {path.name}; it is kept for the next run")
+                continue
+            if created:
+                segments += 1
+                records += len(entries)
+        path.unlink(missing_ok=True)
+        AccessLogSegment.objects.filter(name=path.name).delete()
+    return segments, records
+
+
+def pending_entries(directory=None):
+    """Access-log values still waiting in segment files (sealed or open)."""
+    from .models import AccessLogSegment
+
+    directory = Path(directory or settings.DATA_ACCESS_LOG_DIR)
+    if not directory.exists():
+        return
+    paths = sorted(directory.glob(f'*{SEALED_SUFFIX}')) + sorted(directory.glob(f'*{OPEN_SUFFIX}'))
+    loaded = set(AccessLogSegment.objects.filter(
+        name__in=[path.name for path in paths]
+    ).values_list('name', flat=True))
+    for path in paths:
+        if path.name not in loaded:
+            yield from read_segment(path)
+
@@ -2,7 +2,7 @@
 Admin configuration for privacy app.
 """
 from django.contrib import admin
-from .models import PrivacySettings, DataAccessLog
+from .models import PrivacySettings, DataAccessLog, DataSubjectRequest
 
 
 @admin.register(PrivacySettings)
@@ -84,3 +84,23 @@ class DataAccessLogAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """Access logs should not be modified."""
         return False
+
+
+@admin.register(DataSubjectRequest)
+class DataSubjectRequestAdmin(admin.ModelAdmin):
+    """Admin interface for DataSubjectRequest model."""
+    
+    list_display = [
+        'subject', 'request_type', 'status', 'processed', 'total', 'created_at', 'completed_at'
+    ]
+    
+    list_filter = ['request_type', 'status', 'created_at']
+    
+    readonly_fields = [
+        'subject', 'requested_by', 'request_type', 'status', 'total', 'processed',
+        'progress', 'archive_path', 'error', 'created_at', 'started_at', 'completed_at'
+    ]
+    
+    def has_add_permission(self, request):
+        """Jobs are queued through the API so they get scheduled."""
+        return False
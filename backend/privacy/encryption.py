@@ -0,0 +1,193 @@
+"""
+Envelope encryption for sensitive model fields.
+
+Each tenant (the user owning the rows) has a data key; data keys are stored
+wrapped by a master key from ``FIELD_ENCRYPTION_KEYS``. Values are sealed
+with AES-256-GCM under the tenant's data key. Unwrapped data keys are
+cached in process for ``FIELD_ENCRYPTION_KEY_TTL`` seconds. Which key is a
+tenant's active one is cached in the ``default`` cache, so a rotation
+reaches every worker within its sync interval rather than leaving them
+encrypting with the old key until their own entry expires.
+
+Ciphertext format: ``enc:v1:<data key id>:<base64(nonce || ciphertext)>``.
+"""
+import base64
+import hashlib
+import os
+import threading
+import time
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.conf import settings
+from django.core.cache import cache
+
+CIPHERTEXT_PREFIX = 'enc:v1:'
+NONCE_SIZE = 12
+ACTIVE_KEY_CACHE_KEY = 'datakey:active:{}'
+
+
+class EncryptionError(Exception):
+    """Raised when a value cannot be encrypted or decrypted."""
+
+
+class Ciphertext(str):
+    """A stored, still-encrypted field value."""
+
+
+def is_encrypted(value):
+    return isinstance(value, str) and value.startswith(CIPHERTEXT_PREFIX)
+
+
+def get_master_keys():
+    """
+    Return ``(current_id, {id: key})`` from ``FIELD_ENCRYPTION_KEYS``.
+
+    The setting is an ordered ``{id: base64 key}`` mapping; the first entry
+    wraps new data keys. Without it a key is derived from ``SECRET_KEY``
+    (development only).
+    """
+    configured = getattr(settings, 'FIELD_ENCRYPTION_KEYS', None)
+    if configured:
+        keys = {key_id: base64.b64decode(key) for key_id, key in configured.items()}
+        return next(iter(keys)), keys
+    derived = hashlib.sha256(f'{settings.SECRET_KEY}:field-encryption'.encode()).digest()
+    return 'secret-key', {'secret-key': derived}
+
+
+class KeyRing:
+    """Creates, wraps and caches per-tenant data keys."""
+
+    def __init__(self, ttl=None, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def _ttl(self):
+        return self.ttl if self.ttl is not None else getattr(settings, 'FIELD_ENCRYPTION_KEY_TTL', 300)
+
+    @staticmethod
+    def _wrap_aad(tenant_id):
+        return f'greentrace:data-key:{tenant_id or "shared"}'.encode()
+
+    def _remember(self, key_id, key, tenant_id):
+        self._keys[key_id] = (key, tenant_id, self.clock() + self._ttl())
+
+    def create_data_key(self, tenant_id):
+        """Generate, wrap and store a new active data key for ``tenant_id``."""
+        from .models import DataKey
+
+        master_id, master_keys = get_master_keys()
+        key = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(NONCE_SIZE)
+        wrapped = nonce + AESGCM(master_keys[master_id]).encrypt(nonce, key, self._wrap_aad(tenant_id))
+
+        DataKey.objects.filter(tenant_id=tenant_id, is_active=True).update(is_active=False)
+        data_key = DataKey.objects.create(tenant_id=tenant_id, wrapped_key=wrapped, master_key_id=master_id)
+        with self._lock:
+            self._remember(data_key.pk, key, tenant_id)
+        cache.set(ACTIVE_KEY_CACHE_KEY.format(tenant_id), data_key.pk, self._ttl())
+        return data_key.pk, key
+
+    def active_key(self, tenant_id):
+        """Return ``(key_id, key)`` used to encrypt new values for ``tenant_id``."""
+        from .models import DataKey
+
+        cache_key = ACTIVE_KEY_CACHE_KEY.format(tenant_id)
+        key_id = cache.get(cache_key)
+        if key_id is not None:
+            try:
+                key, key_tenant_id = self._unwrap(key_id)
+            except EncryptionError:
+                key_tenant_id = None
+            if key_tenant_id == tenant_id:
+                return key_id, key
+            # Left over from a database this cache no longer matches
+            cache.delete(cache_key)
+
+        key_id = DataKey.objects.filter(
+            tenant_id=tenant_id, is_active=True
+        ).order_by('-created_at').values_list('pk', flat=True).first()
+        if key_id is None:
+            return self.create_data_key(tenant_id)
+        cache.add(cache_key, key_id, self._ttl())
+        return key_id, self.unwrap(key_id)
+
+    def unwrap(self, key_id):
+        """Return the plaintext data key ``key_id``, from cache when possible."""
+        return self._unwrap(key_id)[0]
+
+    def _unwrap(self, key_id):
+        from .models import DataKey
+
+        with self._lock:
+            entry = self._keys.get(key_id)
+            if entry and entry[2] > self.clock():
+                return entry[0], entry[1]
+
+        data_key = DataKey.objects.filter(pk=key_id).only('wrapped_key', 'master_key_id', 'tenant_id').first()
+        if data_key is None:
+            raise EncryptionError(f'Data key {key_id} no longer exists')
+        _, master_keys = get_master_keys()
+        master = master_keys.get(data_key.master_key_id)
+        if master is None:
+            raise EncryptionError(f'Master key {data_key.master_key_id} is not configured')
+
+        wrapped = bytes(data_key.wrapped_key)
+        key = AESGCM(master).decrypt(wrapped[:NONCE_SIZE], wrapped[NONCE_SIZE:], self._wrap_aad(data_key.tenant_id))
+        with self._lock:
+            self._remember(key_id, key, data_key.tenant_id)
+        return key, data_key.tenant_id
+
+    def rewrap(self, data_key):
+        """Re-wrap ``data_key`` under the current master key; returns True if it changed."""
+        master_id, master_keys = get_master_keys()
+        if data_key.master_key_id == master_id:
+            return False
+        key = self.unwrap(data_key.pk)
+        nonce = os.urandom(NONCE_SIZE)
+        data_key.wrapped_key = nonce + AESGCM(master_keys[master_id]).encrypt(
+            nonce, key, self._wrap_aad(data_key.tenant_id)
+        )
+        data_key.master_key_id = master_id
+        data_key.save(update_fields=['wrapped_key', 'master_key_id'])
+        return True
+
+    def clear(self):
+        """Forget this process's unwrapped keys."""
+        with self._lock:
+            self._keys.clear()
+
+
+keyring = KeyRing()
+
+
+def encrypt_value(plaintext, tenant_id, context):
+    """Seal ``plaintext`` under ``tenant_id``'s active data key; ``context`` is bound as AAD."""
+    key_id, key = keyring.active_key(tenant_id)
+    nonce = os.urandom(NONCE_SIZE)
+    sealed = AESGCM(key).encrypt(nonce, plaintext.encode(), context.encode())
+    return Ciphertext(f'{CIPHERTEXT_PREFIX}{key_id}:{base64.b64encode(nonce + sealed).decode()}')
+
+
+def key_id_of(value):
+    """Data key id a stored value was sealed with (``None`` for plaintext)."""
+    if not is_encrypted(value):
+        return None
+    return int(value[len(CIPHERTEXT_PREFIX):].split(':', 1)[0])
+
+
+def decrypt_value(value, context):
+    """Open a stored value; legacy plaintext is returned unchanged."""
+    if not is_encrypted(value):
+        return str(value) if isinstance(value, Ciphertext) else value
+    key_id, payload = value[len(CIPHERTEXT_PREFIX):].split(':', 1)
+    raw = base64.b64decode(payload)
+    try:
+        return AESGCM(keyring.unwrap(int(key_id))).decrypt(
+            raw[:NONCE_SIZE], raw[NONCE_SIZE:], context.encode()
+        ).decode()
+    except EncryptionError:
+        raise
+    except Exception as exc:
+        raise EncryptionError(f'Cannot decrypt value: {exc}')
@@ -0,0 +1,89 @@
+"""
+Transparently encrypted model fields.
+"""
+from django.core.exceptions import FieldError
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+from .encryption import Ciphertext, decrypt_value, encrypt_value, is_encrypted
+
+
+class EncryptedAttribute(DeferredAttribute):
+    """Decrypts the stored value the first time the attribute is read."""
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if instance is None or not isinstance(value, Ciphertext):
+            return value
+        value = decrypt_value(value, self.field.encryption_context)
+        instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        # Being a data descriptor keeps __get__ in the lookup path once the slot is filled
+        instance.__dict__[self.field.attname] = value
+
+
+class EncryptedTextField(models.TextField):
+    """
+    Text field stored with per-tenant envelope encryption.
+
+    Values load as ``Ciphertext`` and are decrypted lazily on attribute
+    access, so fields a caller never reads are never decrypted. ``tenant_field``
+    names the attribute holding the tenant's user id (e.g. ``created_by_id``).
+    ``context_label`` overrides the model label bound into ciphertexts, so a
+    field moved to another model keeps reading its existing values.
+    Encrypted columns cannot be filtered or searched on: ciphertexts use a
+    random nonce, so any lookup but ``isnull`` raises ``FieldError``.
+    """
+
+    descriptor_class = EncryptedAttribute
+
+    def __init__(self, *args, tenant_field=None, context_label=None, **kwargs):
+        self.tenant_field = tenant_field
+        self.context_label = context_label
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['tenant_field'] = self.tenant_field
+        if self.context_label:
+            kwargs['context_label'] = self.context_label
+        return name, path, args, kwargs
+
+    @property
+    def encryption_context(self):
+        return f'{self.context_label or self.model._meta.label}.{self.name}'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return Ciphertext(value)
+
+    def _encrypt(self, value, tenant_id):
+        if value is None or value == '' or is_encrypted(value):
+            return value
+        return encrypt_value(str(value), tenant_id, self.encryption_context)
+
+    def pre_save(self, model_instance, add):
+        # Read the raw slot so an untouched value is written back as-is
+        value = model_instance.__dict__.get(self.attname)
+        tenant_id = getattr(model_instance, self.tenant_field) if self.tenant_field else None
+        return self._encrypt(value, tenant_id)
+
+    def get_db_prep_save(self, value, connection):
+        # Reached without an instance (queryset.update, bulk_update): use the shared key
+        value = super().get_db_prep_save(value, connection)
+        if hasattr(value, 'as_sql'):
+            return value
+        return self._encrypt(value, None)
+
+    def get_lookup(self, lookup_name):
+        if lookup_name != 'isnull':
+            raise FieldError(
+                f"Encrypted field '{self.name}' cannot be queried with '{lookup_name}'; only isnull is supported"
+            )
+        return super().get_lookup(lookup_name)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
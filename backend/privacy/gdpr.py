@@ -0,0 +1,365 @@
+"""
+GDPR subject-access export and erasure jobs.
+
+A data subject's data spans ``User``, ``UserProfile``, ``PrivacySettings``,
+``Product`` and its ``ProductDetail``, ``CarbonCredit``, ``ProductAuditLog``
+and ``DataAccessLog``.
+Requests only record ``DataSubjectRequest`` rows; the jobs run in
+``manage.py process_data_subject_requests``, never in a web worker, which
+gunicorn may recycle mid-job. A worker claims a job with a lease and renews
+it as chunks complete; a job is only taken over once its lease has expired,
+and a worker that finds its lease taken stops. Every dataset is walked in
+primary-key chunks, so memory stays flat and no transaction covers more
+than one chunk, however many rows a subject has. Progress is written back
+to the request row after each chunk.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from carbon_credits.models import CarbonCredit
+from products.models import Product, ProductAuditLog, ProductDetail
+from users.models import UserProfile
+from webhooks.models import WebhookEndpoint, WebhookEvent
+
+from .accesslog import compact_segments, pending_entries
+from .models import DataAccessLog, DataKey, DataSubjectRequest, PrivacySettings
+
+logger = logging.getLogger(__name__)
+
+# Never exported, even to the subject
+EXCLUDED_FIELDS = {'password'}
+ERASED = '[erased]'
+
+
+def subject_datasets(user_id):
+    """``(file name, queryset)`` pairs holding the subject's data."""
+    return [
+        ('user.ndjson', User.objects.filter(pk=user_id)),
+        ('user_profile.ndjson', UserProfile.objects.filter(user_id=user_id)),
+        ('privacy_settings.ndjson', PrivacySettings.objects.filter(user_id=user_id)),
+        ('products.ndjson', Product.objects.filter(created_by_id=user_id)),
+        ('product_details.ndjson', ProductDetail.objects.filter(product__created_by_id=user_id)),
+        ('carbon_credits.ndjson', CarbonCredit.objects.filter(created_by_id=user_id)),
+        ('product_audit_logs.ndjson', ProductAuditLog.objects.filter(user_id=user_id)),
+        ('data_access_logs.ndjson', DataAccessLog.objects.filter(user_id=user_id)),
+    ]
+
+
+def iter_chunks(queryset, chunk_size):
+    """Yield lists of model instances in ascending pk order, one query per chunk."""
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def iter_pk_chunks(queryset, chunk_size):
+    """Yield lists of primary keys; re-queries from the start so deleted rows are skipped."""
+    queryset = queryset.order_by('pk')
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield pks
+
+
+def serialize_instance(instance):
+    """One NDJSON line for ``instance`` (encrypted fields are decrypted on access)."""
+    row = {
+        field.attname: field.value_from_object(instance)
+        for field in instance._meta.concrete_fields
+        if field.name not in EXCLUDED_FIELDS
+    }
+    return json.dumps(row, cls=DjangoJSONEncoder, default=str) + '\n'
+
+
+class LeaseLost(Exception):
+    """Raised when another worker has taken over a job whose lease expired."""
+
+
+class DataSubjectService:
+    """Worker pool that claims and runs queued ``DataSubjectRequest`` jobs."""
+
+    def __init__(self, workers=2, chunk_size=1000, export_dir=None, lease=300):
+        self.chunk_size = chunk_size
+        self.export_dir = Path(export_dir or settings.GDPR_EXPORT_DIR)
+        self.lease = lease
+        self.workers = workers
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._executor = None
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, subject_id, request_type, requested_by=None):
+        """Record a job for the workers; an unfinished job of the same kind is reused."""
+        with transaction.atomic():
+            active = DataSubjectRequest.objects.select_for_update().filter(
+                subject_id=subject_id, request_type=request_type,
+                status__in=[DataSubjectRequest.RequestStatus.QUEUED, DataSubjectRequest.RequestStatus.RUNNING],
+            ).first()
+            if active is not None:
+                return active
+            return DataSubjectRequest.objects.create(
+                subject_id=subject_id, request_type=request_type, requested_by_id=requested_by,
+            )
+
+    def _lease_until(self):
+        return timezone.now() + timedelta(seconds=self.lease)
+
+    def _claimable(self):
+        """Queued jobs, and running jobs whose worker's lease has run out."""
+        return Q(status=DataSubjectRequest.RequestStatus.QUEUED) | Q(
+            status=DataSubjectRequest.RequestStatus.RUNNING, lease_expires_at__lt=timezone.now()
+        )
+
+    def claim(self, request_id):
+        """Take the lease on ``request_id`` if it is claimable; returns whether it was claimed."""
+        return bool(DataSubjectRequest.objects.filter(self._claimable(), pk=request_id).update(
+            status=DataSubjectRequest.RequestStatus.RUNNING,
+            claimed_by=self.worker_id,
+            lease_expires_at=self._lease_until(),
+            started_at=timezone.now(),
+        ))
+
+    def _held(self, job):
+        return DataSubjectRequest.objects.filter(
+            pk=job.pk, status=DataSubjectRequest.RequestStatus.RUNNING, claimed_by=self.worker_id
+        )
+
+    def renew(self, job):
+        """Extend the lease on ``job``; raises ``LeaseLost`` if another worker took it over."""
+        if not self._held(job).update(lease_expires_at=self._lease_until()):
+            raise LeaseLost(f'Lease on data subject request {job.pk} was taken over')
+        job._lease_renewed = time.monotonic()
+
+    def tick(self, limit=100):
+        """Claim claimable jobs up to the free worker capacity and start them; returns how many."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='gdpr')
+        candidates = DataSubjectRequest.objects.filter(self._claimable()).order_by('created_at')
+        started = 0
+        for request_id in candidates.values_list('pk', flat=True)[:limit]:
+            with self._lock:
+                if self._active >= self.workers:
+                    break
+            if not self.claim(request_id):
+                continue
+            with self._lock:
+                self._active += 1
+            self._executor.submit(self._run, request_id)
+            started += 1
+        return started
+
+    def _run(self, request_id):
+        try:
+            self.process(request_id)
+        except Exception:
+            logger.exception("Data subject request %s crashed", request_id)
+        finally:
+            with self._lock:
+                self._active -= 1
+            close_old_connections()
+
+    def process(self, request_id):
+        """Execute one job whose lease this worker holds."""
+        job = DataSubjectRequest.objects.filter(pk=request_id, claimed_by=self.worker_id).first()
+        if job is None:
+            return
+        job._lease_renewed = time.monotonic()
+
+        try:
+            if job.subject_id is None:
+                raise ValueError('Subject no longer exists')
+            if job.request_type == DataSubjectRequest.RequestType.EXPORT:
+                self.export(job)
+            else:
+                self.erase(job)
+        except LeaseLost as exc:
+            logger.warning("Data subject request %s abandoned: %s", request_id, exc)
+            return
+        except Exception as exc:
+            logger.warning("Data subject request %s failed: %s", request_id, exc)
+            self._held(job).update(
+                status=DataSubjectRequest.RequestStatus.FAILED, error=str(exc),
+                lease_expires_at=None, completed_at=timezone.now(),
+            )
+            return
+
+        self._held(job).update(
+            status=DataSubjectRequest.RequestStatus.COMPLETED, error='',
+            lease_expires_at=None, completed_at=timezone.now(),
+        )
+
+    def _start(self, job, total):
+        job.total, job.processed, job.progress = total, 0, {}
+        DataSubjectRequest.objects.filter(pk=job.pk).update(total=total, processed=0, progress={})
+
+    def _advance(self, job, step, count):
+        job.processed += count
+        job.progress[step] = job.progress.get(step, 0) + count
+        DataSubjectRequest.objects.filter(pk=job.pk).update(processed=job.processed, progress=job.progress)
+        if time.monotonic() - job._lease_renewed >= self.lease / 3:
+            self.renew(job)
+
+    def export(self, job):
+        """Stream the subject's data into ``subject-access-<job id>.zip``, one NDJSON file per model."""
+        datasets = subject_datasets(job.subject_id)
+        self._start(job, sum(queryset.count() for _, queryset in datasets))
+
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        path = self.export_dir / f'subject-access-{job.pk}.zip'
+        # Per attempt, so a worker that lost its lease never writes into the new owner's file
+        partial = path.with_name(f'{path.name}.{uuid.uuid4().hex[:12]}.part')
+        try:
+            self._write_export(job, datasets, partial)
+            # Only the lease holder publishes the archive
+            self.renew(job)
+            os.replace(partial, path)
+        finally:
+            partial.unlink(missing_ok=True)
+
+        job.archive_path = str(path)
+        DataSubjectRequest.objects.filter(pk=job.pk).update(archive_path=job.archive_path)
+
+    def _write_export(self, job, datasets, partial):
+        with zipfile.ZipFile(partial, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, queryset in datasets:
+                with archive.open(name, 'w', force_zip64=True) as out:
+                    for chunk in iter_chunks(queryset, self.chunk_size):
+                        out.write(''.join(serialize_instance(obj) for obj in chunk).encode())
+                        self._advance(job, name, len(chunk))
+                    if queryset.model is DataAccessLog:
+                        # Accesses not yet compacted from segment files
+                        for values in pending_entries():
+                            if values['user_id'] == job.subject_id:
+                                out.write((json.dumps(values, cls=DjangoJSONEncoder) + '\n').encode())
+
+    def _delete(self, job, step, queryset):
+        for pks in iter_pk_chunks(queryset, self.chunk_size):
+            with transaction.atomic():
+                queryset.model.objects.filter(pk__in=pks).delete()
+            self._advance(job, step, len(pks))
+
+    def erase(self, job):
+        """
+        Delete the subject's records and anonymize what must be kept.
+
+        Products, audit and access logs, webhook endpoints and events,
+        privacy settings and data keys are deleted; carbon credits stay on the
+        ledger with their parties anonymized; the user and profile rows are
+        scrubbed and deactivated. Stored compliance reports name producers and
+        their products, so they are replaced by one taken without the subject.
+        """
+        user_id = job.subject_id
+        # Load sealed buffered accesses so they are erased too; the compactor drops
+        # the subject's records still in open segments once this job completes
+        compact_segments()
+
+        products = Product.objects.filter(created_by_id=user_id)
+        credits = CarbonCredit.objects.filter(created_by_id=user_id)
+        steps = [
+            ('data_access_logs', DataAccessLog.objects.filter(user_id=user_id)),
+            ('product_audit_logs', ProductAuditLog.objects.filter(
+                Q(user_id=user_id) | Q(product__created_by_id=user_id)
+            )),
+            ('products', products),
+            ('webhook_events', WebhookEvent.objects.filter(owner_id=user_id)),
+            ('webhook_endpoints', WebhookEndpoint.objects.filter(owner_id=user_id)),
+        ]
+        self._start(job, sum(queryset.count() for _, queryset in steps) + credits.count() + 1)
+
+        for step, queryset in steps:
+            self._delete(job, step, queryset)
+
+        for chunk in iter_chunks(credits.only('pk'), self.chunk_size):
+            with transaction.atomic():
+                CarbonCredit.objects.filter(pk__in=[credit.pk for credit in chunk]).update(
+                    issuer=ERASED, recipient=ERASED, reason='', updated_at=timezone.now(),
+                )
+            self._advance(job, 'carbon_credits', len(chunk))
+
+        with transaction.atomic():
+            for settings_row in PrivacySettings.objects.filter(user_id=user_id):
+                settings_row.delete()
+            # Without its data keys any leftover ciphertext (e.g. in backups) is unreadable
+            DataKey.objects.filter(tenant_id=user_id).delete()
+
+            profile = UserProfile.objects.filter(user_id=user_id).first()
+            if profile is not None:
+                profile.organization = profile.position = profile.phone = profile.address = ''
+                profile.wallet_address = None
+                profile.role = UserProfile.UserRole.PUBLIC
+                profile.save()
+
+            user = User.objects.get(pk=user_id)
+            user.username = f'erased_{user_id}'
+            user.first_name = user.last_name = user.email = ''
+            user.is_active = user.is_staff = user.is_superuser = False
+            user.set_unusable_password()
+            user.save()
+        self._advance(job, 'account', 1)
+
+        from users.tokens import revocation_list
+        revocation_list.revoke_user(user_id)
+        self.replace_compliance_snapshots()
+
+    def replace_compliance_snapshots(self):
+        """Drop stored compliance reports and store one from the current tallies."""
+        from analytics.compliance import take_snapshot
+        from analytics.models import ComplianceReportSnapshot
+
+        ComplianceReportSnapshot.objects.all().delete()
+        take_snapshot()
+
+    def run(self, interval=5.0):
+        logger.info(f"Data subject request worker {self.worker_id} starting ({self.workers} workers)")
+        while True:
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Data subject request round failed")
+                close_old_connections()
+            time.sleep(interval)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_data_subject_service():
+    """Return the process-wide ``DataSubjectService`` configured from settings."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = DataSubjectService(
+                workers=getattr(settings, 'GDPR_WORKERS', 2),
+                chunk_size=getattr(settings, 'GDPR_CHUNK_SIZE', 1000),
+                lease=getattr(settings, 'GDPR_LEASE', 300),
+            )
+        return _service
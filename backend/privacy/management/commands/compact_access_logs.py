@@ -0,0 +1,26 @@
+"""
+Load sealed access-log segment files into the DataAccessLog table.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from privacy.accesslog import compact_segments
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load sealed DataAccessLog segment files into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds between rounds')
+        parser.add_argument('--once', action='store_true', help='Run a single round and exit')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        while True:
+            segments, records = compact_segments(batch_size=options['batch_size'])
+            if segments or options['once']:
+                self.stdout.write(self.style.SUCCESS(f'Loaded {records} record(s) from {segments} segment(s)'))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+"""
+Run the workers that claim and execute GDPR export and erasure jobs.
+"""
+from django.core.management.base import BaseCommand
+
+from privacy.gdpr import get_data_subject_service
+
+
+class Command(BaseCommand):
+    help = 'Claim queued data subject requests (and expired leases) and run them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between rounds')
+        parser.add_argument('--once', action='store_true', help='Run a single round, wait for it and exit')
+
+    def handle(self, *args, **options):
+        service = get_data_subject_service()
+        if options['once']:
+            count = service.tick()
+            service.shutdown(wait=True)
+            self.stdout.write(self.style.SUCCESS(f'Processed {count} data subject request(s)'))
+            return
+        try:
+            service.run(interval=options['interval'])
+        finally:
+            service.shutdown(wait=False)
@@ -0,0 +1,96 @@
+"""
+Rotate field encryption keys and re-encrypt data online, in chunks.
+"""
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from privacy.encryption import decrypt_value, encrypt_value, key_id_of, keyring
+from privacy.fields import EncryptedTextField
+from privacy.models import DataKey
+from products.models import Product, ProductDetail
+
+
+class Command(BaseCommand):
+    help = 'Re-wrap data keys, rotate per-tenant data keys and re-encrypt product fields in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rewrap', action='store_true',
+                            help='Re-wrap all data keys under the current master key')
+        parser.add_argument('--rotate-data-keys', action='store_true',
+                            help='Create a fresh data key for every tenant before re-encrypting')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Pause between chunks to limit load on a live database')
+
+    def handle(self, *args, **options):
+        if options['rewrap']:
+            rewrapped = sum(keyring.rewrap(data_key) for data_key in DataKey.objects.iterator())
+            self.stdout.write(f'Re-wrapped {rewrapped} data key(s)')
+
+        if options['rotate_data_keys']:
+            tenants = Product.objects.values_list('created_by_id', flat=True).distinct()
+            for tenant_id in tenants:
+                keyring.create_data_key(tenant_id)
+            self.stdout.write(f'Rotated data keys for {len(tenants)} tenant(s)')
+            # Let every worker pick up the new active keys before rows are re-encrypted under them
+            time.sleep(getattr(cache, 'sync_interval', 0))
+
+        updated = skipped = 0
+        # (queryset, fields needed to resolve each row's tenant)
+        targets = [
+            (Product.objects.all(), ['created_by_id']),
+            (ProductDetail.objects.select_related('product'), ['product__created_by_id']),
+        ]
+        for queryset, tenant_fields in targets:
+            model_updated, model_skipped = self._reencrypt_model(
+                queryset, tenant_fields, options['chunk_size'], options['sleep']
+            )
+            updated += model_updated
+            skipped += model_skipped
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-encrypted {updated} row(s); {skipped} changed concurrently and were skipped'
+        ))
+
+    def _reencrypt_model(self, queryset, tenant_fields, chunk_size, sleep):
+        model = queryset.model
+        fields = [field for field in model._meta.concrete_fields if isinstance(field, EncryptedTextField)]
+        queryset = queryset.only('pk', 'updated_at', *tenant_fields, *[field.attname for field in fields])
+        last_pk, updated, skipped = 0, 0, 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            with transaction.atomic():
+                for obj in chunk:
+                    changes = self._reencrypt(obj, fields)
+                    if not changes:
+                        continue
+                    # Only write if nobody saved the row since we read it; re-run to catch skipped rows
+                    if model.objects.filter(pk=obj.pk, updated_at=obj.updated_at).update(**changes):
+                        updated += 1
+                    else:
+                        skipped += 1
+
+            if sleep:
+                time.sleep(sleep)
+        return updated, skipped
+
+    def _reencrypt(self, obj, fields):
+        changes = {}
+        for field in fields:
+            stored = obj.__dict__.get(field.attname)
+            if not stored:
+                continue
+            tenant_id = getattr(obj, field.tenant_field)
+            active_key_id, _ = keyring.active_key(tenant_id)
+            if key_id_of(stored) == active_key_id:
+                continue
+            plaintext = decrypt_value(stored, field.encryption_context)
+            changes[field.attname] = encrypt_value(plaintext, tenant_id, field.encryption_context)
+        return changes
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('privacy', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wrapped_key', models.BinaryField(help_text='Data key encrypted with the master key')),
+                ('master_key_id', models.CharField(help_text='Master key used to wrap this key', max_length=50)),
+                ('is_active', models.BooleanField(default=True, help_text='Whether new data is encrypted with this key')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tenant', models.ForeignKey(blank=True, help_text='Owner of the data encrypted with this key (empty for shared data)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='data_keys', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Data Key',
+                'verbose_name_plural': 'Data Keys',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['tenant', 'is_active'], name='privacy_dat_tenant__48a48c_idx')],
+            },
+        ),
+    ]
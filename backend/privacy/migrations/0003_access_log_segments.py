@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('privacy', '0002_datakey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessLogSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('loaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Access Log Segment',
+                'verbose_name_plural': 'Access Log Segments',
+            },
+        ),
+        migrations.AlterField(
+            model_name='dataaccesslog',
+            name='timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
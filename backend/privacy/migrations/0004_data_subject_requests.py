@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('privacy', '0003_access_log_segments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataSubjectRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_type', models.CharField(choices=[('export', 'Subject Access Export'), ('erasure', 'Erasure')], max_length=20)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('total', models.PositiveIntegerField(default=0, help_text='Rows to process')),
+                ('processed', models.PositiveIntegerField(default=0, help_text='Rows processed so far')),
+                ('progress', models.JSONField(default=dict, help_text='Rows processed per dataset')),
+                ('archive_path', models.CharField(blank=True, help_text='Export ZIP file', max_length=500)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(help_text='User whose data is exported or erased', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='data_subject_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Data Subject Request',
+                'verbose_name_plural': 'Data Subject Requests',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
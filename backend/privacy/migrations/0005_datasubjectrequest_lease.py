@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('privacy', '0004_data_subject_requests'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasubjectrequest',
+            name='claimed_by',
+            field=models.CharField(blank=True, help_text='Worker running the job', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='datasubjectrequest',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text="While running, when the claiming worker's lease runs out", null=True),
+        ),
+    ]
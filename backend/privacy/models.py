@@ -3,6 +3,7 @@ Privacy models for GreenTrace.
 """
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -121,7 +122,8 @@ class DataAccessLog(models.Model):
     # Metadata
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     user_agent = models.TextField(blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: entries compacted from segment files keep their access time
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     class Meta:
         ordering = ['-timestamp']
@@ -130,3 +132,134 @@ class DataAccessLog(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.access_type} {self.model_name} at {self.timestamp}"
+
+
+class DataKey(models.Model):
+    """
+    Per-tenant data encryption key, stored wrapped by a master key.
+    
+    The tenant is the user owning the encrypted rows; deleting the user
+    deletes the key and makes its ciphertext unreadable.
+    """
+    
+    tenant = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='data_keys',
+        help_text=_('Owner of the data encrypted with this key (empty for shared data)')
+    )
+    wrapped_key = models.BinaryField(help_text=_('Data key encrypted with the master key'))
+    master_key_id = models.CharField(max_length=50, help_text=_('Master key used to wrap this key'))
+    is_active = models.BooleanField(default=True, help_text=_('Whether new data is encrypted with this key'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('Data Key')
+        verbose_name_plural = _('Data Keys')
+        indexes = [
+            models.Index(fields=['tenant', 'is_active']),
+        ]
+    
+    def __str__(self):
+        return f"Data key {self.pk} ({self.master_key_id})"
+
+
+class AccessLogSegment(models.Model):
+    """
+    Access-log segment file already loaded into ``DataAccessLog``.
+    
+    Written in the same transaction as the segment's rows so a segment is
+    never loaded twice, even if the compactor dies before deleting the file.
+    """
+    
+    name = models.CharField(max_length=100, unique=True)
+    records = models.PositiveIntegerField(default=0)
+    loaded_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Access Log Segment')
+        verbose_name_plural = _('Access Log Segments')
+    
+    def __str__(self):
+        return f"{self.name} ({self.records} records)"
+
+
+class DataSubjectRequest(models.Model):
+    """
+    GDPR subject-access export or erasure job, run in the background.
+    """
+    
+    class RequestType(models.TextChoices):
+        EXPORT = 'export', _('Subject Access Export')
+        ERASURE = 'erasure', _('Erasure')
+    
+    class RequestStatus(models.TextChoices):
+        QUEUED = 'queued', _('Queued')
+        RUNNING = 'running', _('Running')
+        COMPLETED = 'completed', _('Completed')
+        FAILED = 'failed', _('Failed')
+    
+    subject = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='data_subject_requests',
+        help_text=_('User whose data is exported or erased')
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    request_type = models.CharField(max_length=20, choices=RequestType.choices)
+    status = models.CharField(
+        max_length=20,
+        choices=RequestStatus.choices,
+        default=RequestStatus.QUEUED,
+        db_index=True
+    )
+    
+    # Progress
+    total = models.PositiveIntegerField(default=0, help_text=_('Rows to process'))
+    processed = models.PositiveIntegerField(default=0, help_text=_('Rows processed so far'))
+    progress = models.JSONField(default=dict, help_text=_('Rows processed per dataset'))
+    archive_path = models.CharField(max_length=500, blank=True, help_text=_('Export ZIP file'))
+    error = models.TextField(blank=True)
+    
+    # Worker lease, renewed while the job runs
+    claimed_by = models.CharField(max_length=100, blank=True, help_text=_('Worker running the job'))
+    lease_expires_at = models.DateTimeField(
+        null=True, blank=True, help_text=_("While running, when the claiming worker's lease runs out")
+    )
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('Data Subject Request')
+        verbose_name_plural = _('Data Subject Requests')
+    
+    def __str__(self):
+        return f"{self.get_request_type_display()} for user {self.subject_id} ({self.status})"
+    
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'subject_id': self.subject_id,
+            'type': self.request_type,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+        }
@@ -0,0 +1,145 @@
+"""
+GDPR job leases, erasure coverage, the request endpoint, idle access-log segments and key rotation.
+"""
+import json
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from analytics.compliance import take_snapshot
+from analytics.models import ComplianceReportSnapshot
+from products.models import Product
+from users.models import UserProfile
+from users.tokens import issue_token
+from webhooks.models import WebhookEndpoint, WebhookEvent
+from .accesslog import SegmentWriter, compact_segments, encode_record
+from .encryption import KeyRing
+from .gdpr import DataSubjectService, LeaseLost
+from .models import DataAccessLog, DataSubjectRequest
+
+
+class DataSubjectLeaseTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = User.objects.create_user('subject')
+
+    def setUp(self):
+        self.export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.export_dir.cleanup)
+        self.first, self.second = (DataSubjectService(export_dir=self.export_dir.name, lease=60) for _ in range(2))
+
+    def test_running_job_is_not_taken_over_until_its_lease_expires(self):
+        job = self.first.enqueue(self.subject.pk, DataSubjectRequest.RequestType.EXPORT)
+        self.assertTrue(self.first.claim(job.pk))
+        self.assertFalse(self.second.claim(job.pk))
+
+        DataSubjectRequest.objects.filter(pk=job.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(self.second.claim(job.pk))
+        with self.assertRaises(LeaseLost):
+            self.first.renew(job)
+
+        # The first worker gives up without touching the job or publishing an archive
+        self.first.process(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.claimed_by, job.archive_path), ('running', self.second.worker_id, ''))
+
+        self.second.process(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, DataSubjectRequest.RequestStatus.COMPLETED)
+        self.assertTrue(job.archive_path.endswith(f'subject-access-{job.pk}.zip'))
+
+    def test_erasure_removes_webhook_data_and_old_reports(self):
+        Product.objects.create(name='Coffee', batch_id='ERASE-1', created_by=self.subject)
+        WebhookEndpoint.objects.create(owner=self.subject, url='https://example.com/hook', events=['product.created'])
+        take_snapshot()
+        self.assertIn('ERASE-1', ComplianceReportSnapshot.objects.get().body)
+        self.assertTrue(WebhookEvent.objects.filter(owner=self.subject).exists())
+
+        job = self.first.enqueue(self.subject.pk, DataSubjectRequest.RequestType.ERASURE)
+        self.first.claim(job.pk)
+        # Revocations live in the shared cache and would outlast the test's rollback
+        with mock.patch('users.tokens.revocation_list.revoke_user') as revoke_user:
+            self.first.process(job.pk)
+        revoke_user.assert_called_once_with(self.subject.pk)
+
+        self.assertEqual(DataSubjectRequest.objects.get(pk=job.pk).status, DataSubjectRequest.RequestStatus.COMPLETED)
+        self.assertFalse(WebhookEvent.objects.filter(owner=self.subject).exists())
+        self.assertFalse(WebhookEndpoint.objects.filter(owner=self.subject).exists())
+        self.assertNotIn('ERASE-1', ComplianceReportSnapshot.objects.get().body)
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class DataSubjectRequestViewTests(TestCase):
+    url = '/api/privacy/requests/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('subject')
+        cls.staff = User.objects.create_user('officer', is_staff=True)
+        cls.profiles = {
+            user: UserProfile.objects.create(user=user, wallet_address='0x' + f'{n:02x}' * 20)
+            for n, user in enumerate((cls.user, cls.staff), start=1)
+        }
+
+    def post(self, data, user=None, content_type='application/json'):
+        headers = {}
+        if user is not None:
+            token, _ = issue_token(self.profiles[user])
+            headers['HTTP_AUTHORIZATION'] = f'Wallet {token}'
+        return self.client.post(self.url, json.dumps(data), content_type=content_type, **headers)
+
+    def test_session_cannot_request_erasure(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.post({'type': 'erasure'}).status_code, 401)
+        self.assertFalse(DataSubjectRequest.objects.exists())
+
+    def test_token_queues_without_running_in_the_web_process(self):
+        response = self.post({'type': 'export'}, self.user)
+        self.assertEqual(response.status_code, 202)
+        job = DataSubjectRequest.objects.get()
+        self.assertEqual((job.subject_id, job.status, job.claimed_by), (self.user.pk, 'queued', ''))
+
+    def test_rejects_other_content_types(self):
+        self.assertEqual(self.post({'type': 'export'}, self.user, content_type='text/plain').status_code, 415)
+
+    def test_staff_naming_a_missing_user(self):
+        self.assertEqual(self.post({'type': 'erasure', 'user_id': 999999}, self.staff).status_code, 404)
+        self.assertEqual(self.post({'type': 'erasure', 'user_id': 'x'}, self.staff).status_code, 400)
+        self.assertEqual(self.post({'type': 'erasure', 'user_id': self.staff.pk}, self.user).status_code, 403)
+
+
+class AccessLogSegmentTests(TestCase):
+
+    def test_idle_segment_is_sealed_and_compacted(self):
+        user = User.objects.create_user('reader')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        writer = SegmentWriter(directory.name, segment_size=4096, max_age=0.05)
+        self.addCleanup(writer.seal)
+        writer.append(encode_record(user.pk, 'view', 'products.Product', 1, ['description']))
+
+        # Nothing else is appended; the segment must still reach the compactor
+        deadline = time.monotonic() + 5
+        while not list(Path(directory.name).glob('*.seg')) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(list(Path(directory.name).glob('*.open')), [])
+        self.assertEqual(compact_segments(directory.name), (1, 1))
+        self.assertEqual(DataAccessLog.objects.get().user, user)
+
+
+class KeyRotationTests(TestCase):
+
+    def test_other_workers_encrypt_with_the_rotated_key(self):
+        tenant = User.objects.create_user('tenant')
+        worker, rotator = KeyRing(), KeyRing()
+        old_id, _ = worker.active_key(tenant.pk)
+        new_id, new_key = rotator.create_data_key(tenant.pk)
+        self.assertNotEqual(old_id, new_id)
+        self.assertEqual(worker.active_key(tenant.pk), (new_id, new_key))
@@ -0,0 +1,11 @@
+"""
+Privacy URLs.
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('requests/', views.create_data_subject_request, name='create_data_subject_request'),
+    path('requests/<int:request_id>/', views.data_subject_request_status, name='data_subject_request_status'),
+    path('requests/<int:request_id>/download/', views.download_subject_export, name='download_subject_export'),
+]
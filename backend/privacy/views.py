@@ -0,0 +1,86 @@
+"""
+Privacy views for GreenTrace (GDPR subject-access export and erasure).
+"""
+from django.contrib.auth.models import User
+from django.http import FileResponse
+from greentrace.responses import JSON_CONTENT_TYPE, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+import json
+import os
+from users.authentication import get_token_claims
+from users.tokens import InvalidWalletToken
+from .gdpr import get_data_subject_service
+from .models import DataSubjectRequest
+
+
+def _visible_request(request, request_id):
+    """The job if the caller is its subject or staff, else an error response."""
+    permissions = request.permissions
+    if permissions.user_id is None:
+        return None, JsonResponse({'error': 'Authentication required'}, status=401)
+    job = DataSubjectRequest.objects.filter(pk=request_id).first()
+    if job is None or not (permissions.is_staff or job.subject_id == permissions.user_id):
+        return None, JsonResponse({'error': 'Request not found'}, status=404)
+    return job, None
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def create_data_subject_request(request):
+    """
+    Queue an export or erasure of the caller's data (staff may name another user).
+
+    Erasure cannot be undone and the view is CSRF-exempt, so only the wallet
+    token in the Authorization header is accepted, never a session cookie.
+    """
+    try:
+        claims = get_token_claims(request)
+    except InvalidWalletToken as e:
+        return JsonResponse({'error': str(e)}, status=401)
+    if claims is None:
+        return JsonResponse({'error': 'Wallet token required'}, status=401)
+    if request.content_type != JSON_CONTENT_TYPE:
+        return JsonResponse({'error': f'Content-Type must be {JSON_CONTENT_TYPE}'}, status=415)
+    try:
+        data = json.loads(request.body or '{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    
+    request_type = data.get('type')
+    if request_type not in DataSubjectRequest.RequestType.values:
+        return JsonResponse({'error': 'type must be "export" or "erasure"'}, status=400)
+    
+    subject_id = data.get('user_id', claims['uid'])
+    if not isinstance(subject_id, int) or isinstance(subject_id, bool):
+        return JsonResponse({'error': 'user_id must be an integer'}, status=400)
+    if subject_id != claims['uid'] and not claims['staff']:
+        return JsonResponse({'error': 'Only staff can act on other users'}, status=403)
+    if not User.objects.filter(pk=subject_id).exists():
+        return JsonResponse({'error': 'User not found'}, status=404)
+    
+    job = get_data_subject_service().enqueue(subject_id, request_type, requested_by=claims['uid'])
+    return JsonResponse(job.as_dict(), status=202)
+
+
+@require_http_methods(["GET"])
+def data_subject_request_status(request, request_id):
+    """Progress of an export or erasure job."""
+    job, error = _visible_request(request, request_id)
+    if error:
+        return error
+    return JsonResponse(job.as_dict())
+
+
+@require_http_methods(["GET"])
+def download_subject_export(request, request_id):
+    """Stream a completed export archive."""
+    job, error = _visible_request(request, request_id)
+    if error:
+        return error
+    if job.request_type != DataSubjectRequest.RequestType.EXPORT or job.status != DataSubjectRequest.RequestStatus.COMPLETED:
+        return JsonResponse({'error': 'Export not ready'}, status=409)
+    if not job.archive_path or not os.path.exists(job.archive_path):
+        return JsonResponse({'error': 'Export archive no longer available'}, status=410)
+    return FileResponse(open(job.archive_path, 'rb'), as_attachment=True,
+                        filename=os.path.basename(job.archive_path))
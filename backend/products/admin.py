@@ -2,7 +2,16 @@
 Admin configuration for products app.
 """
 from django.contrib import admin
-from .models import Product
+from .models import Product, ProductAuditLog, ProductDetail
+
+
+class ProductDetailInline(admin.StackedInline):
+    """Large text fields stored in ProductDetail."""
+    
+    model = ProductDetail
+    can_delete = False
+    max_num = 1
+    classes = ['collapse']
 
 
 @admin.register(Product)
@@ -20,7 +29,12 @@ class ProductAdmin(admin.ModelAdmin):
         'is_carbon_details_public', 'created_at'
     ]
     
-    search_fields = ['name', 'batch_id', 'producer', 'description']
+    # Encrypted fields (location, producer, carbon_activity, iot_data) are not searchable
+    search_fields = ['name', 'batch_id', 'details__description']
+    
+    list_select_related = ['created_by']
+    
+    inlines = [ProductDetailInline]
     
     readonly_fields = ['created_at', 'blockchain_hash', 'blockchain_network']
     
@@ -29,7 +43,7 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('name', 'batch_id', 'certification')
         }),
         ('Private Information', {
-            'fields': ('location', 'producer', 'description', 'carbon_activity', 'iot_data'),
+            'fields': ('location', 'producer'),
             'classes': ('collapse',)
         }),
         ('Privacy Settings', {
@@ -53,3 +67,19 @@ class ProductAdmin(admin.ModelAdmin):
         if not change:  # New product
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(ProductAuditLog)
+class ProductAuditLogAdmin(admin.ModelAdmin):
+    """Admin interface for ProductAuditLog model."""
+    
+    list_display = ['__str__', 'action', 'ip_address', 'timestamp']
+    
+    list_filter = ['action', 'timestamp']
+    
+    search_fields = ['product__name', 'product__batch_id', 'user__username']
+    
+    # __str__ names the product and the user
+    list_select_related = ['product', 'user']
+    
+    readonly_fields = ['timestamp']
@@ -0,0 +1,38 @@
+"""
+Product forms for GreenTrace.
+"""
+from django import forms
+from .models import Product, ProductDetail
+
+
+class ProductForm(forms.ModelForm):
+    """Product form that also edits the fields stored in ``ProductDetail``."""
+    
+    DETAIL_FIELDS = ('description', 'carbon_activity', 'iot_data')
+    
+    description = forms.CharField(widget=forms.Textarea, required=False,
+                                  help_text=ProductDetail._meta.get_field('description').help_text)
+    carbon_activity = forms.CharField(widget=forms.Textarea, required=False,
+                                      help_text=ProductDetail._meta.get_field('carbon_activity').help_text)
+    iot_data = forms.CharField(widget=forms.Textarea, required=False,
+                               help_text=ProductDetail._meta.get_field('iot_data').help_text)
+    
+    class Meta:
+        model = Product
+        fields = [
+            'name', 'batch_id', 'certification', 'location', 'producer',
+            'description', 'carbon_activity', 'iot_data',
+            'is_sensitive_data_public', 'is_producer_details_public',
+            'is_iot_data_public', 'is_carbon_details_public'
+        ]
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            for name in self.DETAIL_FIELDS:
+                self.initial.setdefault(name, getattr(self.instance, name))
+    
+    def save(self, commit=True):
+        for name in self.DETAIL_FIELDS:
+            setattr(self.instance, name, self.cleaned_data.get(name, ''))
+        return super().save(commit)
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:15
+
+import privacy.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='carbon_activity',
+            field=privacy.fields.EncryptedTextField(blank=True, help_text='Carbon reduction activities and sustainable practices', tenant_field='created_by_id'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='iot_data',
+            field=privacy.fields.EncryptedTextField(blank=True, help_text='IoT sensor data (temperature, humidity, soil data, etc.)', tenant_field='created_by_id'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='location',
+            field=privacy.fields.EncryptedTextField(blank=True, help_text='Production location', max_length=500, tenant_field='created_by_id'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='producer',
+            field=privacy.fields.EncryptedTextField(blank=True, help_text='Producer name or organization', max_length=200, tenant_field='created_by_id'),
+        ),
+    ]
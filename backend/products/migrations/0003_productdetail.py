@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:22
+
+import django.db.models.deletion
+import privacy.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_encrypt_sensitive_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductDetail',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='details', serialize=False, to='products.product')),
+                ('description', models.TextField(blank=True, help_text='Detailed product description')),
+                ('carbon_activity', privacy.fields.EncryptedTextField(blank=True, context_label='products.Product', help_text='Carbon reduction activities and sustainable practices', tenant_field='tenant_id')),
+                ('iot_data', privacy.fields.EncryptedTextField(blank=True, context_label='products.Product', help_text='IoT sensor data (temperature, humidity, soil data, etc.)', tenant_field='tenant_id')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Product Detail',
+                'verbose_name_plural': 'Product Details',
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+"""
+Copy description, carbon_activity and iot_data into ProductDetail.
+
+Rows are copied with INSERT ... SELECT in pk-range chunks, each in its own
+transaction, so a large table is never locked for the whole copy. Values
+(including ciphertext) are copied verbatim. Re-running skips rows already
+copied.
+"""
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 1000
+COLUMNS = ('description', 'carbon_activity', 'iot_data')
+
+
+def _chunks(Product, using):
+    last_pk = 0
+    while True:
+        pks = list(
+            Product.objects.using(using).filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', flat=True)[:CHUNK_SIZE]
+        )
+        if not pks:
+            return
+        yield pks[0], pks[-1]
+        last_pk = pks[-1]
+
+
+def copy_to_details(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductDetail = apps.get_model('products', 'ProductDetail')
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    product_table = quote(Product._meta.db_table)
+    detail_table = quote(ProductDetail._meta.db_table)
+    columns = ', '.join(quote(column) for column in COLUMNS)
+
+    sql = (
+        f"INSERT INTO {detail_table} ({quote('product_id')}, {columns}, {quote('updated_at')}) "
+        f"SELECT {quote('id')}, {columns}, {quote('updated_at')} FROM {product_table} "
+        f"WHERE {quote('id')} BETWEEN %s AND %s "
+        f"AND {quote('id')} NOT IN (SELECT {quote('product_id')} FROM {detail_table})"
+    )
+    for first, last in _chunks(Product, connection.alias):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(sql, [first, last])
+
+
+def copy_from_details(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductDetail = apps.get_model('products', 'ProductDetail')
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    product_table = quote(Product._meta.db_table)
+    detail_table = quote(ProductDetail._meta.db_table)
+
+    assignments = ', '.join(
+        f"{quote(column)} = COALESCE((SELECT d.{quote(column)} FROM {detail_table} d "
+        f"WHERE d.{quote('product_id')} = {product_table}.{quote('id')}), '')"
+        for column in COLUMNS
+    )
+    sql = f"UPDATE {product_table} SET {assignments} WHERE {quote('id')} BETWEEN %s AND %s"
+    for first, last in _chunks(Product, connection.alias):
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(sql, [first, last])
+
+
+class Migration(migrations.Migration):
+
+    # Each chunk commits on its own
+    atomic = False
+
+    dependencies = [
+        ('products', '0003_productdetail'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_to_details, copy_from_details),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_move_product_details'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='product',
+            name='carbon_activity',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='description',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='iot_data',
+        ),
+    ]
@@ -0,0 +1,58 @@
+"""
+Encrypt values stored before their columns became encrypted.
+
+``0002_encrypt_sensitive_fields`` only changed the field class, so rows
+written earlier (and the details ``0004`` copied from them verbatim) are
+still plaintext. Each is sealed under its producer's data key, in pk-range
+chunks that commit on their own. Values already encrypted are left alone,
+so re-running is safe.
+"""
+from django.db import migrations, transaction
+
+from privacy.encryption import encrypt_value, is_encrypted
+
+CHUNK_SIZE = 500
+
+# model, tenant lookup, encrypted fields (context as bound by the current models)
+TARGETS = (
+    ('Product', 'created_by_id', ('location', 'producer')),
+    ('ProductDetail', 'product__created_by_id', ('carbon_activity', 'iot_data')),
+)
+
+
+def encrypt_existing_values(apps, schema_editor):
+    using = schema_editor.connection.alias
+    for model_name, tenant_lookup, fields in TARGETS:
+        model = apps.get_model('products', model_name)
+        rows = model.objects.using(using).order_by('pk')
+        last_pk = None
+        while True:
+            chunk = rows.filter(pk__gt=last_pk) if last_pk is not None else rows
+            chunk = list(chunk.values_list('pk', tenant_lookup, *fields)[:CHUNK_SIZE])
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            with transaction.atomic(using=using):
+                for pk, tenant_id, *values in chunk:
+                    changes = {
+                        field: encrypt_value(str(value), tenant_id, f'products.Product.{field}')
+                        for field, value in zip(fields, values)
+                        if value and not is_encrypted(value)
+                    }
+                    if changes:
+                        model.objects.using(using).filter(pk=pk).update(**changes)
+
+
+class Migration(migrations.Migration):
+
+    # Each chunk commits on its own
+    atomic = False
+
+    dependencies = [
+        ('products', '0005_remove_product_heavy_columns'),
+        ('privacy', '0002_datakey'),
+    ]
+
+    operations = [
+        migrations.RunPython(encrypt_existing_values, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,23 @@
 """
 Product models with privacy controls and blockchain integration.
 """
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
+from privacy.fields import EncryptedTextField
+from users.permissions import as_permission_context
+
+
+def detail_accessor(name):
+    """Property proxying ``Product.<name>`` to the lazily loaded ``ProductDetail``."""
+    def getter(self):
+        return getattr(self.get_details(), name)
+    
+    def setter(self, value):
+        setattr(self.get_details(), name, value)
+        self._details_changed = True
+    
+    return property(getter, setter, doc=f'``ProductDetail.{name}``, loaded on first access.')
 
 
 class Product(models.Model):
@@ -37,29 +51,20 @@ class Product(models.Model):
         help_text=_('Product certification type')
     )
     
-    # Private information (role-based visibility)
-    location = models.CharField(
+    # Private information (role-based visibility, encrypted at rest)
+    location = EncryptedTextField(
         max_length=500,
         blank=True,
+        tenant_field='created_by_id',
         help_text=_('Production location')
     )
-    producer = models.CharField(
+    producer = EncryptedTextField(
         max_length=200,
         blank=True,
+        tenant_field='created_by_id',
         help_text=_('Producer name or organization')
     )
-    description = models.TextField(
-        blank=True,
-        help_text=_('Detailed product description')
-    )
-    carbon_activity = models.TextField(
-        blank=True,
-        help_text=_('Carbon reduction activities and sustainable practices')
-    )
-    iot_data = models.TextField(
-        blank=True,
-        help_text=_('IoT sensor data (temperature, humidity, soil data, etc.)')
-    )
+    # description, carbon_activity and iot_data live in ProductDetail (see accessors below)
     
     # Privacy settings
     is_sensitive_data_public = models.BooleanField(
@@ -105,9 +110,51 @@ class Product(models.Model):
         verbose_name = _('Product')
         verbose_name_plural = _('Products')
     
+    # Privacy-gated fields and the flag that makes each one public
+    SENSITIVE_FIELDS = {
+        'location': 'is_sensitive_data_public',
+        'description': 'is_sensitive_data_public',
+        'producer': 'is_producer_details_public',
+        'carbon_activity': 'is_carbon_details_public',
+        'iot_data': 'is_iot_data_public',
+    }
+    
     def __str__(self):
         return f"{self.name} (Batch: {self.batch_id})"
     
+    def is_field_public(self, name):
+        """Whether the owner made sensitive field ``name`` public."""
+        return getattr(self, self.SENSITIVE_FIELDS[name])
+    
+    def save(self, *args, **kwargs):
+        """
+        Save the product, then its detail row if one of its fields was set.
+        
+        Both rows (and the webhook outbox event written on ``post_save``)
+        commit together.
+        """
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if getattr(self, '_details_changed', False):
+                details = self.get_details()
+                details.product = self
+                details.save(using=using)
+                self._details_changed = False
+    
+    def get_details(self):
+        """The ``ProductDetail`` row, queried on first use (a new one if missing)."""
+        try:
+            return self.details
+        except ProductDetail.DoesNotExist:
+            details = ProductDetail()
+            self.details = details
+            return details
+    
+    description = detail_accessor('description')
+    carbon_activity = detail_accessor('carbon_activity')
+    iot_data = detail_accessor('iot_data')
+    
     def get_public_data(self):
         """Get data that is always publicly visible."""
         return {
@@ -119,28 +166,34 @@ class Product(models.Model):
             'blockchain_hash': self.blockchain_hash,
         }
     
-    def get_private_data(self, user):
-        """Get private data based on user role and permissions."""
+    def get_private_data(self, permissions):
+        """
+        Get private data visible to the caller.
+        
+        ``permissions`` is the request's ``PermissionContext`` (``request.permissions``);
+        a ``User`` is accepted too. A field is shown if the product made it public or
+        the caller's role allows it.
+        """
+        permissions = as_permission_context(permissions)
         data = self.get_public_data()
         
-        # Add private data based on user permissions
-        if user.can_view_sensitive_data():
+        if self.is_sensitive_data_public or permissions.can_view_sensitive_data():
             data.update({
                 'location': self.location,
                 'description': self.description,
             })
         
-        if user.can_view_producer_details():
+        if self.is_producer_details_public or permissions.can_view_producer_details():
             data.update({
                 'producer': self.producer,
             })
         
-        if user.can_view_carbon_details():
+        if self.is_carbon_details_public or permissions.can_view_carbon_details():
             data.update({
                 'carbon_activity': self.carbon_activity,
             })
         
-        if user.can_view_iot_data():
+        if self.is_iot_data_public or permissions.can_view_iot_data():
             data.update({
                 'iot_data': self.iot_data,
             })
@@ -157,6 +210,52 @@ class Product(models.Model):
         }
 
 
+class ProductDetail(models.Model):
+    """
+    Large, rarely read product text, split out of ``Product``.
+    
+    List queries and admin changelists only touch the narrow ``Product``
+    table; this row is loaded when a detail view reads one of its fields.
+    """
+    
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='details'
+    )
+    description = models.TextField(
+        blank=True,
+        help_text=_('Detailed product description')
+    )
+    # Ciphertexts were written while these lived on Product; keep that context
+    carbon_activity = EncryptedTextField(
+        blank=True,
+        tenant_field='tenant_id',
+        context_label='products.Product',
+        help_text=_('Carbon reduction activities and sustainable practices')
+    )
+    iot_data = EncryptedTextField(
+        blank=True,
+        tenant_field='tenant_id',
+        context_label='products.Product',
+        help_text=_('IoT sensor data (temperature, humidity, soil data, etc.)')
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('Product Detail')
+        verbose_name_plural = _('Product Details')
+    
+    def __str__(self):
+        return f"Details for product {self.product_id}"
+    
+    @property
+    def tenant_id(self):
+        """Owner of the product, whose data key encrypts these fields."""
+        return self.product.created_by_id
+
+
 class ProductAuditLog(models.Model):
     """
     Audit log for product data access and modifications.
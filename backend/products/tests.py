@@ -0,0 +1,73 @@
+"""
+Query budgets of the product views and admin against a seeded dataset, and product creation over the API.
+"""
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blockchain.models import ChainTransaction
+from greentrace.testing import SeededTestCase
+from products.models import Product
+from users.models import UserProfile
+from users.tokens import issue_token
+
+
+class ProductViewQueryTests(SeededTestCase):
+
+    def test_product_list_for_staff(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('product_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['products']), 50)
+
+    def test_product_list_for_member(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('product_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['products'])
+
+    def test_product_detail(self):
+        product = Product.objects.order_by('pk').first()
+        for user in (self.staff, self.member):
+            with self.subTest(user=user.username):
+                self.client.force_login(user)
+                response = self.client.get(reverse('product_detail', args=[product.pk]))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['product_data']['batch_id'], product.batch_id)
+
+
+class ProductAdminQueryTests(SeededTestCase):
+
+    def test_changelists(self):
+        self.client.force_login(self.staff)
+        for name in ('admin:products_product_changelist', 'admin:products_productauditlog_changelist'):
+            with self.subTest(name):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['cl'].result_count, self.products)
+
+
+@override_settings(RATE_LIMIT_ENABLED=False, CHAIN_ANCHORING_ENABLED=True)
+class CreateProductApiTests(TestCase):
+
+    def setUp(self):
+        user = User.objects.create_user('producer')
+        token, _ = issue_token(UserProfile.objects.create(user=user, wallet_address='0x' + '01' * 20))
+        self.headers = {'HTTP_AUTHORIZATION': f'Wallet {token}'}
+
+    def create(self):
+        body = json.dumps({'name': 'Coffee', 'batch_id': 'BATCH-1', 'certification': 'organic'})
+        return self.client.post(reverse('create_product_api'), body, content_type='application/json', **self.headers)
+
+    def test_product_and_anchor_are_saved_together(self):
+        self.assertEqual(self.create().status_code, 200)
+        product = Product.objects.get(batch_id='BATCH-1')
+        self.assertTrue(ChainTransaction.objects.filter(method='addProduct', target_pk=str(product.pk)).exists())
+
+    def test_failed_anchor_leaves_no_product(self):
+        with mock.patch('products.views.anchor_product', side_effect=RuntimeError('queue down')):
+            self.assertEqual(self.create().status_code, 500)
+        self.assertFalse(Product.objects.filter(batch_id='BATCH-1').exists())
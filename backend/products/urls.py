@@ -2,11 +2,12 @@
 Product management URLs.
 """
 from django.urls import path
+from django.conf import settings
 from . import views
 
 urlpatterns = [
     # API endpoints
-    path('create/', views.create_product_api, name='create_product_api'),
+    path('create/', views.acreate_product_api if settings.ASYNC_API_VIEWS else views.create_product_api, name='create_product_api'),
     
     # Product views
     path('', views.ProductListView.as_view(), name='product_list'),
@@ -5,16 +5,52 @@ from django.views.generic import ListView, CreateView, UpdateView, DeleteView, D
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.shortcuts import redirect
-from django.http import JsonResponse
+from greentrace.responses import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import transaction
+from asgiref.sync import sync_to_async
+from .forms import ProductForm
 from .models import Product
-from users.models import UserProfile
+from blockchain.transactions import anchor_product
+from privacy.accesslog import record_request_access
+from users.authentication import resolve_request_wallet
+from users.provisioning import aensure_wallet_identity, ensure_wallet_identity
 import json
 
 
+def _product_fields(data, user):
+    return dict(
+        name=data.get('name'),
+        batch_id=data.get('batch_id'),
+        location=data.get('location', ''),
+        producer=data.get('producer', ''),
+        description=data.get('description', ''),
+        carbon_activity=data.get('carbon_activity', ''),
+        iot_data=data.get('iot_data', ''),
+        certification=data.get('certification', ''),
+        created_by=user,
+        blockchain_network=data.get('blockchain_network', 'avalanche-fuji'),
+        # Set privacy defaults based on user role
+        is_sensitive_data_public=True,
+        is_producer_details_public=True,
+        is_iot_data_public=True,
+        is_carbon_details_public=True
+    )
+
+
+def _create_product(data, user):
+    """Save the product and queue its anchoring in one transaction, so neither is left without the other."""
+    with transaction.atomic():
+        product = Product.objects.create(**_product_fields(data, user))
+        if settings.CHAIN_ANCHORING_ENABLED:
+            anchor_product(product)
+    return product
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def create_product_api(request):
@@ -22,49 +58,48 @@ def create_product_api(request):
     try:
         data = json.loads(request.body)
         
-        # Create or get user based on wallet address
-        wallet_address = data.get('wallet_address')
-        if not wallet_address:
-            return JsonResponse({'error': 'Wallet address required'}, status=400)
+        # Wallet from the session token, or the request body when tokens are optional
+        wallet_address, error = resolve_request_wallet(request, data)
+        if error:
+            return error
         
-        # Try to find existing user with this wallet address
-        try:
-            user_profile = UserProfile.objects.get(wallet_address=wallet_address)
-            user = user_profile.user
-        except UserProfile.DoesNotExist:
-            # Create new user if not found
-            username = f"user_{wallet_address[:8]}"
-            user = User.objects.create_user(
-                username=username,
-                email=f"{username}@greentrace.local",
-                password=None  # No password for wallet-based auth
-            )
-            # Create user profile
-            UserProfile.objects.create(
-                user=user,
-                wallet_address=wallet_address,
-                role='public',
-                blockchain_network=data.get('blockchain_network', 'avalanche-fuji')
-            )
+        # Resolve the wallet's user (cached, no SQL on a hit), provisioning it on first use
+        identity = ensure_wallet_identity(
+            wallet_address, network=data.get('blockchain_network', 'avalanche-fuji')
+        )
+        user = User(pk=identity.user_id)
         
         # Create the product
-        product = Product.objects.create(
-            name=data.get('name'),
-            batch_id=data.get('batch_id'),
-            location=data.get('location', ''),
-            producer=data.get('producer', ''),
-            description=data.get('description', ''),
-            carbon_activity=data.get('carbon_activity', ''),
-            iot_data=data.get('iot_data', ''),
-            certification=data.get('certification', ''),
-            created_by=user,
-            blockchain_network=data.get('blockchain_network', 'avalanche-fuji'),
-            # Set privacy defaults based on user role
-            is_sensitive_data_public=True,
-            is_producer_details_public=True,
-            is_iot_data_public=True,
-            is_carbon_details_public=True
+        product = _create_product(data, user)
+        
+        return JsonResponse({
+            'success': True,
+            'product_id': product.id,
+            'message': 'Product created successfully'
+        })
+        
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def acreate_product_api(request):
+    """Async ``create_product_api``, routed to under ASGI (ASYNC_API_VIEWS)."""
+    try:
+        data = json.loads(request.body)
+        
+        wallet_address, error = await sync_to_async(resolve_request_wallet)(request, data)
+        if error:
+            return error
+        
+        identity = await aensure_wallet_identity(
+            wallet_address, network=data.get('blockchain_network', 'avalanche-fuji')
         )
+        user = User(pk=identity.user_id)
+        
+        # Product, detail and chain transaction rows are saved together in one thread hop
+        product = await sync_to_async(_create_product)(data, user)
         
         return JsonResponse({
             'success': True,
@@ -81,13 +116,14 @@ class ProductListView(LoginRequiredMixin, ListView):
     model = Product
     template_name = 'products/product_list.html'
     context_object_name = 'products'
+    paginate_by = 50
     
     def get_queryset(self):
         """Filter products based on user role and privacy settings."""
-        queryset = Product.objects.all()
+        queryset = Product.objects.select_related('created_by')
         
         # Apply privacy filters based on user role
-        if not self.request.user.is_staff:
+        if not self.request.permissions.is_staff:
             # Regular users see only public data
             queryset = queryset.filter(
                 is_sensitive_data_public=True,
@@ -103,12 +139,7 @@ class ProductCreateView(LoginRequiredMixin, CreateView):
     """Create new product."""
     model = Product
     template_name = 'products/product_form.html'
-    fields = [
-        'name', 'batch_id', 'certification', 'location', 'producer',
-        'description', 'carbon_activity', 'iot_data',
-        'is_sensitive_data_public', 'is_producer_details_public',
-        'is_iot_data_public', 'is_carbon_details_public'
-    ]
+    form_class = ProductForm
     success_url = reverse_lazy('product_list')
     
     def form_valid(self, form):
@@ -122,11 +153,22 @@ class ProductDetailView(LoginRequiredMixin, DetailView):
     model = Product
     template_name = 'products/product_detail.html'
     context_object_name = 'product'
+    queryset = Product.objects.select_related('details')
     
     def get_context_data(self, **kwargs):
         """Add privacy context for template."""
         context = super().get_context_data(**kwargs)
-        context['user_can_see_all'] = self.request.user.is_staff
+        context['user_can_see_all'] = self.request.permissions.can_view_all
+        context['product_data'] = self.object.get_private_data(self.request.permissions)
+        
+        # Log which sensitive fields were revealed (appended to a segment file, not inserted)
+        revealed = [name for name in Product.SENSITIVE_FIELDS if name in context['product_data']]
+        public = all(self.object.is_field_public(name) for name in revealed)
+        record_request_access(
+            self.request, self.object, revealed,
+            privacy_level='public' if public else 'private',
+            data_sensitivity='low' if public else 'high',
+        )
         return context
 
 
@@ -134,12 +176,7 @@ class ProductUpdateView(LoginRequiredMixin, UpdateView):
     """Update existing product."""
     model = Product
     template_name = 'products/product_form.html'
-    fields = [
-        'name', 'batch_id', 'certification', 'location', 'producer',
-        'description', 'carbon_activity', 'iot_data',
-        'is_sensitive_data_public', 'is_producer_details_public',
-        'is_iot_data_public', 'is_carbon_details_public'
-    ]
+    form_class = ProductForm
     success_url = reverse_lazy('product_list')
 
 
@@ -1,15 +1,24 @@
 #!/usr/bin/env python
+"""
+Start GreenTrace under gunicorn (configured by gunicorn.conf.py).
+
+    python start.py               # serve
+    python start.py --bootstrap   # migrate, create the default admin, collect static, then serve
+    python start.py --asgi        # serve greentrace.asgi with uvicorn workers (async API views)
+    python start.py --workers     # also run the background workers (manage.py run_workers) alongside
+
+Bootstrapping is opt-in so restarts and worker reloads don't re-run it.
+``--workers`` is for single-instance deploys whose database is a local
+file, where the workers cannot run anywhere else.
+"""
 import os
 import sys
 import subprocess
 
-def main():
-    # Set environment variables
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'greentrace.settings')
-    
+def bootstrap():
     # Run database migrations
     print("Running database migrations...")
-    subprocess.run([sys.executable, 'manage.py', 'migrate'], check=True)
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput'], check=True)
     
     # Create a superuser if it doesn't exist
     print("Creating admin user...")
@@ -27,11 +36,26 @@ else:
     # Collect static files
     print("Collecting static files...")
     subprocess.run([sys.executable, 'manage.py', 'collectstatic', '--noinput'], check=True)
+
+def main():
+    # Set environment variables
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'greentrace.settings')
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    
+    if '--bootstrap' in sys.argv[1:]:
+        bootstrap()
+    
+    if '--workers' in sys.argv[1:]:
+        print("Starting background workers...")
+        subprocess.Popen([sys.executable, 'manage.py', 'run_workers'])
     
-    # Start the server
-    print("Starting Django server...")
-    port = os.environ.get('PORT', '8000')
-    subprocess.run([sys.executable, 'manage.py', 'runserver', f'0.0.0.0:{port}'], check=True)
+    # Replace this process with the gunicorn master so it receives signals directly
+    if '--asgi' in sys.argv[1:]:
+        print("Starting gunicorn (ASGI)...")
+        os.environ.setdefault('GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker')
+        os.execvp('gunicorn', ['gunicorn', 'greentrace.asgi:application'])
+    print("Starting gunicorn...")
+    os.execvp('gunicorn', ['gunicorn', 'greentrace.wsgi:application'])
 
 if __name__ == '__main__':
     main()
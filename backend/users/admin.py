@@ -25,6 +25,8 @@ class UserAdmin(BaseUserAdmin):
     
     list_filter = ['is_staff', 'is_superuser', 'is_active', 'groups']
     
+    list_select_related = ['profile']
+    
     def get_role(self, obj):
         """Get user role from profile."""
         try:
@@ -52,6 +54,8 @@ class UserProfileAdmin(admin.ModelAdmin):
     
     search_fields = ['user__username', 'user__email', 'organization']
     
+    list_select_related = ['user']
+    
     readonly_fields = ['created_at', 'updated_at']
     
     fieldsets = (
@@ -0,0 +1,83 @@
+"""
+Wallet token authentication for GreenTrace.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from greentrace.responses import JsonResponse
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .tokens import InvalidWalletToken, decode_token
+from .wallets import normalize_wallet_address
+
+TOKEN_KEYWORDS = (b'wallet', b'bearer')
+
+
+def get_token_claims(request):
+    """
+    Return the claims of the request's wallet token, or ``None`` if it sent none.
+
+    Raises ``InvalidWalletToken`` for a token that is present but not valid.
+    """
+    header = get_authorization_header(request).split()
+    if not header or header[0].lower() not in TOKEN_KEYWORDS:
+        return None
+    if len(header) != 2:
+        raise InvalidWalletToken('Malformed Authorization header')
+    return decode_token(header[1].decode())
+
+
+def user_from_claims(claims):
+    """Build an unsaved ``User`` carrying the token's identity; no query is made."""
+    user = User(id=claims['uid'], username=claims['usr'], is_staff=claims['staff'], is_active=True)
+    user.wallet_claims = claims
+    return user
+
+
+def resolve_request_wallet(request, data):
+    """
+    Work out which wallet a JSON API request acts for.
+
+    Returns ``(wallet_address, None)`` or ``(None, error_response)``. A valid
+    token wins over the body; a body address that disagrees with the token
+    is rejected. Without a token the request is refused, unless
+    ``WALLET_TOKEN_REQUIRED`` is turned off (local development) and the body
+    names a wallet.
+    """
+    try:
+        claims = get_token_claims(request)
+    except InvalidWalletToken as e:
+        return None, JsonResponse({'error': str(e)}, status=401)
+
+    body_wallet = normalize_wallet_address(data.get('wallet_address'))
+    if claims is not None:
+        if body_wallet and body_wallet != claims['wal']:
+            return None, JsonResponse({'error': 'Wallet address does not match token'}, status=403)
+        request.wallet_claims = claims
+        return claims['wal'], None
+
+    if getattr(settings, 'WALLET_TOKEN_REQUIRED', True):
+        return None, JsonResponse({'error': 'Wallet token required'}, status=401)
+    if not body_wallet:
+        return None, JsonResponse({'error': 'Wallet address required'}, status=400)
+    return body_wallet, None
+
+
+class WalletTokenAuthentication(BaseAuthentication):
+    """
+    DRF authentication for ``Authorization: Wallet <token>`` (or ``Bearer``).
+
+    Validation is signature + expiry + in-memory revocation check only.
+    """
+
+    def authenticate(self, request):
+        try:
+            claims = get_token_claims(request)
+        except InvalidWalletToken as e:
+            raise AuthenticationFailed(str(e))
+        if claims is None:
+            return None
+        return user_from_claims(claims), claims
+
+    def authenticate_header(self, request):
+        return 'Wallet'
@@ -0,0 +1,154 @@
+"""
+Minimal Ethereum signature helpers (keccak-256 and ``personal_sign`` recovery).
+
+Pure Python so wallet sign-in needs no extra dependencies. Only used once
+per sign-in, so speed is not a concern.
+"""
+
+_ROUND_CONSTANTS = [
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+]
+_ROTATIONS = [
+    [0, 36, 3, 41, 18],
+    [1, 44, 10, 45, 2],
+    [62, 6, 43, 15, 61],
+    [28, 55, 25, 21, 56],
+    [27, 20, 39, 8, 14],
+]
+_MASK = (1 << 64) - 1
+
+
+def _rotl(value, shift):
+    return ((value << shift) | (value >> (64 - shift))) & _MASK if shift else value
+
+
+def _keccak_f(state):
+    for rc in _ROUND_CONSTANTS:
+        c = [state[x][0] ^ state[x][1] ^ state[x][2] ^ state[x][3] ^ state[x][4] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ _rotl(c[(x + 1) % 5], 1) for x in range(5)]
+        state = [[state[x][y] ^ d[x] for y in range(5)] for x in range(5)]
+
+        b = [[0] * 5 for _ in range(5)]
+        for x in range(5):
+            for y in range(5):
+                b[y][(2 * x + 3 * y) % 5] = _rotl(state[x][y], _ROTATIONS[x][y])
+
+        state = [[b[x][y] ^ (~b[(x + 1) % 5][y] & b[(x + 2) % 5][y]) for y in range(5)] for x in range(5)]
+        state[0][0] ^= rc
+    return state
+
+
+def keccak256(data):
+    """Ethereum's keccak-256 (original Keccak padding, not NIST SHA3-256)."""
+    return _sponge(data, 0x01)
+
+
+def _sponge(data, suffix):
+    """Keccak[c=512] with 256-bit output; ``suffix`` 0x06 gives NIST SHA3-256."""
+    rate = 136
+    padded = bytearray(data) + bytes([suffix])
+    padded += b'\x00' * (-len(padded) % rate)
+    padded[-1] |= 0x80
+
+    state = [[0] * 5 for _ in range(5)]
+    for offset in range(0, len(padded), rate):
+        block = padded[offset:offset + rate]
+        for i in range(rate // 8):
+            x, y = i % 5, i // 5
+            state[x][y] ^= int.from_bytes(block[8 * i:8 * i + 8], 'little')
+        state = _keccak_f(state)
+
+    return b''.join(state[i % 5][i // 5].to_bytes(8, 'little') for i in range(4))
+
+
+# secp256k1 curve parameters
+_P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+_G = (
+    0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+    0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8,
+)
+
+
+def _point_add(p, q):
+    if p is None:
+        return q
+    if q is None:
+        return p
+    if p[0] == q[0] and (p[1] + q[1]) % _P == 0:
+        return None
+    if p == q:
+        slope = 3 * p[0] * p[0] * pow(2 * p[1], -1, _P)
+    else:
+        slope = (q[1] - p[1]) * pow(q[0] - p[0], -1, _P)
+    x = (slope * slope - p[0] - q[0]) % _P
+    return x, (slope * (p[0] - x) - p[1]) % _P
+
+
+def _point_mul(point, scalar):
+    result = None
+    while scalar:
+        if scalar & 1:
+            result = _point_add(result, point)
+        point = _point_add(point, point)
+        scalar >>= 1
+    return result
+
+
+def public_key_to_address(point):
+    raw = point[0].to_bytes(32, 'big') + point[1].to_bytes(32, 'big')
+    return '0x' + keccak256(raw)[-20:].hex()
+
+
+def personal_message_hash(message):
+    """Hash that ``personal_sign`` / ``eth_sign`` signs for ``message``."""
+    if isinstance(message, str):
+        message = message.encode()
+    return keccak256(b'\x19Ethereum Signed Message:\n' + str(len(message)).encode() + message)
+
+
+def recover_address(message_hash, signature):
+    """Recover the lower-case signer address from a 65-byte ``r || s || v`` signature."""
+    if isinstance(signature, str):
+        signature = bytes.fromhex(signature[2:] if signature.startswith('0x') else signature)
+    if len(signature) != 65:
+        raise ValueError('Signature must be 65 bytes')
+
+    r = int.from_bytes(signature[:32], 'big')
+    s = int.from_bytes(signature[32:64], 'big')
+    v = signature[64]
+    if v >= 27:
+        v -= 27
+    # Only low-s signatures (EIP-2): (r, N - s) with the other v recovers the same signer
+    if v not in (0, 1) or not (0 < r < _N and 0 < s <= _N // 2):
+        raise ValueError('Invalid signature')
+
+    y_squared = (pow(r, 3, _P) + 7) % _P
+    y = pow(y_squared, (_P + 1) // 4, _P)
+    if (y * y) % _P != y_squared:
+        raise ValueError('Invalid signature')
+    if y % 2 != v:
+        y = _P - y
+
+    z = int.from_bytes(message_hash, 'big')
+    r_inverse = pow(r, -1, _N)
+    point = _point_add(
+        _point_mul((r, y), s * r_inverse % _N),
+        _point_mul(_G, (-z * r_inverse) % _N),
+    )
+    if point is None:
+        raise ValueError('Invalid signature')
+    return public_key_to_address(point)
+
+
+def verify_personal_signature(address, message, signature):
+    """True if ``signature`` over ``message`` was produced by ``address``."""
+    try:
+        return recover_address(personal_message_hash(message), signature) == address.lower()
+    except ValueError:
+        return False
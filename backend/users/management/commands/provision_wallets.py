@@ -0,0 +1,36 @@
+"""
+Bulk-provision wallet users from a file of addresses (one per line).
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import UserProfile
+from users.provisioning import WalletConflict, bulk_provision_wallets
+
+
+class Command(BaseCommand):
+    help = 'Create users and profiles for many wallet addresses in one run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="File with one wallet address per line ('-' for stdin)")
+        parser.add_argument('--network', default='avalanche-fuji')
+        parser.add_argument('--role', default=UserProfile.UserRole.PUBLIC, choices=UserProfile.UserRole.values)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        stream = sys.stdin if options['file'] == '-' else open(options['file'])
+        with stream:
+            addresses = [line.strip() for line in stream if line.strip()]
+
+        try:
+            identities = bulk_provision_wallets(
+                addresses,
+                network=options['network'],
+                role=options['role'],
+                batch_size=options['batch_size'],
+            )
+        except WalletConflict as e:
+            self.stdout.write(self.style.SUCCESS(f'Provisioned {len(e.identities)} wallet(s)'))
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Provisioned {len(identities)} wallet(s)'))
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def normalize_wallet_addresses(apps, schema_editor):
+    """
+    Lower-case stored addresses; empty values become NULL.
+
+    Profiles whose addresses only differ in case or whitespace would break
+    the unique index. Picking a winner would silently detach the others from
+    their wallets, so the migration stops and lists them for a manual merge.
+    """
+    UserProfile = apps.get_model('users', 'UserProfile')
+    profiles = defaultdict(list)
+    for profile in UserProfile.objects.order_by('id').only('id', 'user_id', 'wallet_address').iterator():
+        address = (profile.wallet_address or '').strip().lower() or None
+        profiles[address].append(profile)
+
+    conflicts = {address: rows for address, rows in profiles.items() if address and len(rows) > 1}
+    if conflicts:
+        lines = [
+            f"  {address}: " + ', '.join(
+                f"profile {row.id} (user {row.user_id}, stored {row.wallet_address!r})" for row in rows
+            )
+            for address, rows in sorted(conflicts.items())
+        ]
+        raise RuntimeError(
+            f"{len(conflicts)} wallet address(es) are shared by several profiles once lower-cased. "
+            "Clear or merge all but one profile per address, then migrate again:\n" + '\n'.join(lines)
+        )
+
+    for address, rows in profiles.items():
+        for profile in rows:
+            if address != profile.wallet_address:
+                UserProfile.objects.filter(pk=profile.pk).update(wallet_address=address)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='wallet_address',
+            field=models.CharField(blank=True, help_text='Blockchain wallet address (stored lower-case)', max_length=42, null=True),
+        ),
+        migrations.RunPython(normalize_wallet_addresses, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='wallet_address',
+            field=models.CharField(blank=True, help_text='Blockchain wallet address (stored lower-case)', max_length=42, null=True, unique=True),
+        ),
+    ]
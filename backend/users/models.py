@@ -4,6 +4,72 @@ User models for GreenTrace.
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
+from .wallets import normalize_wallet_address
+
+# What a viewer of each role may see of other users' products (see PRIVACY_SOLUTION.md).
+# A user's PrivacySettings row can only narrow this, never widen it.
+ROLE_VIEWER_ACCESS = {
+    'public': {
+        'show_sensitive_data': False,
+        'show_producer_details': False,
+        'show_iot_data': False,
+        'show_carbon_details': False,
+        'show_certification_details': False
+    },
+    'private': {
+        'show_sensitive_data': True,
+        'show_producer_details': True,
+        'show_iot_data': False,
+        'show_carbon_details': True,
+        'show_certification_details': True
+    },
+    'enterprise': {
+        'show_sensitive_data': True,
+        'show_producer_details': True,
+        'show_iot_data': True,
+        'show_carbon_details': True,
+        'show_certification_details': True
+    },
+    'admin': {
+        'show_sensitive_data': True,
+        'show_producer_details': True,
+        'show_iot_data': True,
+        'show_carbon_details': True,
+        'show_certification_details': True
+    },
+}
+
+# What an owner of each role shares by default (``UserProfile.get_privacy_settings``)
+ROLE_PRIVACY_SETTINGS = {
+    'public': {
+        'show_sensitive_data': True,
+        'show_producer_details': True,
+        'show_iot_data': True,
+        'show_carbon_details': True,
+        'show_certification_details': True
+    },
+    'private': {
+        'show_sensitive_data': False,
+        'show_producer_details': False,
+        'show_iot_data': False,
+        'show_carbon_details': True,
+        'show_certification_details': True
+    },
+    'enterprise': {
+        'show_sensitive_data': False,
+        'show_producer_details': False,
+        'show_iot_data': False,
+        'show_carbon_details': False,
+        'show_certification_details': False
+    },
+    'admin': {
+        'show_sensitive_data': True,
+        'show_producer_details': True,
+        'show_iot_data': True,
+        'show_carbon_details': True,
+        'show_certification_details': True
+    },
+}
 
 
 class UserProfile(models.Model):
@@ -44,8 +110,10 @@ class UserProfile(models.Model):
     # Blockchain integration
     wallet_address = models.CharField(
         max_length=42,
+        unique=True,
+        null=True,
         blank=True,
-        help_text=_('Blockchain wallet address')
+        help_text=_('Blockchain wallet address (stored lower-case)')
     )
     blockchain_network = models.CharField(
         max_length=50,
@@ -64,37 +132,12 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.role}"
     
+    def save(self, *args, **kwargs):
+        """Store wallet addresses in canonical lower-case form."""
+        self.wallet_address = normalize_wallet_address(self.wallet_address)
+        super().save(*args, **kwargs)
+    
     def get_privacy_settings(self):
         """Get privacy settings based on user role."""
-        if self.role == self.UserRole.PUBLIC:
-            return {
-                'show_sensitive_data': True,
-                'show_producer_details': True,
-                'show_iot_data': True,
-                'show_carbon_details': True,
-                'show_certification_details': True
-            }
-        elif self.role == self.UserRole.PRIVATE:
-            return {
-                'show_sensitive_data': False,
-                'show_producer_details': False,
-                'show_iot_data': False,
-                'show_carbon_details': True,
-                'show_certification_details': True
-            }
-        elif self.role == self.UserRole.ENTERPRISE:
-            return {
-                'show_sensitive_data': False,
-                'show_producer_details': False,
-                'show_iot_data': False,
-                'show_carbon_details': False,
-                'show_certification_details': False
-            }
-        else:  # ADMIN
-            return {
-                'show_sensitive_data': True,
-                'show_producer_details': True,
-                'show_iot_data': True,
-                'show_carbon_details': True,
-                'show_certification_details': True
-            }
+        return dict(ROLE_PRIVACY_SETTINGS.get(self.role, ROLE_PRIVACY_SETTINGS['admin']))
+
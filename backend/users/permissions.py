@@ -0,0 +1,116 @@
+"""
+Per-request permission context for GreenTrace.
+
+The caller's role (through ``ROLE_VIEWER_ACCESS``), ``PrivacySettings``
+restrictions and staff flag are resolved once into an immutable
+``PermissionContext``. It is taken from the wallet token when one is sent
+(no queries), otherwise from a short-lived per-user cache entry invalidated
+whenever the inputs change.
+"""
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .tokens import PERMISSION_FLAGS, InvalidWalletToken, permission_mask
+
+CONTEXT_CACHE_PREFIX = 'perm-context:v2:'
+ALL_PERMISSIONS = (1 << len(PERMISSION_FLAGS)) - 1
+
+
+class PermissionContext(NamedTuple):
+    """What the current caller may see; ``mask`` bits follow ``PERMISSION_FLAGS``."""
+    user_id: Optional[int]
+    role: str
+    is_staff: bool
+    mask: int
+
+    def allows(self, flag):
+        return self.is_staff or bool(self.mask & (1 << PERMISSION_FLAGS.index(flag)))
+
+    @property
+    def can_view_all(self):
+        return self.is_staff or self.mask == ALL_PERMISSIONS
+
+    def can_view_sensitive_data(self):
+        return self.allows('show_sensitive_data')
+
+    def can_view_producer_details(self):
+        return self.allows('show_producer_details')
+
+    def can_view_iot_data(self):
+        return self.allows('show_iot_data')
+
+    def can_view_carbon_details(self):
+        return self.allows('show_carbon_details')
+
+    def can_view_certification_details(self):
+        return self.allows('show_certification_details')
+
+
+ANONYMOUS = PermissionContext(None, 'anonymous', False, 0)
+
+
+def build_permission_context(user_id, role, is_staff, overrides=None):
+    """
+    Combine the role's viewer access with the user's ``PrivacySettings`` into a context.
+
+    ``overrides`` can only switch flags off; an unknown role sees nothing.
+    """
+    from .models import ROLE_VIEWER_ACCESS
+
+    flags = dict(ROLE_VIEWER_ACCESS.get(role, {}))
+    if overrides:
+        for flag, allowed in overrides.items():
+            flags[flag] = flags.get(flag, False) and bool(allowed)
+    return PermissionContext(user_id, role, is_staff, permission_mask(flags))
+
+
+def context_for_user(user):
+    """Permission context for an authenticated ``User``, cached per user."""
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+
+    key = CONTEXT_CACHE_PREFIX + str(user.pk)
+    context = cache.get(key)
+    if context is not None:
+        return PermissionContext(*context)
+
+    from privacy.models import PrivacySettings
+    from .models import UserProfile
+
+    role = UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first()
+    overrides = PrivacySettings.objects.filter(user_id=user.pk).values(*PERMISSION_FLAGS).first()
+    context = build_permission_context(
+        user.pk, role or UserProfile.UserRole.PUBLIC, user.is_staff, overrides
+    )
+    cache.set(key, tuple(context), getattr(settings, 'PERMISSION_CONTEXT_TTL', 300))
+    return context
+
+
+def invalidate_permission_context(user_id):
+    cache.delete(CONTEXT_CACHE_PREFIX + str(user_id))
+
+
+def get_permission_context(request):
+    """Resolve the context for ``request`` from its wallet token or session user."""
+    from .authentication import get_token_claims
+
+    claims = getattr(request, 'wallet_claims', None)
+    if claims is None:
+        try:
+            claims = get_token_claims(request)
+        except InvalidWalletToken:
+            claims = None
+    if claims is not None:
+        return PermissionContext(claims['uid'], claims['role'], claims['staff'], claims['perm'])
+    return context_for_user(getattr(request, 'user', None))
+
+
+def as_permission_context(subject):
+    """Accept a ``PermissionContext``, a request or a ``User`` and return a context."""
+    if isinstance(subject, PermissionContext):
+        return subject
+    if hasattr(subject, 'permissions') and isinstance(subject.permissions, PermissionContext):
+        return subject.permissions
+    return context_for_user(subject)
@@ -0,0 +1,177 @@
+"""
+Wallet user provisioning for GreenTrace.
+
+Creates the ``User`` and ``UserProfile`` for a wallet in one transaction.
+Usernames derive from the full normalized address, so they never collide
+between wallets; concurrent first requests for the same wallet race on the
+unique constraints and the loser simply reads the winner's row. A wallet
+``User`` that exists without a profile is reused rather than duplicated;
+one whose profile has since moved to another address raises
+``WalletConflict``.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from .models import UserProfile
+from .wallets import (
+    WalletIdentity, aget_profile_by_wallet, aresolve_wallet, get_profile_by_wallet,
+    normalize_wallet_address, resolve_wallet, wallet_cache,
+)
+
+
+class WalletConflict(ValueError):
+    """
+    Wallets whose ``wallet_<hex>`` user already has a profile under another address.
+
+    ``addresses`` lists them; from ``bulk_provision_wallets``, ``identities``
+    holds the wallets that were provisioned.
+    """
+
+    def __init__(self, addresses, identities=None):
+        self.addresses = list(addresses)
+        self.identities = identities or {}
+        super().__init__(
+            f"{len(self.addresses)} wallet(s) not provisioned, their user already has a profile for "
+            f"another address: {', '.join(self.addresses[:10])}{' ...' if len(self.addresses) > 10 else ''}"
+        )
+
+
+def wallet_username(address):
+    """Deterministic, collision-free username for a normalized wallet address."""
+    if address.startswith('0x') and len(address) <= 42:
+        return f"wallet_{address[2:]}"
+    return f"wallet_{hashlib.sha256(address.encode()).hexdigest()[:40]}"
+
+
+def _new_user(address):
+    username = wallet_username(address)
+    # Wallet users sign in with their wallet, never with a password
+    return User(username=username, email=f"{username}@wallet.local", password=make_password(None))
+
+
+def provision_wallet(address, network='avalanche-fuji', role=UserProfile.UserRole.PUBLIC):
+    """
+    Return ``(profile, created)`` for ``address``, creating user and profile if needed.
+
+    Safe under concurrent calls for the same wallet. Raises ``WalletConflict``
+    if the wallet's user already has a profile for another address.
+    """
+    address = normalize_wallet_address(address)
+    if address is None:
+        raise ValueError('Wallet address required')
+
+    try:
+        return get_profile_by_wallet(address), False
+    except UserProfile.DoesNotExist:
+        pass
+
+    try:
+        with transaction.atomic():
+            # A wallet user left without a profile (deleted profile, partial import) gets one attached
+            user = User.objects.filter(username=wallet_username(address)).first()
+            if user is None:
+                user = _new_user(address)
+                user.save()
+            profile = UserProfile.objects.create(
+                user=user,
+                wallet_address=address,
+                role=role,
+                blockchain_network=network,
+            )
+        return profile, True
+    except IntegrityError:
+        # Another request provisioned this wallet first, or its user has a profile elsewhere
+        try:
+            return get_profile_by_wallet(address), False
+        except UserProfile.DoesNotExist:
+            raise WalletConflict([address])
+
+
+async def aprovision_wallet(address, network='avalanche-fuji', role=UserProfile.UserRole.PUBLIC):
+    """Async ``provision_wallet``; only the first-use insert runs in a thread."""
+    try:
+        return await aget_profile_by_wallet(address), False
+    except UserProfile.DoesNotExist:
+        pass
+    return await sync_to_async(provision_wallet)(address, network=network, role=role)
+
+
+def ensure_wallet_identity(address, network='avalanche-fuji'):
+    """Resolve ``address`` to a ``WalletIdentity``, provisioning the wallet on first use."""
+    identity = resolve_wallet(address)
+    if identity is not None:
+        return identity
+    profile, _ = provision_wallet(address, network=network)
+    return WalletIdentity(profile.user_id, profile.pk, profile.role)
+
+
+async def aensure_wallet_identity(address, network='avalanche-fuji'):
+    """Async ``ensure_wallet_identity``."""
+    identity = await aresolve_wallet(address)
+    if identity is not None:
+        return identity
+    profile, _ = await sync_to_async(provision_wallet)(address, network=network)
+    return WalletIdentity(profile.user_id, profile.pk, profile.role)
+
+
+def bulk_provision_wallets(addresses, network='avalanche-fuji', role=UserProfile.UserRole.PUBLIC, batch_size=1000):
+    """
+    Provision many wallets at once; returns ``{address: WalletIdentity}``.
+
+    Existing wallets are left untouched. Each chunk is one transaction of
+    bulk inserts that ignore conflicts, so re-runs and concurrent callers
+    are harmless. Every wallet is re-read after the insert; any whose user
+    already has a profile for another address is not provisioned, and once
+    all chunks are done ``WalletConflict`` names them.
+    """
+    normalized = list(dict.fromkeys(
+        address for address in map(normalize_wallet_address, addresses) if address
+    ))
+    identities = {}
+    conflicts = []
+
+    for start in range(0, len(normalized), batch_size):
+        chunk = normalized[start:start + batch_size]
+        existing = {
+            wallet: WalletIdentity(user_id, profile_id, profile_role)
+            for wallet, user_id, profile_id, profile_role in UserProfile.objects.filter(
+                wallet_address__in=chunk
+            ).values_list('wallet_address', 'user_id', 'id', 'role')
+        }
+        missing = [address for address in chunk if address not in existing]
+
+        if missing:
+            with transaction.atomic():
+                User.objects.bulk_create([_new_user(address) for address in missing], ignore_conflicts=True)
+                user_ids = dict(User.objects.filter(
+                    username__in=[wallet_username(address) for address in missing]
+                ).values_list('username', 'id'))
+                UserProfile.objects.bulk_create([
+                    UserProfile(
+                        user_id=user_ids[wallet_username(address)],
+                        wallet_address=address,
+                        role=role,
+                        blockchain_network=network,
+                    )
+                    for address in missing
+                ], ignore_conflicts=True)
+            existing.update({
+                wallet: WalletIdentity(user_id, profile_id, profile_role)
+                for wallet, user_id, profile_id, profile_role in UserProfile.objects.filter(
+                    wallet_address__in=missing
+                ).values_list('wallet_address', 'user_id', 'id', 'role')
+            })
+            # The profile insert skipped these: their user's one profile has another address
+            conflicts.extend(address for address in missing if address not in existing)
+
+        for address, identity in existing.items():
+            wallet_cache.set(address, identity)
+        identities.update(existing)
+
+    if conflicts:
+        raise WalletConflict(conflicts, identities)
+    return identities
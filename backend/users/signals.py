@@ -0,0 +1,55 @@
+"""
+Signal handlers for the users app.
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from privacy.models import PrivacySettings
+from .models import UserProfile
+from .permissions import invalidate_permission_context
+from .tokens import revocation_list
+from .wallets import wallet_cache
+
+
+@receiver(pre_save, sender=UserProfile)
+def remember_previous_state(sender, instance, **kwargs):
+    """Keep the stored address and role so changes can evict caches and tokens."""
+    if instance.pk:
+        previous = UserProfile.objects.filter(pk=instance.pk).values_list('wallet_address', 'role').first()
+        if previous:
+            instance._previous_wallet_address, instance._previous_role = previous
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_wallet_cache(sender, instance, **kwargs):
+    """Evict cached wallet identities when a profile changes or is removed."""
+    for address in {instance.wallet_address, getattr(instance, '_previous_wallet_address', None)}:
+        if address:
+            wallet_cache.invalidate(address)
+
+
+@receiver(post_save, sender=UserProfile)
+def revoke_tokens_on_role_change(sender, instance, created, **kwargs):
+    """Tokens carry the role, so a role change must revoke the ones already issued."""
+    previous_role = getattr(instance, '_previous_role', None)
+    if not created and previous_role is not None and previous_role != instance.role:
+        revocation_list.revoke_user(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=PrivacySettings)
+@receiver(post_delete, sender=PrivacySettings)
+def invalidate_cached_permissions(sender, instance, **kwargs):
+    """Drop the cached permission context when role, overrides or staff status change."""
+    invalidate_permission_context(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(post_save, sender=PrivacySettings)
+@receiver(post_delete, sender=PrivacySettings)
+def revoke_tokens_on_override_change(sender, instance, **kwargs):
+    """Tokens carry the permission mask, so override changes revoke the ones already issued."""
+    revocation_list.revoke_user(instance.user_id)
@@ -0,0 +1,139 @@
+"""
+Query budgets of the user admin against a seeded dataset, signature recovery, sign-in challenges,
+wallet cache invalidation and provisioning conflicts.
+"""
+import hashlib
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from greentrace.testing import SeededTestCase
+from . import eth
+from .models import UserProfile
+from .provisioning import WalletConflict, bulk_provision_wallets, provision_wallet, wallet_username
+from .tokens import consume_challenge, issue_challenge
+from .wallets import WalletCache, WalletIdentity
+
+# web3.js ``accounts.sign('Some data', '0x4c0883a6...362318')``
+SIGNER = '0x2c7536e3605d9c16a7a3d7b1898e529396a65c23'
+SIGNATURE = bytes.fromhex(
+    'b91467e570a6466aa9e9876cbcd013baba02900b8979d43fe208a4a4f339f5fd'
+    '6007e74cd82e037b800186422fc2da167c747ef045e5d18a5f5d4300f8e1a029'
+    '1c'
+)
+
+
+class UserAdminQueryTests(SeededTestCase):
+
+    def test_changelists(self):
+        self.client.force_login(self.staff)
+        for name in ('admin:auth_user_changelist', 'admin:users_userprofile_changelist'):
+            with self.subTest(name):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                self.assertGreaterEqual(response.context['cl'].result_count, 10)
+
+
+class EthSignatureTests(SimpleTestCase):
+
+    def test_keccak_vectors(self):
+        self.assertEqual(eth.keccak256(b'').hex(), 'c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470')
+        self.assertEqual(eth.keccak256(b'abc').hex(), '4e03657aea45a94fc7d47ba826c8d667c0d1e6e33a64a036ec44f58fa12d6c45')
+        self.assertEqual(
+            eth.keccak256(b'The quick brown fox jumps over the lazy dog').hex(),
+            '4d741b6f1eb29cb2a9b9911c82f56fa8d73b04959d3d9d222895df6c0b28aa15',
+        )
+
+    def test_permutation_matches_sha3_across_block_boundaries(self):
+        # Same sponge with NIST padding must match hashlib's SHA3-256
+        data = bytes(range(256)) * 2
+        for length in (0, 1, 135, 136, 137, 271, 272, 500):
+            with self.subTest(length=length):
+                self.assertEqual(eth._sponge(data[:length], 0x06), hashlib.sha3_256(data[:length]).digest())
+
+    def test_recovers_signer(self):
+        message_hash = eth.personal_message_hash('Some data')
+        self.assertEqual(message_hash.hex(), '1da44b586eb0729ff70a73c326926f6ed5a25f5b056e7f47fbc6e58d86871655')
+        self.assertEqual(eth.recover_address(message_hash, '0x' + SIGNATURE.hex()), SIGNER)
+        self.assertTrue(eth.verify_personal_signature('0x2C7536E3605D9C16a7a3D7b1898e529396a65c23', 'Some data', SIGNATURE))
+        self.assertFalse(eth.verify_personal_signature(SIGNER, 'Other data', SIGNATURE))
+
+    def test_rejects_malleable_and_out_of_range_signatures(self):
+        r, s, v = SIGNATURE[:32], int.from_bytes(SIGNATURE[32:64], 'big'), SIGNATURE[64]
+        high_s = r + (eth._N - s).to_bytes(32, 'big') + bytes([v ^ 1])
+        invalid = {
+            'high s': high_s,
+            'r zero': bytes(32) + SIGNATURE[32:],
+            'r >= n': eth._N.to_bytes(32, 'big') + SIGNATURE[32:],
+            's zero': r + bytes(32) + SIGNATURE[64:],
+            's >= n': r + eth._N.to_bytes(32, 'big') + SIGNATURE[64:],
+            'bad v': SIGNATURE[:64] + bytes([29]),
+            'short': SIGNATURE[:64],
+        }
+        message_hash = eth.personal_message_hash('Some data')
+        for name, signature in invalid.items():
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    eth.recover_address(message_hash, signature)
+                self.assertFalse(eth.verify_personal_signature(SIGNER, 'Some data', signature))
+
+
+class WalletChallengeTests(TestCase):
+
+    def test_challenges_for_one_address_do_not_replace_each_other(self):
+        first_nonce, first = issue_challenge(SIGNER)
+        second_nonce, second = issue_challenge(SIGNER)
+        self.assertEqual(consume_challenge(SIGNER, first_nonce), first)
+        self.assertEqual(consume_challenge(SIGNER, second_nonce), second)
+
+    def test_challenge_is_redeemed_once(self):
+        nonce, message = issue_challenge(SIGNER)
+        self.assertIsNone(consume_challenge(SIGNER, 'other-nonce'))
+        # A concurrent request that read the message first still loses the one-shot marker
+        with mock.patch('users.tokens.cache.delete'):
+            self.assertEqual(consume_challenge(SIGNER, nonce), message)
+            self.assertIsNone(consume_challenge(SIGNER, nonce))
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_body_wallet_is_not_trusted_without_a_token(self):
+        body = json.dumps({'wallet_address': SIGNER})
+        response = self.client.post(reverse('check_wallet_auth'), body, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+
+class WalletCacheTests(TestCase):
+
+    def test_profile_save_evicts_the_wallet_in_other_processes(self):
+        user = User.objects.create_user('grower')
+        profile = UserProfile.objects.create(user=user, wallet_address=SIGNER)
+        identity = WalletIdentity(user.pk, profile.pk, profile.role)
+        other_process = WalletCache(refresh_interval=0)
+        other_process.set(SIGNER, identity)
+        self.assertEqual(other_process.get(SIGNER), identity)
+
+        profile.save()
+        self.assertIsNone(other_process.get(SIGNER))
+
+
+class WalletProvisioningTests(TestCase):
+    moved = '0x' + 'aa' * 20
+    fresh = '0x' + 'bb' * 20
+
+    def setUp(self):
+        # The wallet user of ``moved`` whose profile now holds another address
+        user = User.objects.create_user(wallet_username(self.moved))
+        UserProfile.objects.create(user=user, wallet_address='0x' + 'cc' * 20)
+
+    def test_bulk_names_wallets_it_could_not_provision(self):
+        with self.assertRaises(WalletConflict) as raised:
+            bulk_provision_wallets([self.moved, self.fresh])
+        self.assertEqual(raised.exception.addresses, [self.moved])
+        self.assertEqual(list(raised.exception.identities), [self.fresh])
+        self.assertFalse(UserProfile.objects.filter(wallet_address=self.moved).exists())
+
+    def test_single_wallet_conflict(self):
+        with self.assertRaises(WalletConflict):
+            provision_wallet(self.moved)
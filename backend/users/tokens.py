@@ -0,0 +1,173 @@
+"""
+Stateless wallet session tokens.
+
+A wallet proves ownership once by signing a one-time challenge; it then gets a
+short-lived token signed with ``SECRET_KEY`` that carries the user id, role
+and permission mask. Validating a token needs no database access; revoked
+token ids are checked against an in-memory list shared through the cache.
+"""
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from .wallets import normalize_wallet_address
+
+TOKEN_SALT = 'greentrace.wallet-token.v2'
+CHALLENGE_CACHE_PREFIX = 'wallet-challenge:'
+REVOCATION_CACHE_KEY = 'wallet-token:revocations'
+
+# Bit order of the permission mask carried in tokens
+PERMISSION_FLAGS = (
+    'show_sensitive_data',
+    'show_producer_details',
+    'show_iot_data',
+    'show_carbon_details',
+    'show_certification_details',
+)
+
+
+class InvalidWalletToken(Exception):
+    """Raised when a wallet token is malformed, expired or revoked."""
+
+
+def permission_mask(privacy_settings):
+    """Pack a ``get_privacy_settings()`` dict into an int bit mask."""
+    return sum(1 << bit for bit, flag in enumerate(PERMISSION_FLAGS) if privacy_settings.get(flag))
+
+
+def permissions_from_mask(mask):
+    """Unpack a permission mask into a ``{flag: bool}`` dict."""
+    return {flag: bool(mask & (1 << bit)) for bit, flag in enumerate(PERMISSION_FLAGS)}
+
+
+def _challenge_key(address, nonce):
+    return f'{CHALLENGE_CACHE_PREFIX}{normalize_wallet_address(address)}:{nonce}'
+
+
+def issue_challenge(address):
+    """
+    Create and remember a one-time sign-in message for ``address``; returns ``(nonce, message)``.
+
+    Each challenge is stored under its own nonce, so requesting one for an
+    address never replaces a challenge someone else is about to sign.
+    """
+    address = normalize_wallet_address(address)
+    nonce = secrets.token_hex(16)
+    message = f"Sign in to GreenTrace\nWallet: {address}\nNonce: {nonce}"
+    cache.set(_challenge_key(address, nonce), message, getattr(settings, 'WALLET_CHALLENGE_TTL', 300))
+    return nonce, message
+
+
+def consume_challenge(address, nonce):
+    """
+    Return and forget the pending challenge ``nonce`` for ``address`` (``None`` if absent, expired or used).
+
+    The first caller to add the challenge's used-marker wins (``add`` is
+    atomic in the shared cache), so concurrent requests can't both redeem it.
+    """
+    if not nonce or not isinstance(nonce, str):
+        return None
+    key = _challenge_key(address, nonce)
+    message = cache.get(key)
+    if message is None or not cache.add(f'{key}:used', True, getattr(settings, 'WALLET_CHALLENGE_TTL', 300)):
+        return None
+    cache.delete(key)
+    return message
+
+
+def issue_token(profile):
+    """Sign a session token for ``profile``; returns ``(token, claims)``."""
+    from .permissions import context_for_user
+
+    permissions = context_for_user(profile.user)
+    claims = {
+        'uid': profile.user_id,
+        'pid': profile.pk,
+        'usr': profile.user.username,
+        'wal': profile.wallet_address,
+        'role': profile.role,
+        'perm': permissions.mask,
+        'staff': profile.user.is_staff,
+        'jti': secrets.token_urlsafe(12),
+        'iat': int(time.time()),
+    }
+    return signing.dumps(claims, salt=TOKEN_SALT, compress=True), claims
+
+
+def decode_token(token):
+    """Validate ``token`` and return its claims; raises ``InvalidWalletToken``."""
+    try:
+        claims = signing.loads(token, salt=TOKEN_SALT, max_age=getattr(settings, 'WALLET_TOKEN_TTL', 900))
+    except signing.SignatureExpired:
+        raise InvalidWalletToken('Token expired')
+    except signing.BadSignature:
+        raise InvalidWalletToken('Invalid token')
+    if revocation_list.is_revoked(claims):
+        raise InvalidWalletToken('Token revoked')
+    return claims
+
+
+class TokenRevocationList:
+    """
+    Revoked token ids and per-user cut-offs, held in memory.
+
+    Entries are mirrored to the cache and re-read at most every
+    ``refresh_interval`` seconds so other workers pick them up.
+    """
+
+    def __init__(self, refresh_interval=5, clock=time.time):
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._tokens = {}
+        self._users = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        ttl = getattr(settings, 'WALLET_TOKEN_TTL', 900)
+        self._tokens = {jti: expires for jti, expires in self._tokens.items() if expires > now}
+        self._users = {uid: cutoff for uid, cutoff in self._users.items() if cutoff + ttl > now}
+
+    def _refresh(self, now):
+        shared = cache.get(REVOCATION_CACHE_KEY) or {}
+        self._tokens.update(shared.get('tokens', {}))
+        self._users.update(shared.get('users', {}))
+        self._prune(now)
+        self._loaded_at = now
+
+    def _publish(self):
+        cache.set(REVOCATION_CACHE_KEY, {'tokens': self._tokens, 'users': self._users},
+                  getattr(settings, 'WALLET_TOKEN_TTL', 900))
+
+    def revoke(self, claims):
+        """Revoke a single token until it would have expired anyway."""
+        with self._lock:
+            now = self.clock()
+            self._refresh(now)
+            self._tokens[claims['jti']] = claims['iat'] + getattr(settings, 'WALLET_TOKEN_TTL', 900)
+            self._publish()
+
+    def revoke_user(self, user_id):
+        """Revoke every token issued to ``user_id`` up to now."""
+        with self._lock:
+            now = self.clock()
+            self._refresh(now)
+            self._users[str(user_id)] = int(now)
+            self._publish()
+
+    def is_revoked(self, claims):
+        now = self.clock()
+        if now - self._loaded_at > self.refresh_interval:
+            with self._lock:
+                self._refresh(now)
+        if claims['jti'] in self._tokens:
+            return True
+        cutoff = self._users.get(str(claims['uid']))
+        return cutoff is not None and claims['iat'] <= cutoff
+
+
+revocation_list = TokenRevocationList()
@@ -2,6 +2,7 @@
 User authentication and management URLs.
 """
 from django.urls import path
+from django.conf import settings
 from django.contrib.auth import views as auth_views
 from . import views
 
@@ -14,6 +15,9 @@ urlpatterns = [
     path('profile/', views.profile_view, name='profile'),
     
     # API endpoints
-    path('check/', views.check_wallet_auth, name='check_wallet_auth'),
-    path('update/', views.update_profile, name='update_profile'),
+    path('check/', views.acheck_wallet_auth if settings.ASYNC_API_VIEWS else views.check_wallet_auth, name='check_wallet_auth'),
+    path('update/', views.aupdate_profile if settings.ASYNC_API_VIEWS else views.update_profile, name='update_profile'),
+    path('challenge/', views.awallet_challenge if settings.ASYNC_API_VIEWS else views.wallet_challenge, name='wallet_challenge'),
+    path('token/', views.awallet_token if settings.ASYNC_API_VIEWS else views.wallet_token, name='wallet_token'),
+    path('token/revoke/', views.arevoke_wallet_token if settings.ASYNC_API_VIEWS else views.revoke_wallet_token, name='revoke_wallet_token'),
 ]
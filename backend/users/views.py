@@ -3,12 +3,36 @@ User views for GreenTrace.
 """
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from greentrace.responses import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.models import User
+from django.conf import settings
+from asgiref.sync import sync_to_async
 import json
+from .authentication import get_token_claims, resolve_request_wallet
+from .eth import verify_personal_signature
 from .models import UserProfile
+from .provisioning import aprovision_wallet, provision_wallet
+from .tokens import InvalidWalletToken, consume_challenge, issue_challenge, issue_token, revocation_list
+from .wallets import aget_profile_by_wallet, get_profile_by_wallet, normalize_wallet_address
+
+
+def _wallet_user_data(profile, created):
+    user_data = {
+        'username': profile.user.username,
+        'email': profile.user.email,
+        'role': profile.role,
+        'organization': profile.organization,
+        'position': profile.position,
+        'wallet_address': profile.wallet_address,
+        'blockchain_network': profile.blockchain_network,
+        'privacy_level': profile.privacy_level,
+        'is_authenticated': True
+    }
+    if created:
+        user_data['new_user'] = True
+    return user_data
 
 
 @csrf_exempt
@@ -17,56 +41,16 @@ def check_wallet_auth(request):
     """Check wallet authentication and return user role."""
     try:
         data = json.loads(request.body)
-        wallet_address = data.get('wallet_address')
         network = data.get('network', 'avalanche-fuji')
         
-        if not wallet_address:
-            return JsonResponse({'error': 'Wallet address required'}, status=400)
+        # Wallet from the session token, or the request body when tokens are optional
+        wallet_address, error = resolve_request_wallet(request, data)
+        if error:
+            return error
         
-        # Try to find user by wallet address
-        try:
-            profile = UserProfile.objects.get(wallet_address=wallet_address)
-            user_data = {
-                'username': profile.user.username,
-                'email': profile.user.email,
-                'role': profile.role,
-                'organization': profile.organization,
-                'position': profile.position,
-                'wallet_address': profile.wallet_address,
-                'blockchain_network': profile.blockchain_network,
-                'privacy_level': profile.privacy_level,
-                'is_authenticated': True
-            }
-            return JsonResponse(user_data)
-        except UserProfile.DoesNotExist:
-            # Create a new user profile for this wallet address
-            # In production, you'd want more validation here
-            user = User.objects.create_user(
-                username=f"wallet_{wallet_address[:8]}",
-                email=f"{wallet_address[:8]}@wallet.local",
-                password="wallet_auth_placeholder"
-            )
-            
-            profile = UserProfile.objects.create(
-                user=user,
-                role='public',  # Default role
-                wallet_address=wallet_address,
-                blockchain_network=network
-            )
-            
-            user_data = {
-                'username': profile.user.username,
-                'email': profile.user.email,
-                'role': profile.role,
-                'organization': profile.organization,
-                'position': profile.position,
-                'wallet_address': profile.wallet_address,
-                'blockchain_network': profile.blockchain_network,
-                'privacy_level': profile.privacy_level,
-                'is_authenticated': True,
-                'new_user': True
-            }
-            return JsonResponse(user_data)
+        # Find or atomically create the user for this wallet address
+        profile, created = provision_wallet(wallet_address, network=network)
+        return JsonResponse(_wallet_user_data(profile, created))
             
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
@@ -95,13 +79,12 @@ def update_profile(request):
     """Update user profile."""
     try:
         data = json.loads(request.body)
-        wallet_address = data.get('wallet_address')
-        
-        if not wallet_address:
-            return JsonResponse({'error': 'Wallet address required'}, status=400)
+        wallet_address, error = resolve_request_wallet(request, data)
+        if error:
+            return error
         
         try:
-            profile = UserProfile.objects.get(wallet_address=wallet_address)
+            profile = get_profile_by_wallet(wallet_address)
             
             # Update profile fields
             if 'organization' in data:
@@ -133,3 +116,211 @@ def update_profile(request):
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def wallet_challenge(request):
+    """Issue a one-time message for the wallet to sign."""
+    try:
+        data = json.loads(request.body)
+        wallet_address = normalize_wallet_address(data.get('wallet_address'))
+        
+        if not wallet_address:
+            return JsonResponse({'error': 'Wallet address required'}, status=400)
+        
+        nonce, message = issue_challenge(wallet_address)
+        return JsonResponse({
+            'message': message,
+            'nonce': nonce,
+            'expires_in': settings.WALLET_CHALLENGE_TTL
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def wallet_token(request):
+    """Verify a signed challenge and issue a short-lived session token."""
+    try:
+        data = json.loads(request.body)
+        wallet_address = normalize_wallet_address(data.get('wallet_address'))
+        signature = data.get('signature')
+        nonce = data.get('nonce')
+        
+        if not wallet_address or not signature or not nonce:
+            return JsonResponse({'error': 'Wallet address, signature and challenge nonce required'}, status=400)
+        
+        message = consume_challenge(wallet_address, nonce)
+        if message is None:
+            return JsonResponse({'error': 'No pending challenge with this nonce for this wallet'}, status=401)
+        if not verify_personal_signature(wallet_address, message, signature):
+            return JsonResponse({'error': 'Invalid signature'}, status=401)
+        
+        profile, created = provision_wallet(wallet_address, network=data.get('network', 'avalanche-fuji'))
+        token, claims = issue_token(profile)
+        return JsonResponse({
+            'token': token,
+            'token_type': 'Wallet',
+            'expires_in': settings.WALLET_TOKEN_TTL,
+            'role': claims['role'],
+            'new_user': created
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def revoke_wallet_token(request):
+    """Revoke the token sent in the Authorization header."""
+    try:
+        claims = get_token_claims(request)
+    except InvalidWalletToken as e:
+        return JsonResponse({'error': str(e)}, status=401)
+    if claims is None:
+        return JsonResponse({'error': 'Wallet token required'}, status=401)
+    
+    revocation_list.revoke(claims)
+    return JsonResponse({'message': 'Token revoked'})
+
+
+# Async versions of the JSON API views, routed to under ASGI (ASYNC_API_VIEWS)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def acheck_wallet_auth(request):
+    """Async ``check_wallet_auth``."""
+    try:
+        data = json.loads(request.body)
+        network = data.get('network', 'avalanche-fuji')
+        
+        wallet_address, error = await sync_to_async(resolve_request_wallet)(request, data)
+        if error:
+            return error
+        
+        profile, created = await aprovision_wallet(wallet_address, network=network)
+        return JsonResponse(_wallet_user_data(profile, created))
+            
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def aupdate_profile(request):
+    """Async ``update_profile``."""
+    try:
+        data = json.loads(request.body)
+        wallet_address, error = await sync_to_async(resolve_request_wallet)(request, data)
+        if error:
+            return error
+        
+        try:
+            profile = await aget_profile_by_wallet(wallet_address)
+        except UserProfile.DoesNotExist:
+            return JsonResponse({'error': 'User profile not found'}, status=404)
+        
+        for field in ('organization', 'position', 'phone', 'address'):
+            if field in data:
+                setattr(profile, field, data[field])
+        await profile.asave()
+        
+        return JsonResponse({
+            'message': 'Profile updated successfully',
+            'profile': {
+                'username': profile.user.username,
+                'role': profile.role,
+                'organization': profile.organization,
+                'position': profile.position,
+                'wallet_address': profile.wallet_address
+            }
+        })
+            
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def awallet_challenge(request):
+    """Async ``wallet_challenge``."""
+    try:
+        data = json.loads(request.body)
+        wallet_address = normalize_wallet_address(data.get('wallet_address'))
+        
+        if not wallet_address:
+            return JsonResponse({'error': 'Wallet address required'}, status=400)
+        
+        nonce, message = await sync_to_async(issue_challenge)(wallet_address)
+        return JsonResponse({
+            'message': message,
+            'nonce': nonce,
+            'expires_in': settings.WALLET_CHALLENGE_TTL
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def awallet_token(request):
+    """Async ``wallet_token``; signature recovery runs off the event loop."""
+    try:
+        data = json.loads(request.body)
+        wallet_address = normalize_wallet_address(data.get('wallet_address'))
+        signature = data.get('signature')
+        nonce = data.get('nonce')
+        
+        if not wallet_address or not signature or not nonce:
+            return JsonResponse({'error': 'Wallet address, signature and challenge nonce required'}, status=400)
+        
+        message = await sync_to_async(consume_challenge)(wallet_address, nonce)
+        if message is None:
+            return JsonResponse({'error': 'No pending challenge with this nonce for this wallet'}, status=401)
+        verified = await sync_to_async(verify_personal_signature, thread_sensitive=False)(
+            wallet_address, message, signature
+        )
+        if not verified:
+            return JsonResponse({'error': 'Invalid signature'}, status=401)
+        
+        profile, created = await aprovision_wallet(wallet_address, network=data.get('network', 'avalanche-fuji'))
+        token, claims = await sync_to_async(issue_token)(profile)
+        return JsonResponse({
+            'token': token,
+            'token_type': 'Wallet',
+            'expires_in': settings.WALLET_TOKEN_TTL,
+            'role': claims['role'],
+            'new_user': created
+        })
+        
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def arevoke_wallet_token(request):
+    """Async ``revoke_wallet_token``."""
+    try:
+        claims = get_token_claims(request)
+    except InvalidWalletToken as e:
+        return JsonResponse({'error': str(e)}, status=401)
+    if claims is None:
+        return JsonResponse({'error': 'Wallet token required'}, status=401)
+    
+    await sync_to_async(revocation_list.revoke)(claims)
+    return JsonResponse({'message': 'Token revoked'})
@@ -0,0 +1,203 @@
+"""
+Wallet identity resolution for GreenTrace.
+
+Wallet addresses are stored lower-cased so checksummed and plain forms map
+to one profile. ``resolve_wallet`` answers "who is this wallet?" from a
+bounded in-process LRU, so the hot path costs no SQL after the first hit.
+Invalidations go through the shared cache, so every worker drops a changed
+wallet within ``WALLET_CACHE_REFRESH_INTERVAL``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+INVALIDATION_SEQUENCE_KEY = 'wallet-cache:sequence'
+INVALIDATION_KEY = 'wallet-cache:invalidated:{}'
+# Beyond this many missed invalidations the LRU is simply cleared
+MAX_REPLAY = 1000
+
+
+class WalletIdentity(NamedTuple):
+    """Cached identity for a wallet address."""
+    user_id: int
+    profile_id: int
+    role: str
+
+
+def normalize_wallet_address(address):
+    """Canonical form of a wallet address: stripped and lower-cased, or ``None`` if empty."""
+    if address is None:
+        return None
+    address = str(address).strip().lower()
+    return address or None
+
+
+class WalletCache:
+    """
+    Thread-safe LRU of wallet address to ``WalletIdentity`` with a TTL.
+
+    Entries live in this process. ``invalidate`` also appends the address to
+    a numbered log in the shared cache, which every process replays at most
+    every ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, max_size=10000, ttl=60, refresh_interval=1.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = None
+        self._refreshed_at = float('-inf')
+        self._refresh_lock = threading.Lock()
+
+    def _refresh(self):
+        """Drop the wallets other processes invalidated since the last check."""
+        now = self.clock()
+        if now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._refresh_lock:
+            if now - self._refreshed_at < self.refresh_interval:
+                return
+            self._refreshed_at = now
+            sequence = cache.get(INVALIDATION_SEQUENCE_KEY) or 0
+            previous, self._sequence = self._sequence, sequence
+            if previous is None or sequence == previous:
+                return
+            missed = range(previous + 1, sequence + 1)
+            records = {}
+            if 0 < len(missed) <= MAX_REPLAY:
+                records = cache.get_many([INVALIDATION_KEY.format(n) for n in missed])
+            with self._lock:
+                if len(records) < len(missed) or not missed:
+                    # Log reset, too far behind or expired: we can't tell which wallets changed
+                    self._entries.clear()
+                    return
+                for address in records.values():
+                    self._entries.pop(address, None)
+
+    def get(self, address):
+        self._refresh()
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is None:
+                return None
+            identity, expires = entry
+            if expires < self.clock():
+                del self._entries[address]
+                return None
+            self._entries.move_to_end(address)
+            return identity
+
+    def set(self, address, identity):
+        self._refresh()
+        with self._lock:
+            self._entries[address] = (identity, self.clock() + self.ttl)
+            self._entries.move_to_end(address)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, address):
+        """Evict ``address`` here and, through the shared cache, in every other process."""
+        with self._lock:
+            self._entries.pop(address, None)
+        try:
+            sequence = cache.incr(INVALIDATION_SEQUENCE_KEY)
+        except ValueError:
+            cache.add(INVALIDATION_SEQUENCE_KEY, 0, None)
+            sequence = cache.incr(INVALIDATION_SEQUENCE_KEY)
+        # Entries cached before the change have expired by the time the record does
+        cache.set(INVALIDATION_KEY.format(sequence), address, self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+wallet_cache = WalletCache(
+    max_size=getattr(settings, 'WALLET_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'WALLET_CACHE_TTL', 60),
+    refresh_interval=getattr(settings, 'WALLET_CACHE_REFRESH_INTERVAL', 1.0),
+)
+
+
+def resolve_wallet(address):
+    """Return the ``WalletIdentity`` for ``address``, or ``None`` if no profile has it."""
+    from .models import UserProfile
+
+    address = normalize_wallet_address(address)
+    if address is None:
+        return None
+
+    identity = wallet_cache.get(address)
+    if identity is not None:
+        return identity
+
+    row = UserProfile.objects.filter(wallet_address=address).values_list('user_id', 'id', 'role').first()
+    if row is None:
+        return None
+    identity = WalletIdentity(*row)
+    wallet_cache.set(address, identity)
+    return identity
+
+
+async def aresolve_wallet(address):
+    """Async ``resolve_wallet``: cache hits only leave the event loop for the periodic invalidation check."""
+    from .models import UserProfile
+
+    address = normalize_wallet_address(address)
+    if address is None:
+        return None
+
+    identity = wallet_cache.get(address)
+    if identity is not None:
+        return identity
+
+    row = await UserProfile.objects.filter(wallet_address=address).values_list('user_id', 'id', 'role').afirst()
+    if row is None:
+        return None
+    identity = WalletIdentity(*row)
+    wallet_cache.set(address, identity)
+    return identity
+
+
+def get_profile_by_wallet(address):
+    """Fetch the full profile (with its user) for ``address``; raises ``DoesNotExist``."""
+    from .models import UserProfile
+
+    address = normalize_wallet_address(address)
+    if address is None:
+        raise UserProfile.DoesNotExist('Wallet address required')
+    return UserProfile.objects.select_related('user').get(wallet_address=address)
+
+
+async def aget_profile_by_wallet(address):
+    """Async ``get_profile_by_wallet``."""
+    from .models import UserProfile
+
+    address = normalize_wallet_address(address)
+    if address is None:
+        raise UserProfile.DoesNotExist('Wallet address required')
+    return await UserProfile.objects.select_related('user').aget(wallet_address=address)
+
+
+def warm_wallet_cache(limit):
+    """Preload the ``limit`` most recently active wallets; returns how many were cached."""
+    from .models import UserProfile
+
+    rows = UserProfile.objects.exclude(wallet_address=None).order_by('-updated_at').values_list(
+        'wallet_address', 'user_id', 'id', 'role'
+    )[:limit]
+    count = 0
+    for address, *identity in rows:
+        wallet_cache.set(address, WalletIdentity(*identity))
+        count += 1
+    return count
@@ -0,0 +1,48 @@
+"""
+Admin configuration for webhooks app.
+"""
+from django.contrib import admin
+from .models import WebhookDelivery, WebhookEndpoint
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    """Admin interface for WebhookEndpoint model."""
+    
+    list_display = ['url', 'owner', 'is_active', 'max_concurrency', 'consecutive_failures', 'last_success_at']
+    
+    list_filter = ['is_active', 'created_at']
+    
+    list_select_related = ['owner']
+    
+    search_fields = ['url', 'owner__username']
+    
+    exclude = ['secret']
+    
+    readonly_fields = ['consecutive_failures', 'last_success_at', 'created_at', 'updated_at']
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    """Admin interface for WebhookDelivery model."""
+    
+    list_display = ['event', 'endpoint', 'status', 'attempts', 'last_status_code', 'next_attempt_at', 'delivered_at']
+    
+    list_filter = ['status']
+    
+    list_select_related = ['event', 'endpoint']
+    
+    search_fields = ['endpoint__url', 'event__event_type']
+    
+    readonly_fields = ['endpoint', 'event', 'attempts', 'last_status_code', 'last_error', 'delivered_at']
+    
+    actions = ['retry_now']
+    
+    @admin.action(description='Retry selected deliveries now')
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+        
+        updated = queryset.exclude(status=WebhookDelivery.DeliveryStatus.DELIVERED).update(
+            status=WebhookDelivery.DeliveryStatus.PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} deliveries queued for retry.')
@@ -0,0 +1,278 @@
+"""
+Webhook dispatcher: delivers outbox events to partner endpoints.
+
+Each round (``tick``):
+
+1. Fan-out: undispatched ``WebhookEvent`` rows become one ``WebhookDelivery``
+   per active endpoint of the owner subscribed to the event type.
+2. Due deliveries are grouped by endpoint into batches of up to
+   ``batch_size`` events, sent as one signed POST each::
+
+       {"events": [{"id": ..., "event": ..., "timestamp": ..., "data": {...}}, ...]}
+
+   Batches run concurrently on one event loop, at most ``max_concurrency``
+   per endpoint (a slow partner only holds its own slots) and
+   ``max_connections`` overall.
+3. A 2xx response marks the batch delivered. Anything else (status,
+   timeout, connection error) reschedules it with exponential backoff and
+   jitter, until ``max_attempts`` marks it failed.
+
+Delivery is at least once and not ordered across batches; receivers
+deduplicate on the event ``id``. Run a single dispatcher
+(``run_webhook_dispatcher``); selected deliveries are leased for the
+request timeout so an overlapping ``--once`` run does not resend them.
+"""
+import asyncio
+import ipaddress
+import json
+import logging
+import random
+import socket
+import ssl
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import signing
+from .models import WebhookDelivery, WebhookEndpoint, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'GreenTrace-Webhooks/1.0'
+
+
+class DeliveryError(Exception):
+    pass
+
+
+def backoff(attempts, base, maximum):
+    """Delay before retry number ``attempts`` (1-based): exponential, capped, with jitter."""
+    delay = min(maximum, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def resolve_address(host, port, allow_private):
+    """An address for ``host``, refusing internal networks unless ``allow_private``."""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    if not infos:
+        raise DeliveryError(f'Cannot resolve {host}')
+    address = infos[0][4][0]
+    if not allow_private:
+        ip = ipaddress.ip_address(address)
+        if not ip.is_global or ip.is_multicast:
+            raise DeliveryError(f'{host} resolves to non-public address {address}')
+    return address
+
+
+async def post(url, body, headers, timeout, allow_private=False):
+    """POST ``body`` over HTTP/1.1 and return the status code."""
+    parts = urlsplit(url)
+    secure = parts.scheme == 'https'
+    port = parts.port or (443 if secure else 80)
+    path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    host_header = parts.hostname if parts.port is None else f'{parts.hostname}:{parts.port}'
+
+    async def exchange():
+        # Connect to the checked address, so DNS cannot change between check and connect
+        address = await resolve_address(parts.hostname, port, allow_private)
+        context = ssl.create_default_context() if secure else None
+        reader, writer = await asyncio.open_connection(
+            address, port, ssl=context, server_hostname=parts.hostname if secure else None
+        )
+        try:
+            head = [
+                f'POST {path} HTTP/1.1',
+                f'Host: {host_header}',
+                f'User-Agent: {USER_AGENT}',
+                'Content-Type: application/json',
+                f'Content-Length: {len(body)}',
+                'Connection: close',
+                *(f'{name}: {value}' for name, value in headers.items()),
+            ]
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            try:
+                return int(status_line.split()[1])
+            except (IndexError, ValueError):
+                raise DeliveryError(f'Malformed response: {status_line[:80]!r}')
+        finally:
+            writer.close()
+
+    try:
+        return await asyncio.wait_for(exchange(), timeout)
+    except asyncio.TimeoutError:
+        raise DeliveryError(f'Timed out after {timeout}s')
+    except OSError as exc:
+        raise DeliveryError(str(exc) or type(exc).__name__)
+
+
+class WebhookDispatcher:
+    """Fans out outbox events and delivers them in signed batches."""
+
+    def __init__(self, batch_size=None, max_connections=None, timeout=None, max_attempts=None,
+                 base_delay=None, max_delay=None, retention_days=None, allow_private_hosts=None):
+        option = lambda value, name: getattr(settings, name) if value is None else value
+        self.batch_size = option(batch_size, 'WEBHOOK_BATCH_SIZE')
+        self.max_connections = option(max_connections, 'WEBHOOK_MAX_CONNECTIONS')
+        self.timeout = option(timeout, 'WEBHOOK_TIMEOUT')
+        self.max_attempts = option(max_attempts, 'WEBHOOK_MAX_ATTEMPTS')
+        self.base_delay = option(base_delay, 'WEBHOOK_RETRY_BASE_DELAY')
+        self.max_delay = option(max_delay, 'WEBHOOK_RETRY_MAX_DELAY')
+        self.retention_days = option(retention_days, 'WEBHOOK_RETENTION_DAYS')
+        self.allow_private_hosts = option(allow_private_hosts, 'WEBHOOK_ALLOW_PRIVATE_HOSTS')
+        self._last_prune = 0.0
+
+    def fan_out(self, limit=5000):
+        """Create deliveries for undispatched events; returns how many events were dispatched."""
+        with transaction.atomic():
+            events = list(WebhookEvent.objects.filter(dispatched=False).order_by('created_at')[:limit])
+            if not events:
+                return 0
+            endpoints = defaultdict(list)
+            for endpoint in WebhookEndpoint.objects.filter(
+                owner_id__in={event.owner_id for event in events}, is_active=True
+            ).only('id', 'owner_id', 'events'):
+                endpoints[endpoint.owner_id].append(endpoint)
+            WebhookDelivery.objects.bulk_create([
+                WebhookDelivery(endpoint_id=endpoint.id, event_id=event.id)
+                for event in events
+                for endpoint in endpoints[event.owner_id]
+                if event.event_type in endpoint.events
+            ], batch_size=500, ignore_conflicts=True)
+            WebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(dispatched=True)
+        return len(events)
+
+    def claim_batches(self, limit=1000):
+        """Due deliveries as ``[(endpoint, [delivery, ...]), ...]``, leased for the send."""
+        now = timezone.now()
+        with transaction.atomic():
+            due = list(
+                WebhookDelivery.objects.filter(
+                    status=WebhookDelivery.DeliveryStatus.PENDING,
+                    next_attempt_at__lte=now,
+                    endpoint__is_active=True,
+                )
+                .select_related('endpoint', 'event')
+                .order_by('next_attempt_at')[:limit]
+            )
+            if not due:
+                return []
+            lease = now + timedelta(seconds=self.timeout * 2)
+            WebhookDelivery.objects.filter(pk__in=[delivery.pk for delivery in due]).update(next_attempt_at=lease)
+
+        by_endpoint = defaultdict(list)
+        for delivery in due:
+            by_endpoint[delivery.endpoint_id].append(delivery)
+        batches = []
+        for deliveries in by_endpoint.values():
+            deliveries.sort(key=lambda delivery: delivery.event.created_at)
+            endpoint = deliveries[0].endpoint
+            endpoint.secret  # decrypt here: the key lookup may query, which the event loop must not
+            for start in range(0, len(deliveries), self.batch_size):
+                batches.append((endpoint, deliveries[start:start + self.batch_size]))
+        return batches
+
+    async def send(self, endpoint, deliveries):
+        """POST one batch; returns ``(status_code, error)``."""
+        body = json.dumps(
+            {'events': [delivery.event.as_payload() for delivery in deliveries]},
+            separators=(',', ':'),
+        ).encode()
+        headers = {
+            signing.SIGNATURE_HEADER: signing.sign(endpoint.secret, body),
+            'X-GreenTrace-Delivery': uuid.uuid4().hex,
+        }
+        try:
+            status = await post(endpoint.url, body, headers, self.timeout, self.allow_private_hosts)
+        except DeliveryError as exc:
+            return None, str(exc)
+        return status, None if 200 <= status < 300 else f'HTTP {status}'
+
+    def record(self, endpoint, deliveries, status, error):
+        """Store the outcome of one batch; returns a ``Counter`` of delivery results."""
+        now = timezone.now()
+        results = Counter()
+        for delivery in deliveries:
+            delivery.attempts += 1
+            delivery.last_status_code = status
+            delivery.last_error = error or ''
+            if error is None:
+                delivery.status = WebhookDelivery.DeliveryStatus.DELIVERED
+                delivery.delivered_at = now
+                results['delivered'] += 1
+            elif delivery.attempts >= self.max_attempts:
+                delivery.status = WebhookDelivery.DeliveryStatus.FAILED
+                results['failed'] += 1
+            else:
+                delivery.next_attempt_at = now + timedelta(
+                    seconds=backoff(delivery.attempts, self.base_delay, self.max_delay)
+                )
+                results['retry'] += 1
+        with transaction.atomic():
+            WebhookDelivery.objects.bulk_update(deliveries, [
+                'attempts', 'last_status_code', 'last_error', 'status', 'delivered_at', 'next_attempt_at',
+            ])
+            if error is None:
+                WebhookEndpoint.objects.filter(pk=endpoint.pk).update(consecutive_failures=0, last_success_at=now)
+            else:
+                WebhookEndpoint.objects.filter(pk=endpoint.pk).update(consecutive_failures=F('consecutive_failures') + 1)
+
+        if error is not None:
+            logger.warning(f"Webhook batch of {len(deliveries)} to {endpoint.url} failed: {error}")
+        return results
+
+    def prune(self):
+        """Drop events (and their deliveries) past ``retention_days``."""
+        cutoff = timezone.now() - timedelta(days=self.retention_days)
+        deleted, _ = WebhookEvent.objects.filter(dispatched=True, created_at__lt=cutoff).delete()
+        return deleted
+
+    async def atick(self):
+        """One fan-out-and-deliver round; returns ``(dispatched events, sent batches)``."""
+        from greentrace.metrics import registry
+
+        dispatched = await sync_to_async(self.fan_out)()
+        batches = await sync_to_async(self.claim_batches)()
+        connections_slots = asyncio.Semaphore(self.max_connections)
+        endpoint_slots = {}
+
+        async def deliver(endpoint, deliveries):
+            slots = endpoint_slots.setdefault(endpoint.pk, asyncio.Semaphore(max(1, endpoint.max_concurrency)))
+            async with slots, connections_slots:
+                status, error = await self.send(endpoint, deliveries)
+            results = await sync_to_async(self.record)(endpoint, deliveries, status, error)
+            for result, count in results.items():
+                registry.inc('greentrace_webhook_events_total', {'result': result}, count)
+
+        results = await asyncio.gather(*(deliver(*batch) for batch in batches), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("Webhook batch failed to record", exc_info=result)
+
+        if time.monotonic() - self._last_prune > 3600:
+            self._last_prune = time.monotonic()
+            await sync_to_async(self.prune)()
+        return dispatched, len(batches)
+
+    def tick(self):
+        return asyncio.run(self.atick())
+
+    def run(self, interval=1.0):
+        logger.info(f"Webhook dispatcher starting (batch size {self.batch_size})")
+        while True:
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Webhook dispatcher round failed")
+                connections.close_all()
+            time.sleep(interval)
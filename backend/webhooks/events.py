@@ -0,0 +1,114 @@
+"""
+Webhook events, written to the outbox by model signals.
+
+``emit`` only inserts a ``WebhookEvent`` row on the connection the change
+was saved with, so the event commits or rolls back with it and no request
+ever waits on a partner's server. ``Product.save`` and ``CarbonCredit.save``
+run in a transaction for this reason. The dispatcher
+(``run_webhook_dispatcher``) delivers the rows afterwards.
+"""
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from blockchain.simulator import ProductRegistryContract
+from carbon_credits.models import CarbonCredit
+from products.models import Product, ProductDetail
+from .models import WebhookEvent
+
+EVENT_TYPES = (
+    'product.created',
+    'product.updated',
+    'compliance.updated',
+    'credit.issued',
+    'credit.transferred',
+    'credit.retired',
+)
+
+
+def emit(event_type, owner_id, data, using=None):
+    """Add an event for ``owner_id``'s endpoints to the outbox."""
+    return WebhookEvent.objects.db_manager(using).create(event_type=event_type, owner_id=owner_id, data=data)
+
+
+def product_data(product):
+    return {
+        'product_id': product.id,
+        'batch_id': product.batch_id,
+        'name': product.name,
+        'certification': product.certification,
+        'blockchain_hash': product.blockchain_hash,
+    }
+
+
+def credit_data(credit):
+    return {
+        'credit_id': credit.id,
+        'amount': str(credit.amount),
+        'unit': credit.unit,
+        'status': credit.status,
+        'blockchain_hash': credit.blockchain_hash,
+    }
+
+
+@receiver(pre_save, sender=Product)
+def remember_compliance_inputs(sender, instance, raw=False, **kwargs):
+    """Keep the stored inputs of the compliance score to tell when it changes."""
+    if not instance.pk or raw:
+        return
+    certification = Product.objects.filter(pk=instance.pk).values_list('certification', flat=True).first()
+    if certification is None:
+        return
+    carbon_activity = None  # details untouched, so unchanged
+    if getattr(instance, '_details_changed', False):
+        stored = ProductDetail.objects.only('carbon_activity').filter(pk=instance.pk).first()
+        carbon_activity = stored.carbon_activity if stored else ''
+    instance._previous_compliance = (certification, carbon_activity)
+
+
+@receiver(post_save, sender=Product)
+def emit_product_event(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    data = product_data(instance)
+    emit('product.created' if created else 'product.updated', instance.created_by_id, data, using)
+
+    previous = instance.__dict__.pop('_previous_compliance', None)
+    if previous is None:
+        return
+    certification, carbon_activity = previous
+    if certification != instance.certification or (
+        carbon_activity is not None and carbon_activity != instance.carbon_activity
+    ):
+        emit('compliance.updated', instance.created_by_id, {
+            **data,
+            'compliance_score': ProductRegistryContract.calculate_compliance_score(
+                instance.certification, instance.carbon_activity
+            ),
+        }, using)
+
+
+@receiver(pre_save, sender=CarbonCredit)
+def remember_credit_status(sender, instance, raw=False, **kwargs):
+    # Credits get their id before the first save, so check for an insert explicitly
+    if not instance._state.adding and not raw:
+        instance._previous_status = (
+            CarbonCredit.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=CarbonCredit)
+def emit_credit_event(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    previous = instance.__dict__.pop('_previous_status', None)
+    if created:
+        event_type = 'credit.issued' if instance.status == CarbonCredit.CreditStatus.ISSUED else None
+    elif previous != instance.status:
+        event_type = {
+            CarbonCredit.CreditStatus.TRANSFERRED: 'credit.transferred',
+            CarbonCredit.CreditStatus.RETIRED: 'credit.retired',
+        }.get(instance.status)
+    else:
+        event_type = None
+    if event_type:
+        emit(event_type, instance.created_by_id, credit_data(instance), using)
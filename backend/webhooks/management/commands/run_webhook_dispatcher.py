@@ -0,0 +1,22 @@
+"""
+Deliver webhook events from the outbox to partner endpoints.
+"""
+from django.core.management.base import BaseCommand
+
+from webhooks.delivery import WebhookDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Fan out webhook events and deliver them in signed, retried batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between rounds')
+        parser.add_argument('--once', action='store_true', help='Run a single round and exit')
+
+    def handle(self, *args, **options):
+        dispatcher = WebhookDispatcher()
+        if options['once']:
+            dispatched, batches = dispatcher.tick()
+            self.stdout.write(self.style.SUCCESS(f'Dispatched {dispatched} event(s), sent {batches} batch(es)'))
+            return
+        dispatcher.run(interval=options['interval'])
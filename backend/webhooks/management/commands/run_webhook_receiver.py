@@ -0,0 +1,65 @@
+"""
+Run a local webhook receiver that verifies signatures and prints each batch.
+"""
+import json
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from webhooks.signing import SIGNATURE_HEADER, SignatureError, verify
+
+
+class Command(BaseCommand):
+    help = 'Receive webhook batches locally, checking their signatures (for development and tests)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8600)
+        parser.add_argument('--secret', required=True, help="The endpoint's signing secret")
+        parser.add_argument('--failure-rate', type=float, default=0.0,
+                            help='Fraction of batches answered with 503, to exercise retries (0-1)')
+
+    def handle(self, *args, **options):
+        stdout, style = self.stdout, self.style
+        seen = set()
+
+        class ReceiverHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                try:
+                    verify(options['secret'], self.headers.get(SIGNATURE_HEADER), body)
+                except SignatureError as exc:
+                    stdout.write(style.ERROR(f'Rejected batch: {exc}'))
+                    return self.reply(401)
+                if random.random() < options['failure_rate']:
+                    stdout.write(style.WARNING('Answering 503 (simulated failure)'))
+                    return self.reply(503)
+
+                events = json.loads(body)['events']
+                duplicates = sum(event['id'] in seen for event in events)
+                seen.update(event['id'] for event in events)
+                stdout.write(style.SUCCESS(
+                    f"Batch {self.headers.get('X-GreenTrace-Delivery')}: {len(events)} event(s)"
+                    + (f', {duplicates} duplicate(s)' if duplicates else '')
+                ))
+                for event in events:
+                    stdout.write(f"  {event['timestamp']} {event['event']} {json.dumps(event['data'])}")
+                self.reply(200)
+
+            def reply(self, status):
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), ReceiverHandler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Webhook receiver listening on http://{options['host']}:{options['port']}/"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,119 @@
+"""
+Webhook models for GreenTrace.
+"""
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from privacy.fields import EncryptedTextField
+
+
+class WebhookEndpoint(models.Model):
+    """A partner URL receiving signed batches of the owner's events."""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='webhook_endpoints'
+    )
+    url = models.URLField(max_length=500)
+    events = models.JSONField(default=list, help_text=_('Subscribed event types'))
+    secret = EncryptedTextField(tenant_field='owner_id', help_text=_('HMAC signing secret'))
+    is_active = models.BooleanField(default=True)
+    max_concurrency = models.PositiveSmallIntegerField(
+        default=2,
+        help_text=_('Batches in flight to this endpoint at once')
+    )
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('Webhook Endpoint')
+        verbose_name_plural = _('Webhook Endpoints')
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'url'], name='unique_webhook_endpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.url} ({', '.join(self.events)})"
+
+
+class WebhookEvent(models.Model):
+    """
+    Outbox row, written in the same transaction as the change it describes.
+
+    The dispatcher turns each event into one ``WebhookDelivery`` per
+    subscribed endpoint and then marks it dispatched.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event_type = models.CharField(max_length=50)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='webhook_events'
+    )
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+    dispatched = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = _('Webhook Event')
+        verbose_name_plural = _('Webhook Events')
+        indexes = [
+            models.Index(fields=['dispatched', 'created_at'], name='webhook_event_outbox'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.id}"
+
+    def as_payload(self):
+        return {
+            'id': str(self.id),
+            'event': self.event_type,
+            'timestamp': self.created_at.isoformat().replace('+00:00', 'Z'),
+            'data': self.data,
+        }
+
+
+class WebhookDelivery(models.Model):
+    """One event owed to one endpoint, retried with exponential backoff."""
+
+    class DeliveryStatus(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        DELIVERED = 'delivered', _('Delivered')
+        FAILED = 'failed', _('Failed')
+
+    endpoint = models.ForeignKey(WebhookEndpoint, on_delete=models.CASCADE, related_name='deliveries')
+    event = models.ForeignKey(WebhookEvent, on_delete=models.CASCADE, related_name='deliveries')
+    status = models.CharField(
+        max_length=20,
+        choices=DeliveryStatus.choices,
+        default=DeliveryStatus.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        verbose_name = _('Webhook Delivery')
+        verbose_name_plural = _('Webhook Deliveries')
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='webhook_delivery_due'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['endpoint', 'event'], name='unique_webhook_delivery'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} -> {self.endpoint_id} ({self.status})"
@@ -0,0 +1,51 @@
+"""
+HMAC signatures for webhook requests.
+
+Every POST carries ``X-GreenTrace-Signature: t=<unix time>,v1=<hex>``, where
+the hex digest is HMAC-SHA256 over ``"<t>.<raw body>"`` keyed with the
+endpoint's secret. Receivers recompute it and reject stale timestamps, so
+a captured request cannot be replayed later.
+"""
+import hashlib
+import hmac
+import secrets
+import time
+
+SIGNATURE_HEADER = 'X-GreenTrace-Signature'
+
+
+class SignatureError(Exception):
+    pass
+
+
+def generate_secret():
+    return f'whsec_{secrets.token_urlsafe(32)}'
+
+
+def compute(secret, timestamp, body):
+    message = f'{timestamp}.'.encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign(secret, body, timestamp=None):
+    """Header value for ``body`` (bytes)."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    return f't={timestamp},v1={compute(secret, timestamp, body)}'
+
+
+def verify(secret, header, body, tolerance=300, now=None):
+    """Raise ``SignatureError`` unless ``header`` signs ``body`` within ``tolerance`` seconds."""
+    parts = {}
+    for item in (header or '').split(','):
+        key, _, value = item.strip().partition('=')
+        parts.setdefault(key, []).append(value)
+    try:
+        timestamp = int(parts['t'][0])
+    except (KeyError, ValueError):
+        raise SignatureError('Missing or malformed timestamp')
+    now = time.time() if now is None else now
+    if tolerance and abs(now - timestamp) > tolerance:
+        raise SignatureError('Timestamp outside tolerance')
+    expected = compute(secret, timestamp, body)
+    if not any(hmac.compare_digest(expected, candidate) for candidate in parts.get('v1', [])):
+        raise SignatureError('Signature mismatch')
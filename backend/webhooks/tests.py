@@ -0,0 +1,47 @@
+"""
+Authentication and request checks of the webhook configuration endpoint.
+"""
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from users.models import UserProfile
+from users.tokens import issue_token
+from .models import WebhookEndpoint
+
+URL = '/api/webhooks/configure/'
+BODY = json.dumps({'url': 'https://example.com/hook', 'events': ['product.created']})
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class ConfigureWebhookTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('producer')
+        cls.profile = UserProfile.objects.create(
+            user=cls.user, wallet_address='0x' + 'ab' * 20, role=UserProfile.UserRole.PRIVATE
+        )
+
+    def token_header(self):
+        token, _ = issue_token(self.profile)
+        return {'HTTP_AUTHORIZATION': f'Wallet {token}'}
+
+    def test_wallet_token_creates_endpoint(self):
+        response = self.client.post(URL, BODY, content_type='application/json', **self.token_header())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(WebhookEndpoint.objects.get().owner_id, self.user.pk)
+
+    def test_session_is_rejected(self):
+        self.client.force_login(self.user)
+        response = self.client.post(URL, BODY, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(WebhookEndpoint.objects.exists())
+
+    def test_non_json_body_is_rejected(self):
+        for content_type in ('text/plain', 'application/x-www-form-urlencoded'):
+            with self.subTest(content_type):
+                response = self.client.post(URL, BODY, content_type=content_type, **self.token_header())
+                self.assertEqual(response.status_code, 415)
+        self.assertFalse(WebhookEndpoint.objects.exists())
@@ -0,0 +1,9 @@
+"""
+Webhook URLs.
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('configure/', views.configure_webhook, name='configure_webhook'),
+]
@@ -0,0 +1,67 @@
+"""
+Webhook views for GreenTrace.
+"""
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from greentrace.responses import JSON_CONTENT_TYPE, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+import json
+from users.authentication import get_token_claims
+from users.tokens import InvalidWalletToken
+from .events import EVENT_TYPES
+from .models import WebhookEndpoint
+from .signing import generate_secret
+
+validate_url = URLValidator(schemes=['http', 'https'])
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def configure_webhook(request):
+    """
+    Create or update the caller's endpoint for ``url``.
+    
+    The endpoint belongs to the wallet in the Authorization header's token
+    and receives that user's events. Session cookies are not accepted: the
+    view is CSRF-exempt, so a cookie would let any site register endpoints.
+    Without a ``secret`` one is generated; the response is the only place
+    it is shown.
+    """
+    try:
+        claims = get_token_claims(request)
+    except InvalidWalletToken as e:
+        return JsonResponse({'error': str(e)}, status=401)
+    if claims is None:
+        return JsonResponse({'error': 'Wallet token required'}, status=401)
+    if request.content_type != JSON_CONTENT_TYPE:
+        return JsonResponse({'error': f'Content-Type must be {JSON_CONTENT_TYPE}'}, status=415)
+    try:
+        data = json.loads(request.body or '{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    
+    url = data.get('url') or ''
+    try:
+        validate_url(url)
+    except ValidationError:
+        return JsonResponse({'error': 'url must be an http(s) URL'}, status=400)
+    
+    events = data.get('events') or []
+    unknown = [event for event in events if event not in EVENT_TYPES] if isinstance(events, list) else events
+    if not events or unknown:
+        return JsonResponse({'error': f'events must be a list of: {", ".join(EVENT_TYPES)}'}, status=400)
+    
+    secret = data.get('secret') or generate_secret()
+    endpoint, created = WebhookEndpoint.objects.update_or_create(
+        owner_id=claims['uid'],
+        url=url,
+        defaults={'events': events, 'secret': secret, 'is_active': data.get('active', True)},
+    )
+    return JsonResponse({
+        'id': endpoint.id,
+        'url': endpoint.url,
+        'events': endpoint.events,
+        'secret': secret,
+        'active': endpoint.is_active,
+    }, status=201 if created else 200)